@@ -1,8 +1,28 @@
 from .deprecated import deprecated
 from .logging import log_entry_exit
+from .memory import log_memory_stats, memory_stats, track_memory
 from .retry import retry
 from .silent import silent
-from .timeit import timeit
+from .timeit import log_timeit_stats, timeit, timeit_stats
+from .trace import clear_trace, export_trace, set_trace_capacity, span, trace, trace_spans
 from .with_lock import with_lock
 
-__all__ = ["deprecated", "log_entry_exit", "retry", "silent", "timeit", "with_lock"]
+__all__ = [
+    "clear_trace",
+    "deprecated",
+    "export_trace",
+    "log_entry_exit",
+    "log_memory_stats",
+    "log_timeit_stats",
+    "memory_stats",
+    "retry",
+    "set_trace_capacity",
+    "silent",
+    "span",
+    "timeit",
+    "timeit_stats",
+    "trace",
+    "trace_spans",
+    "track_memory",
+    "with_lock",
+]
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import math
+import random
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+def sampler(sample_every: int = 1, sample_rate: float | None = None) -> tuple[Callable[[], int] | None, float]:
+    """Return a function giving the number of calls to skip after an instrumented call, and the weight of a sample.
+
+    Wrappers count the skipped calls down, so an unsampled call costs a compare and a decrement. Under contention
+    between threads a decrement can be lost, which only skips a few more calls. The function is None when every
+    call is instrumented. The weight is the number of calls each instrumented call stands for, so statistics
+    recorded with it estimate every call, even when wrappers with different sampling share them.
+
+    Args:
+        sample_every (int): Instrument 1 in `sample_every` calls, starting with the first call.
+        sample_rate (float | None): Instrument each call with this probability instead, between 0 and 1. The
+            gaps are drawn from the matching geometric distribution.
+
+    """
+    if sample_rate is not None:
+        if sample_every != 1:
+            msg = "Pass either sample_every or sample_rate, not both."
+            raise ValueError(msg)
+        if not 0 < sample_rate <= 1:
+            msg = f"sample_rate must be greater than 0 and at most 1, not {sample_rate}."
+            raise ValueError(msg)
+        if sample_rate == 1:
+            return None, 1
+        log_miss = math.log1p(-sample_rate)
+        rand = random.random
+        return lambda: int(math.log1p(-rand()) / log_miss), 1 / sample_rate
+
+    if sample_every < 1:
+        msg = f"sample_every must be at least 1, not {sample_every}."
+        raise ValueError(msg)
+    if sample_every == 1:
+        return None, 1
+    return lambda: sample_every - 1, sample_every
@@ -1,13 +1,37 @@
+from __future__ import annotations
+
 import asyncio
 import functools
 import logging
 
+from mooch.decorators._sampling import sampler
+
+
+def log_entry_exit(func: callable | None = None, *, sample_every: int = 1, sample_rate: float | None = None):  # noqa: ANN201
+    """Log the entry (with the arguments) and exit of a sync or async function at DEBUG level.
+
+    With `sample_every` or `sample_rate`, only some calls are logged; the others go straight to the function.
+
+    Args:
+        func (callable): The function to log.
+        sample_every (int): Log 1 in `sample_every` calls, starting with the first.
+        sample_rate (float | None): Log each call with this probability instead, e.g. 0.01 for 1%.
 
-def log_entry_exit(func: callable):  # noqa: ANN201
+    """
+    if func is None:
+        return functools.partial(log_entry_exit, sample_every=sample_every, sample_rate=sample_rate)
+    gap, _ = sampler(sample_every, sample_rate)
     logger = logging.getLogger(func.__module__)
+    skip = 0
 
     @functools.wraps(func)
     def run_func(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        nonlocal skip
+        if skip > 0:
+            skip -= 1
+            return func(*args, **kwargs)
+        if gap is not None:
+            skip = gap()
         logger.debug(f"Entering {func.__name__}() with args={args}, kwargs={kwargs}")
         result = func(*args, **kwargs)
         logger.debug(f"Exiting {func.__name__}()")
@@ -15,6 +39,12 @@ def log_entry_exit(func: callable):  # noqa: ANN201
 
     @functools.wraps(func)
     async def async_run_func(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        nonlocal skip
+        if skip > 0:
+            skip -= 1
+            return await func(*args, **kwargs)
+        if gap is not None:
+            skip = gap()
         logger.debug(f"Entering {func.__name__}() with args={args}, kwargs={kwargs}")
         result = await func(*args, **kwargs)
         logger.debug(f"Exiting {func.__name__}()")
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import contextlib
+import functools
+import itertools
+import logging
+import threading
+import tracemalloc
+from typing import TYPE_CHECKING, NamedTuple
+
+from mooch.decorators._sampling import sampler
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+logger = logging.getLogger(__name__)
+
+_profiles: dict[str, MemoryProfile] = {}
+_profiles_lock = threading.Lock()
+
+# tracemalloc is started by the first tracked call and stopped by the last one, unless it was already tracing.
+_tracing_lock = threading.Lock()
+_tracing_calls = 0
+_started_tracing = False
+
+# Peak traced bytes of every tracked call in progress, in any thread or task, by call id. The tracemalloc peak
+# is shared by the whole process, so it is folded into all of them before any call resets it.
+_active_peaks: dict[int, int] = {}
+_call_ids = itertools.count()
+
+
+class MemoryStats(NamedTuple):
+    count: int
+    samples: int
+    peak_mean: float
+    peak_max: int
+    net_mean: float
+    net_max: int
+    top_sites: list[tuple[str, int]]
+
+
+class MemoryProfile:
+    """Peak and net bytes allocated by the calls of a function, and the lines that allocated the most."""
+
+    def __init__(self, name: str, top: int = 5) -> None:
+        """Initialize the profile.
+
+        Args:
+            name (str): Name used in the summary, e.g. the qualified name of the tracked function.
+            top (int): Number of allocation sites to report.
+
+        """
+        self.name = name
+        self.top = top
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, peak: int, net: int, sites: dict[str, int] | None = None, weight: float = 1) -> None:
+        """Record the peak and net bytes of one call, and the bytes each site (file:line) still held after it.
+
+        The call stands for `weight` calls, e.g. 100 when 1 in 100 is sampled.
+        """
+        with self._lock:
+            self._samples += 1
+            self._calls += weight
+            self._peak_total += peak * weight
+            self._peak_max = max(self._peak_max, peak)
+            self._net_total += net * weight
+            self._net_max = max(self._net_max, net)
+            if sites:
+                self._sites.update(sites)
+
+    def stats(self) -> MemoryStats:
+        """Return the count and the mean and max of the peak and net bytes per call, with the top sites."""
+        with self._lock:
+            samples = self._samples
+            if samples == 0:
+                return MemoryStats(0, 0, 0.0, 0, 0.0, 0, [])
+            return MemoryStats(
+                round(self._calls),
+                samples,
+                self._peak_total / self._calls,
+                self._peak_max,
+                self._net_total / self._calls,
+                self._net_max,
+                self._sites.most_common(self.top),
+            )
+
+    def reset(self) -> None:
+        """Forget every recorded call."""
+        with self._lock:
+            self._samples = 0
+            self._calls = 0
+            self._peak_total = 0
+            self._peak_max = 0
+            self._net_total = 0
+            self._net_max = 0
+            self._sites: collections.Counter[str] = collections.Counter()
+
+    def summary(self) -> str:
+        """Return the statistics as a single line, e.g. for a log message."""
+        stats = self.stats()
+        sites = ", ".join(f"{site} ({size / 1024:.1f}KiB)" for site, size in stats.top_sites)
+        return (
+            f"{self.name}: count={stats.count}, peak mean={stats.peak_mean / 1024:.1f}KiB, "
+            f"peak max={stats.peak_max / 1024:.1f}KiB, net mean={stats.net_mean / 1024:.1f}KiB, "
+            f"net max={stats.net_max / 1024:.1f}KiB" + (f", top sites: {sites}" if sites else "")
+        )
+
+
+def track_memory(  # noqa: ANN201
+    func: callable | None = None,
+    *,
+    top: int = 5,
+    frames: int = 1,
+    sample_every: int = 1,
+    sample_rate: float | None = None,
+):
+    """Record the memory a sync or async function allocates, with `tracemalloc`, into a per-function profile.
+
+    Every tracked call records its peak bytes (the most it had allocated at once) and net bytes (what it still
+    held when it returned) into a `MemoryProfile`, available as the wrapper's `memory_profile` attribute and
+    through `memory_stats()` and `log_memory_stats()`. tracemalloc slows down every allocation while it traces
+    and snapshots are costly, so use `sample_every` or `sample_rate` on busy functions.
+
+    tracemalloc traces the whole process: allocations by other threads, and by other tasks while a coroutine
+    is suspended, count towards the call.
+
+    Args:
+        func (callable): The function to track.
+        top (int): Number of allocation sites to report. 0 to skip the snapshots needed to find them.
+        frames (int): Frames tracemalloc stores per allocation, if this decorator starts it.
+        sample_every (int): Track 1 in `sample_every` calls, starting with the first.
+        sample_rate (float | None): Track each call with this probability instead, e.g. 0.01 for 1%.
+
+    """
+    if func is None:
+        return functools.partial(
+            track_memory,
+            top=top,
+            frames=frames,
+            sample_every=sample_every,
+            sample_rate=sample_rate,
+        )
+    gap, weight = sampler(sample_every, sample_rate)
+    name = f"{func.__module__}.{func.__qualname__}"
+    with _profiles_lock:
+        profile = _profiles.get(name)
+        if profile is None:
+            profile = _profiles[name] = MemoryProfile(name, top)
+        profile.top = max(profile.top, top)
+    skip = 0
+
+    @functools.wraps(func)
+    def sync_wrapper(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        nonlocal skip
+        if skip > 0:
+            skip -= 1
+            return func(*args, **kwargs)
+        if gap is not None:
+            skip = gap()
+        with _tracked(profile, top, frames, weight):
+            return func(*args, **kwargs)
+
+    @functools.wraps(func)
+    async def async_wrapper(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        nonlocal skip
+        if skip > 0:
+            skip -= 1
+            return await func(*args, **kwargs)
+        if gap is not None:
+            skip = gap()
+        with _tracked(profile, top, frames, weight):
+            return await func(*args, **kwargs)
+
+    wrapper = async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+    wrapper.memory_profile = profile
+    return wrapper
+
+
+def memory_stats(*, reset: bool = False) -> dict[str, MemoryStats]:
+    """Return the statistics of every `@track_memory` function by qualified name, optionally resetting."""
+    with _profiles_lock:
+        profiles = list(_profiles.values())
+    stats = {}
+    for profile in profiles:
+        stats[profile.name] = profile.stats()
+        if reset:
+            profile.reset()
+    return stats
+
+
+def log_memory_stats(*, level: int = logging.INFO, reset: bool = False) -> None:
+    """Log a summary line for every `@track_memory` function that has been called."""
+    with _profiles_lock:
+        profiles = list(_profiles.values())
+    for profile in profiles:
+        if profile.stats().count:
+            logger.log(level, profile.summary())
+        if reset:
+            profile.reset()
+
+
+@contextlib.contextmanager
+def _tracked(profile: MemoryProfile, top: int, frames: int, weight: float) -> Iterator[None]:
+    _start_tracing(frames)
+    try:
+        before = _snapshot() if top else None
+        call_id, start = _begin_call()
+        try:
+            yield
+        finally:
+            current, peak = _end_call(call_id)
+            sites = None
+            if before is not None:
+                sites = {
+                    f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}": stat.size_diff
+                    for stat in _snapshot().compare_to(before, "lineno")
+                    if stat.size_diff > 0
+                }
+            profile.record(peak - start, current - start, sites, weight)
+    finally:
+        _stop_tracing()
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    """Take a snapshot without the allocations of tracemalloc itself and of this module."""
+    return tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)),  # noqa: FBT003
+    )
+
+
+def _begin_call() -> tuple[int, int]:
+    """Register a call, returning its id and the traced bytes it starts from."""
+    with _tracing_lock:
+        _fold_peak()
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        call_id = next(_call_ids)
+        _active_peaks[call_id] = start
+    return call_id, start
+
+
+def _end_call(call_id: int) -> tuple[int, int]:
+    """Unregister a call, returning the traced bytes at its end and the peak reached while it ran."""
+    with _tracing_lock:
+        _fold_peak()
+        return tracemalloc.get_traced_memory()[0], _active_peaks.pop(call_id)
+
+
+def _fold_peak() -> None:
+    """Fold the tracemalloc peak into every active call, as each of them was running since its last reset."""
+    peak = tracemalloc.get_traced_memory()[1]
+    for call_id, call_peak in _active_peaks.items():
+        if peak > call_peak:
+            _active_peaks[call_id] = peak
+
+
+def _start_tracing(frames: int) -> None:
+    global _tracing_calls, _started_tracing  # noqa: PLW0603
+    with _tracing_lock:
+        if _tracing_calls == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            _started_tracing = True
+        _tracing_calls += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_calls, _started_tracing  # noqa: PLW0603
+    with _tracing_lock:
+        _tracing_calls -= 1
+        if _tracing_calls == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
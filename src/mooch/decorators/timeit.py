@@ -1,17 +1,280 @@
+from __future__ import annotations
+
 import asyncio
 import functools
 import logging
+import math
+import threading
 import time
+import types
+from typing import TYPE_CHECKING, NamedTuple
+
+from mooch.decorators._sampling import sampler
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine, Generator
 
 logger = logging.getLogger(__name__)
 
+# Durations below 2**_SUB_BITS ns get a bucket each; longer ones share a bucket with durations within 1/2**_SUB_BITS
+# (about 1.6%) of them, like an HdrHistogram with two significant digits. Any 64-bit duration fits in _BUCKETS.
+_SUB_BITS = 6
+_SUB_BUCKETS = 1 << _SUB_BITS
+_BUCKETS = (64 - _SUB_BITS + 1) << _SUB_BITS
+
+_histograms: dict[str, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+class TimingStats(NamedTuple):
+    count: int
+    min: float
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    samples: int
+
+
+class _Shard:
+    """Durations recorded by a single thread with the same weight, so recording needs no lock.
+
+    `counts` holds the number of durations in each bucket, then their sum in nanoseconds in its last slot. Each
+    duration stands for `weight` calls.
+    """
+
+    __slots__ = ("counts", "thread", "weight")
+
+    def __init__(self, weight: float, thread: threading.Thread | None = None) -> None:
+        self.weight = weight
+        self.thread = thread
+        self.counts = [0] * (_BUCKETS + 1)
+
+
+class _ShardLocal(threading.local):
+    """The counts the current thread records into, None until it first records."""
+
+    counts: list[int] | None = None
+
+
+class LatencyHistogram:
+    """Constant-memory histogram of durations with log-linear buckets, for percentiles without storing samples.
+
+    Every thread records into its own shard per weight; shards are merged when the statistics are read, and the
+    shards of finished threads are folded into one per weight.
+    """
+
+    def __init__(self, name: str, report_interval: float | None = None) -> None:
+        """Initialize the histogram.
+
+        Args:
+            name (str): Name used in the summary, e.g. the qualified name of the timed function.
+            report_interval (float | None): Log the summary at most every `report_interval` seconds, checked
+                when a duration is recorded. None to only report on demand.
+
+        """
+        self.name = name
+        self.report_interval = report_interval
+        self._report_at = None if report_interval is None else time.perf_counter_ns() + int(report_interval * 1e9)
+        self._recorders: dict[float, Callable[[int], None]] = {}
+        self._shards: list[_Shard] = []
+        self._retired: dict[float, _Shard] = {}
+        self._lock = threading.Lock()
+
+    def record(self, nanoseconds: int, weight: float = 1) -> None:
+        """Record one duration in nanoseconds, standing for `weight` calls, e.g. 100 when 1 in 100 is sampled."""
+        recorder = self._recorders.get(weight)
+        if recorder is None:
+            recorder = self.recorder(weight)
+        recorder(nanoseconds)
+
+    def recorder(self, weight: float = 1) -> Callable[[int], None]:
+        """Return a function recording one duration in nanoseconds, standing for `weight` calls.
+
+        It skips the lookup of the weight that `record` does on every call, for instrumentation on a hot path.
+        """
+        with self._lock:
+            recorder = self._recorders.get(weight)
+            if recorder is None:
+                recorder = self._recorders[weight] = self._make_recorder(weight)
+        return recorder
+
+    def stats(self) -> TimingStats:
+        """Return the count and the min/mean/p50/p95/p99/max durations in seconds (within about 1.6%).
+
+        When calls are sampled, `count` estimates the number of calls from the weights of the `samples`
+        recorded, and the durations are weighted the same way.
+        """
+        buckets, total, samples = self._merged()
+        count = sum(buckets)
+        if samples == 0:
+            return TimingStats(0, math.nan, math.nan, math.nan, math.nan, math.nan, math.nan, 0)
+
+        occupied = [index for index, n in enumerate(buckets) if n]
+        low, _ = _bucket(occupied[0])
+        high, width = _bucket(occupied[-1])
+        percentiles = []
+        for percent in (50, 95, 99):
+            rank = max(math.ceil(count * percent / 100), 1)
+            seen = 0
+            for index in occupied:
+                seen += buckets[index]
+                if seen >= rank:
+                    lower, size = _bucket(index)
+                    percentiles.append(min(max(lower + (size - 1) / 2, low), high + width - 1) / 1e9)
+                    break
+        return TimingStats(
+            round(count),
+            low / 1e9,
+            total / count / 1e9,
+            *percentiles,
+            (high + width - 1) / 1e9,
+            samples,
+        )
+
+    def reset(self) -> None:
+        """Forget every recorded duration.
+
+        Threads keep their shards, which are cleared in place: a duration another thread records at the same
+        time may be kept.
+        """
+        with self._lock:
+            self._retired = {}
+            for shard in self._shards:
+                shard.counts[:] = [0] * (_BUCKETS + 1)
+
+    def summary(self) -> str:
+        """Return the statistics as a single line, e.g. for a log message."""
+        stats = self.stats()
+        return (
+            f"{self.name}: count={stats.count}, min={stats.min * 1e3:.3f}ms, mean={stats.mean * 1e3:.3f}ms, "
+            f"p50={stats.p50 * 1e3:.3f}ms, p95={stats.p95 * 1e3:.3f}ms, p99={stats.p99 * 1e3:.3f}ms, "
+            f"max={stats.max * 1e3:.3f}ms" + (f", samples={stats.samples}" if stats.samples != stats.count else "")
+        )
+
+    def _make_recorder(self, weight: float) -> Callable[[int], None]:
+        local = _ShardLocal()
+        reports = self._report_at is not None
+
+        def record(nanoseconds: int) -> None:
+            counts = local.counts
+            if counts is None:
+                counts = local.counts = self._new_shard(weight)
+            if nanoseconds >= _SUB_BUCKETS:
+                shift = nanoseconds.bit_length() - _SUB_BITS - 1
+                counts[(shift << _SUB_BITS) + (nanoseconds >> shift)] += 1
+            else:
+                counts[nanoseconds] += 1
+            counts[_BUCKETS] += nanoseconds
+
+            if reports and time.perf_counter_ns() >= self._report_at:
+                self._report()
+
+        return record
+
+    def _new_shard(self, weight: float) -> list[int]:
+        shard = _Shard(weight, threading.current_thread())
+        with self._lock:
+            self._retire_finished()
+            self._shards.append(shard)
+        return shard.counts
+
+    def _retire_finished(self) -> None:
+        """Fold the shards of finished threads into the retired shards, so short-lived threads use no memory."""
+        live = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                live.append(shard)
+                continue
+            retired = self._retired.get(shard.weight)
+            if retired is None:
+                retired = self._retired[shard.weight] = _Shard(shard.weight)
+            retired.counts = [a + b for a, b in zip(retired.counts, shard.counts)]
+        self._shards = live
+
+    def _merged(self) -> tuple[list[float], float, int]:
+        with self._lock:
+            self._retire_finished()
+            shards = [*self._retired.values(), *self._shards]
+        buckets = [0] * _BUCKETS
+        total = 0
+        samples = 0
+        for shard in shards:
+            counts = shard.counts[:]
+            weight = shard.weight
+            buckets = [merged + n * weight for merged, n in zip(buckets, counts)]
+            total += counts[_BUCKETS] * weight
+            samples += sum(counts) - counts[_BUCKETS]
+        return buckets, total, samples
+
+    def _report(self) -> None:
+        with self._lock:
+            now = time.perf_counter_ns()
+            if now < self._report_at:
+                return
+            self._report_at = now + int(self.report_interval * 1e9)
+        logging.getLogger(self.name.rpartition(".")[0] or __name__).info(self.summary())
+
+
+def timeit(  # noqa: ANN201, PLR0913
+    func: callable | None = None,
+    *,
+    aggregate: bool = False,
+    report_interval: float | None = None,
+    sample_every: int = 1,
+    sample_rate: float | None = None,
+    block_threshold: float | None = None,
+):
+    """Log the execution time of sync or async function.
+
+    Use as `@timeit` to log every call at DEBUG level, or as `@timeit(aggregate=True)` to record the durations
+    of every call, including calls that raise, into a per-function `LatencyHistogram` instead. The histogram is
+    available as the wrapper's `histogram` attribute, and through `timeit_stats()` and `log_timeit_stats()`.
+
+    With `sample_every` or `sample_rate`, only some calls are timed; the others go straight to the function.
+    The aggregated count is scaled up to estimate every call.
+
+    For coroutines, the time spent running the coroutine's steps is measured apart from the time it is suspended
+    in awaits. With `block_threshold`, a WARNING is also logged when a single step runs longer than it, because
+    nothing else runs on the event loop during a step. Aggregated, the running times go into the wrapper's
+    `running_histogram`, named after the function with a " (running)" suffix.
+
+    Args:
+        func (callable): The function to time.
+        aggregate (bool): Record durations into a histogram instead of logging each call.
+        report_interval (float | None): With `aggregate`, also log the function's summary at INFO level at most
+            every `report_interval` seconds.
+        sample_every (int): Time 1 in `sample_every` calls, starting with the first.
+        sample_rate (float | None): Time each call with this probability instead, e.g. 0.01 for 1%.
+        block_threshold (float | None): Seconds a coroutine step may run before it counts as blocking the event
+            loop, e.g. 0.1. None (the default) to not check.
+
+    """
+    if func is None:
+        return functools.partial(
+            timeit,
+            aggregate=aggregate,
+            report_interval=report_interval,
+            sample_every=sample_every,
+            sample_rate=sample_rate,
+            block_threshold=block_threshold,
+        )
+    gap, weight = sampler(sample_every, sample_rate)
+    if aggregate:
+        return _aggregated(func, report_interval, gap, weight, block_threshold)
 
-def timeit(func: callable):  # noqa: ANN201
-    """Log the execution time of sync or async function."""
     logger = logging.getLogger(func.__module__)
+    skip = 0
 
     @functools.wraps(func)
     def sync_wrapper(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        nonlocal skip
+        if skip > 0:
+            skip -= 1
+            return func(*args, **kwargs)
+        if gap is not None:
+            skip = gap()
         start = time.perf_counter()
         result = func(*args, **kwargs)
         end = time.perf_counter()
@@ -21,11 +284,154 @@ def timeit(func: callable):  # noqa: ANN201
 
     @functools.wraps(func)
     async def async_wrapper(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        nonlocal skip
+        if skip > 0:
+            skip -= 1
+            return await func(*args, **kwargs)
+        if gap is not None:
+            skip = gap()
+        timing = [0, 0]
         start = time.perf_counter()
-        result = await func(*args, **kwargs)
+        try:
+            result = await _stepped(func(*args, **kwargs), timing)
+        finally:
+            _check_blocking(logger, func, timing[1], block_threshold)
         end = time.perf_counter()
         duration = end - start
-        logger.debug(f"{func.__name__} executed in {duration:.6f} seconds.")
+        running = timing[0] / 1e9
+        logger.debug(
+            f"{func.__name__} executed in {duration:.6f} seconds "
+            f"({running:.6f} running, {max(duration - running, 0):.6f} suspended in awaits).",
+        )
         return result
 
     return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+
+
+def timeit_stats(*, reset: bool = False) -> dict[str, TimingStats]:
+    """Return the statistics of every `@timeit(aggregate=True)` function by qualified name, optionally resetting."""
+    with _histograms_lock:
+        histograms = list(_histograms.values())
+    stats = {}
+    for histogram in histograms:
+        stats[histogram.name] = histogram.stats()
+        if reset:
+            histogram.reset()
+    return stats
+
+
+def log_timeit_stats(*, level: int = logging.INFO, reset: bool = False) -> None:
+    """Log a summary line for every `@timeit(aggregate=True)` function that has been called."""
+    with _histograms_lock:
+        histograms = list(_histograms.values())
+    for histogram in histograms:
+        if histogram.stats().count:
+            logger.log(level, histogram.summary())
+        if reset:
+            histogram.reset()
+
+
+def _aggregated(
+    func: callable,
+    report_interval: float | None,
+    gap: Callable[[], int] | None,
+    weight: float,
+    block_threshold: float | None,
+) -> callable:
+    name = f"{func.__module__}.{func.__qualname__}"
+    histogram = _histogram(name, report_interval)
+    record = histogram.recorder(weight)
+    logger = logging.getLogger(func.__module__)
+    perf_counter_ns = time.perf_counter_ns
+    skip = 0
+
+    @functools.wraps(func)
+    def sync_wrapper(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        nonlocal skip
+        if skip > 0:
+            skip -= 1
+            return func(*args, **kwargs)
+        if gap is not None:
+            skip = gap()
+        start = perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(perf_counter_ns() - start)
+
+    @functools.wraps(func)
+    async def async_wrapper(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        nonlocal skip
+        if skip > 0:
+            skip -= 1
+            return await func(*args, **kwargs)
+        if gap is not None:
+            skip = gap()
+        timing = [0, 0]
+        start = perf_counter_ns()
+        try:
+            return await _stepped(func(*args, **kwargs), timing)
+        finally:
+            record(perf_counter_ns() - start)
+            record_running(timing[0])
+            _check_blocking(logger, func, timing[1], block_threshold)
+
+    if not asyncio.iscoroutinefunction(func):
+        sync_wrapper.histogram = histogram
+        return sync_wrapper
+    running_histogram = _histogram(f"{name} (running)", report_interval)
+    record_running = running_histogram.recorder(weight)
+    async_wrapper.histogram = histogram
+    async_wrapper.running_histogram = running_histogram
+    return async_wrapper
+
+
+def _histogram(name: str, report_interval: float | None) -> LatencyHistogram:
+    """Return the registered histogram called `name`, registering a new one if there is none."""
+    with _histograms_lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = LatencyHistogram(name, report_interval)
+    return histogram
+
+
+@types.coroutine
+def _stepped(coro: Coroutine, timing: list[int]) -> Generator:
+    """Await `coro` one step at a time, adding the time its steps run to timing[0] and the longest to timing[1].
+
+    A step is one `send` into the coroutine, from where it resumes until it next suspends, returns or raises.
+    """
+    value, error = None, None
+    while True:
+        start = time.perf_counter_ns()
+        try:
+            future = coro.send(value) if error is None else coro.throw(error)
+        except StopIteration as e:
+            return e.value
+        finally:
+            step = time.perf_counter_ns() - start
+            timing[0] += step
+            timing[1] = max(timing[1], step)
+            # The error's traceback refers to this frame: keeping it would leave a reference cycle holding the
+            # coroutine and its event loop, for a later garbage collection to finalize.
+            value = error = None
+        try:
+            value, error = (yield future), None
+        except GeneratorExit:
+            coro.close()
+            raise
+        except BaseException as e:  # noqa: BLE001 - cancellation and every other error go to the coroutine
+            value, error = None, e
+
+
+def _check_blocking(logger: logging.Logger, func: callable, longest_step: int, block_threshold: float | None) -> None:
+    if block_threshold is not None and longest_step > block_threshold * 1e9:
+        logger.warning(f"{func.__name__} blocked the event loop for {longest_step / 1e9:.6f} seconds in one step.")
+
+
+def _bucket(index: int) -> tuple[int, int]:
+    """Return the lowest duration in nanoseconds and the width of a bucket."""
+    if index < 2 * _SUB_BUCKETS:
+        return index, 1
+    shift = (index >> _SUB_BITS) - 1
+    return (index - (shift << _SUB_BITS)) << shift, 1 << shift
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import contextlib
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+DEFAULT_CAPACITY = 10_000
+
+# Finished spans, oldest first. Appending to a deque is atomic, so recording needs no lock.
+_spans: collections.deque[Span] = collections.deque(maxlen=DEFAULT_CAPACITY)
+_current: contextvars.ContextVar[int | None] = contextvars.ContextVar("mooch_current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span(NamedTuple):
+    name: str
+    span_id: int
+    parent_id: int | None
+    start_ns: int
+    duration_ns: int
+    track_id: int
+    track_name: str
+    error: str | None
+    attributes: dict
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: object) -> Iterator[dict]:
+    """Record the enclosed block as a span, nested under the span that is current where it runs.
+
+    The current span is kept in a context variable, so every asyncio task continues the span that was
+    current when it was created, and code run with `contextvars.copy_context().run` (e.g. `asyncio.to_thread`)
+    continues it in another thread. A plain new thread starts without a current span.
+
+    Args:
+        name (str): Name of the span, e.g. the operation.
+        **attributes: Values stored with the span and shown in the trace viewer.
+
+    Yields:
+        dict: The span's attributes, to add values found out inside the block.
+
+    """
+    span_id = next(_span_ids)
+    parent_id = _current.get()
+    token = _current.set(span_id)
+    error = None
+    start = time.perf_counter_ns()
+    try:
+        yield attributes
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter_ns() - start
+        _current.reset(token)
+        track_id, track_name = _track()
+        _spans.append(Span(name, span_id, parent_id, start, duration, track_id, track_name, error, attributes))
+
+
+def trace(func: callable | None = None, *, name: str | None = None):  # noqa: ANN201
+    """Record every call of a sync or async function as a span, see `span`.
+
+    Args:
+        func (callable): The function to trace.
+        name (str | None): Name of the spans. Defaults to the function's qualified name.
+
+    """
+    if func is None:
+        return functools.partial(trace, name=name)
+    span_name = name or func.__qualname__
+
+    @functools.wraps(func)
+    def sync_wrapper(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        with span(span_name):
+            return func(*args, **kwargs)
+
+    @functools.wraps(func)
+    async def async_wrapper(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        with span(span_name):
+            return await func(*args, **kwargs)
+
+    return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+
+
+def trace_spans() -> list[Span]:
+    """Return the finished spans kept in the ring buffer, oldest first."""
+    return list(_spans)
+
+
+def clear_trace() -> None:
+    """Forget every finished span."""
+    _spans.clear()
+
+
+def set_trace_capacity(capacity: int) -> None:
+    """Keep at most `capacity` finished spans, dropping the oldest ones first."""
+    global _spans  # noqa: PLW0603
+    _spans = collections.deque(_spans, maxlen=capacity)
+
+
+def export_trace(path: str | Path | None = None) -> dict:
+    """Return the finished spans as Chrome trace-event JSON, and write it to `path` if given.
+
+    Open the file in https://ui.perfetto.dev or chrome://tracing to see the spans as a flame chart, with one
+    track per thread or asyncio task.
+    """
+    pid = os.getpid()
+    tids: dict[int, int] = {}
+    events = []
+    for s in list(_spans):
+        tid = tids.get(s.track_id)
+        if tid is None:
+            tid = tids[s.track_id] = len(tids) + 1
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": s.track_name}})
+        args = {**s.attributes, "span_id": s.span_id, "parent_id": s.parent_id}
+        if s.error is not None:
+            args["error"] = s.error
+        events.append(
+            {
+                "name": s.name,
+                "cat": "mooch",
+                "ph": "X",
+                "ts": s.start_ns / 1e3,
+                "dur": s.duration_ns / 1e3,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            },
+        )
+
+    trace_json = {"traceEvents": events, "displayTimeUnit": "ms"}
+    if path is not None:
+        Path(path).write_text(json.dumps(trace_json, default=str))
+    return trace_json
+
+
+def _track() -> tuple[int, str]:
+    """Return an id and a name for the asyncio task, or else the thread, running the caller."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return id(task), f"{threading.current_thread().name} / {task.get_name()}"
+    return threading.get_ident(), threading.current_thread().name
@@ -0,0 +1,5 @@
+import sys
+
+from mooch.location.pipeline import main
+
+sys.exit(main())
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, TypeVar
+
+from mooch.location.city_index import CityIndex
+from mooch.location.exceptions import LocationError
+from mooch.location.location import (
+    _bulk_inputs,
+    _check_city,
+    _city_and_state_key,
+    _city_suggestion,
+    _location_fields,
+    _normalize_state,
+    _zip_code_key,
+)
+from mooch.location.providers import API_URL, _city_and_state_fields, _zip_code_fields
+from mooch.location.rate_limit import TokenBucket, _failure, _pause_if_throttled
+from mooch.location.single_flight import AsyncSingleFlight
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    import httpx
+
+    from mooch.location.cache import LocationCache
+
+T = TypeVar("T")
+
+# Concurrent API lookups for the same key share one request.
+_in_flight = AsyncSingleFlight()
+
+
+class AsyncLocation:
+    """Awaitable counterpart of `Location` that resolves through a non-blocking `httpx.AsyncClient`.
+
+    Requires the optional `httpx` dependency (`pip install mooch[async]`).
+    """
+
+    api_url: str = API_URL
+    default_cache: LocationCache | None = None
+    # Reject city names with no close match in the bundled ZIP database without an API request, and suggest the
+    # closest bundled name when the API rejects a city.
+    validate_cities: bool = True
+    # Shared by every API request. Set a rate, e.g. `TokenBucket(rate=10)`, to throttle requests client-side.
+    rate_limiter: TokenBucket = TokenBucket()
+    # Retries of a throttled (429) or failed (5xx) API request, after its Retry-After delay or a backoff.
+    max_retries: int = 2
+
+    def __init__(self) -> None:
+        self.zip_code = None
+        self.city = None
+        self.state = None
+        self.state_abbreviation = None
+        self.latitude = None
+        self.longitude = None
+        self.places = None
+
+    @property
+    def all_zip_codes(self) -> list[int]:
+        """Return every zip code of the looked up place, e.g. all zip codes of a city, in ascending order."""
+        return sorted({place.zip_code for place in self.places or ()})
+
+    @classmethod
+    async def from_zip(
+        cls,
+        zip_code: int,
+        *,
+        client: httpx.AsyncClient | None = None,
+        cache: LocationCache | None = None,
+    ) -> AsyncLocation:
+        """Resolve the location (city, state, state abbr., lat, long) of a zip code.
+
+        Args:
+            zip_code (int): The zip code to resolve.
+            client (httpx.AsyncClient): Client used for API requests. A short-lived client is created if None.
+            cache (LocationCache): Cache for API lookups. Defaults to `AsyncLocation.default_cache`.
+
+        """
+        location = cls()
+        location.zip_code = zip_code
+        message = f"Invalid zip code {zip_code}."
+        url = f"{cls.api_url}/{zip_code}"
+        await location._load(_zip_code_key(zip_code), url, _zip_code_fields, message, client=client, cache=cache)
+        return location
+
+    @classmethod
+    async def from_city_state(
+        cls,
+        city: str,
+        state: str,
+        *,
+        client: httpx.AsyncClient | None = None,
+        cache: LocationCache | None = None,
+    ) -> AsyncLocation:
+        """Resolve the location (zipcode, lat, long) of a city and state name or abbreviation.
+
+        Args:
+            city (str): The city name to resolve.
+            state (str): The state name or abbreviation of the city.
+            client (httpx.AsyncClient): Client used for API requests. A short-lived client is created if None.
+            cache (LocationCache): Cache for API lookups. Defaults to `AsyncLocation.default_cache`.
+
+        """
+        location = cls()
+        location.city = city
+        location.state, location.state_abbreviation = _normalize_state(state)
+        message = f"Invalid city/state combination: {city}, {location.state}."
+        url = f"{cls.api_url}/{location.state_abbreviation}/{city}"
+        key = _city_and_state_key(city, location.state_abbreviation)
+        if not cls.validate_cities:
+            await location._load(key, url, _city_and_state_fields, message, client=client, cache=cache)
+            return location
+
+        abbreviation = location.state_abbreviation
+        await _query_city_index(abbreviation, _check_city, city, location.state, abbreviation)
+        try:
+            await location._load(key, url, _city_and_state_fields, message, client=client, cache=cache)
+        except LocationError:
+            suggestion = await _query_city_index(abbreviation, _city_suggestion, city, abbreviation)
+            if not suggestion:
+                raise
+            raise LocationError(message + suggestion) from None
+        return location
+
+    @classmethod
+    async def bulk(
+        cls,
+        zip_codes: Iterable[int] | None = None,
+        city_states: Iterable[tuple[str, str]] | None = None,
+        *,
+        max_concurrency: int = 16,
+        client: httpx.AsyncClient | None = None,
+        cache: LocationCache | None = None,
+    ) -> list[AsyncLocation | Exception]:
+        """Resolve many zip codes OR (city, state) pairs concurrently, with at most `max_concurrency` in flight.
+
+        Duplicate inputs are resolved once and share the same AsyncLocation. A lookup that fails does not fail
+        the batch; its exception is returned in its place instead.
+
+        Returns:
+            list[AsyncLocation | Exception]: One result per input, in input order.
+
+        """
+        keys, unique = _bulk_inputs(zip_codes, city_states)
+        if client is not None:
+            results = await cls._resolve_all(unique.values(), max_concurrency, client, cache)
+        else:
+            async with _create_client(max_concurrency) as owned_client:
+                results = await cls._resolve_all(unique.values(), max_concurrency, owned_client, cache)
+
+        resolved = dict(zip(unique, results))
+        return [resolved[key] for key in keys]
+
+    @classmethod
+    async def _resolve_all(
+        cls,
+        inputs: Iterable[tuple],
+        max_concurrency: int,
+        client: httpx.AsyncClient,
+        cache: LocationCache | None,
+    ) -> list[AsyncLocation | Exception]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def resolve(zip_code: int | None, city: str | None, state: str | None) -> AsyncLocation:
+            async with semaphore:
+                if zip_code is not None:
+                    return await cls.from_zip(zip_code, client=client, cache=cache)
+                return await cls.from_city_state(city, state, client=client, cache=cache)
+
+        return await asyncio.gather(*(resolve(*args) for args in inputs), return_exceptions=True)
+
+    async def _load(  # noqa: PLR0913
+        self,
+        key: str,
+        url: str,
+        parse: Callable[[dict], dict],
+        message: str,
+        *,
+        client: httpx.AsyncClient | None,
+        cache: LocationCache | None,
+    ) -> None:
+        """Populate the location data from the cache, or from the API on a cache miss.
+
+        Tasks that miss the cache for the same key at the same time share a single request, if they use the same
+        client and API URL.
+        """
+        cache = cache if cache is not None else self.default_cache
+        found, values = cache.get(key) if cache is not None else (False, None)
+        if not found:
+            values = await _in_flight.do(
+                (key, self.api_url, client),
+                lambda: _fetch(url, parse, client, self.rate_limiter, self.max_retries),
+            )
+            if cache is not None:
+                cache.set(key, values)
+
+        if values is None:
+            raise LocationError(message)
+
+        for name, value in _location_fields(values).items():
+            setattr(self, name, value)
+
+
+async def _query_city_index(state_abbreviation: str, func: Callable[..., T], *args: object) -> T:
+    """Return `func(*args)`, run in a worker thread while the state's part of the city index is not built yet."""
+    if CityIndex.default_built(state_abbreviation):
+        return func(*args)
+    # Building the index (or a state of it) takes long enough to stall the event loop.
+    return await asyncio.to_thread(func, *args)
+
+
+async def _fetch(
+    url: str,
+    parse: Callable[[dict], dict],
+    client: httpx.AsyncClient | None,
+    rate_limiter: TokenBucket | None = None,
+    max_retries: int = 0,
+) -> dict | None:
+    """Fetch and parse an API response. Returns None if the lookup is invalid.
+
+    Throttled (429) and server error (5xx) responses are retried like `Location` retries them.
+    """
+    if client is None:
+        async with _create_client() as owned_client:
+            return await _fetch(url, parse, owned_client, rate_limiter, max_retries)
+
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            await rate_limiter.acquire_async()
+        res = await client.get(url, timeout=5)
+
+        if res.status_code == 404:  # noqa: PLR2004
+            return None
+        if res.status_code == 200:  # noqa: PLR2004
+            return parse(res.json())
+
+        error, delay = _failure(url, res, attempt)
+        paused = _pause_if_throttled(rate_limiter, error, delay)
+        if delay is None or attempt >= max_retries:
+            raise error
+        if not paused:
+            await asyncio.sleep(delay)
+        attempt += 1
+
+
+def _create_client(max_connections: int = 16) -> httpx.AsyncClient:
+    import httpx  # noqa: PLC0415
+
+    return httpx.AsyncClient(limits=httpx.Limits(max_connections=max_connections))
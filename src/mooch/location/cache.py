@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import gzip
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+_SNAPSHOT_VERSION = 1
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class LocationCache:
+    """Two-tier cache of resolved locations: an in-memory LRU with TTL and an optional persistent SQLite file.
+
+    Values are dicts of location fields, or None for a known-invalid lookup (negative caching). Negative
+    entries use their own, usually shorter, TTL.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        ttl: float = 86400,
+        negative_ttl: float = 3600,
+        path: str | Path | None = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept in memory. Least recently used entries are evicted.
+            ttl (float): Seconds a resolved location stays valid.
+            negative_ttl (float): Seconds a known-invalid lookup stays valid.
+            path (str | Path | None): Optional SQLite file used as a persistent second tier.
+
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.path = None if path is None else Path(path)
+
+        self._entries: OrderedDict[str, tuple[float, dict | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self._db = None
+        if self.path is not None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS locations (key TEXT PRIMARY KEY, value TEXT, expires REAL NOT NULL)",
+                )
+
+    def get(self, key: str) -> tuple[bool, dict | None]:
+        """Return (found, value) for a key. A found value of None means the lookup is known to be invalid."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return True, value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, expires FROM locations WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[1] > time.time():
+                    value = None if row[0] is None else json.loads(row[0])
+                    self._store(key, row[1] - time.time(), value)
+                    self._hits += 1
+                    return True, value
+
+            self._misses += 1
+            return False, None
+
+    def set(self, key: str, value: dict | None) -> None:
+        """Store a resolved location, or None to remember that the lookup is invalid."""
+        ttl = self.negative_ttl if value is None else self.ttl
+        with self._lock:
+            self._store(key, ttl, value)
+            if self._db is not None:
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO locations (key, value, expires) VALUES (?, ?, ?)",
+                        (key, None if value is None else json.dumps(value), time.time() + ttl),
+                    )
+
+    def export_snapshot(self, path: str | Path) -> int:
+        """Write every unexpired entry of both tiers to a gzip-compressed JSON snapshot file.
+
+        The file is replaced atomically, so a process loading it never reads a partial snapshot. Entries keep
+        their remaining lifetime: a snapshot loaded later holds only what has not expired in the meantime.
+
+        Args:
+            path (str | Path): Destination file, e.g. "locations.json.gz".
+
+        Returns:
+            int: The number of entries written.
+
+        """
+        now, wall = time.monotonic(), time.time()
+        with self._lock:
+            entries = {
+                key: [key, value, wall + expires - now]
+                for key, (expires, value) in self._entries.items()
+                if expires > now
+            }
+            if self._db is not None:
+                rows = self._db.execute("SELECT key, value, expires FROM locations WHERE expires > ?", (wall,))
+                for key, value, expires in rows:
+                    if key not in entries:
+                        entries[key] = [key, None if value is None else json.loads(value), expires]
+
+        path = Path(path)
+        partial = path.with_name(f"{path.name}.tmp")
+        snapshot = {"version": _SNAPSHOT_VERSION, "entries": list(entries.values())}
+        with gzip.open(partial, "wt", encoding="utf-8") as file:
+            json.dump(snapshot, file, separators=(",", ":"))
+        partial.replace(path)
+        return len(entries)
+
+    def load_snapshot(self, path: str | Path) -> int:
+        """Preload the unexpired entries of a snapshot written by `export_snapshot`, e.g. at process startup.
+
+        Args:
+            path (str | Path): The snapshot file.
+
+        Returns:
+            int: The number of entries loaded.
+
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            snapshot = json.load(file)
+        if snapshot.get("version") != _SNAPSHOT_VERSION:
+            msg = f"Unsupported location cache snapshot: {path}"
+            raise ValueError(msg)
+
+        wall = time.time()
+        entries = [(key, value, expires) for key, value, expires in snapshot["entries"] if expires > wall]
+        with self._lock:
+            for key, value, expires in entries:
+                self._store(key, expires - wall, value)
+            if self._db is not None:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO locations (key, value, expires) VALUES (?, ?, ?)",
+                        [
+                            (key, None if value is None else json.dumps(value), expires)
+                            for key, value, expires in entries
+                        ],
+                    )
+        return len(entries)
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM locations")
+
+    def close(self) -> None:
+        """Close the SQLite connection, if any."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def cache_info(self) -> CacheInfo:
+        """Return the hit, miss and eviction counters and the current size of the in-memory tier."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, self.maxsize, len(self._entries))
+
+    def _store(self, key: str, ttl: float, value: dict | None) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
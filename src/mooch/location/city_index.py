@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from typing import TYPE_CHECKING
+
+from mooch.location.zip_database import ZipDatabase
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+_NON_ALPHANUMERIC = re.compile(r"[\W_]+")
+
+
+class CityIndex:
+    """Per-state index of city names for exact, prefix (autocomplete) and fuzzy (trigram) lookups.
+
+    Names are compared case-insensitively with punctuation and repeated whitespace ignored, so "winston-salem"
+    matches "Winston Salem". Abbreviations are not expanded: "St. Louis" is only a fuzzy match of the bundled
+    "Saint Louis". Fuzzy matches are ranked by the Jaccard similarity of the names' character trigrams.
+    The sorted names and trigram postings of a state are built the first time the state is queried.
+    """
+
+    _default: CityIndex | None = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, cities: Iterable[tuple[str, str]]) -> None:
+        """Build the index.
+
+        Args:
+            cities (Iterable[tuple[str, str]]): The (state abbreviation, city name) pairs to index. Repeated pairs
+                are indexed once, keeping the first spelling.
+
+        """
+        self._names: dict[str, dict[str, str]] = {}
+        for state_abbreviation, city in cities:
+            self._names.setdefault(state_abbreviation.strip().upper(), {}).setdefault(_normalize(city), city)
+        self._states: dict[str, _StateCities] = {}
+        self._states_lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> CityIndex:
+        """Return the process-wide index of the bundled ZIP database, building it on first use."""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls(ZipDatabase.default().cities())
+        return cls._default
+
+    @classmethod
+    def default_built(cls, state_abbreviation: str) -> bool:
+        """Return True if querying the default index for the state builds nothing, so the query never blocks."""
+        return cls._default is not None and cls._default.built(state_abbreviation)
+
+    def built(self, state_abbreviation: str) -> bool:
+        """Return True if the sorted names and trigram postings of the state are built (or it has no cities)."""
+        abbreviation = state_abbreviation.strip().upper()
+        return abbreviation in self._states or abbreviation not in self._names
+
+    def contains(self, city: str, state_abbreviation: str) -> bool:
+        """Return True if the state has a city of that name."""
+        state = self._state(state_abbreviation)
+        return state is not None and state.find(_normalize(city)) is not None
+
+    def complete(self, prefix: str, state_abbreviation: str, limit: int = 10) -> list[str]:
+        """Return up to `limit` city names of the state starting with `prefix`, in alphabetical order."""
+        state = self._state(state_abbreviation)
+        if state is None:
+            return []
+        return state.complete(_normalize(prefix), limit)
+
+    def suggest(
+        self,
+        city: str,
+        state_abbreviation: str,
+        limit: int = 5,
+        min_similarity: float = 0.3,
+    ) -> list[str]:
+        """Return up to `limit` city names of the state most similar to `city`, best match first.
+
+        Args:
+            city (str): The possibly misspelled city name.
+            state_abbreviation (str): The state to search.
+            limit (int): Maximum number of names returned.
+            min_similarity (float): Minimum trigram similarity, from 0 (nothing in common) to 1 (same name).
+
+        Returns:
+            list[str]: The matching city names.
+
+        """
+        state = self._state(state_abbreviation)
+        if state is None:
+            return []
+        return state.suggest(_normalize(city), limit, min_similarity)
+
+    def correct(self, city: str, state_abbreviation: str, min_similarity: float = 0.5) -> str | None:
+        """Return the indexed spelling of `city`, or its best fuzzy match in the state, or None if nothing is close."""
+        state = self._state(state_abbreviation)
+        if state is None:
+            return None
+        key = _normalize(city)
+        position = state.find(key)
+        if position is not None:
+            return state.names[position]
+        matches = state.suggest(key, 1, min_similarity)
+        return matches[0] if matches else None
+
+    def _state(self, state_abbreviation: str) -> _StateCities | None:
+        abbreviation = state_abbreviation.strip().upper()
+        state = self._states.get(abbreviation)
+        if state is None and abbreviation in self._names:
+            with self._states_lock:
+                state = self._states.get(abbreviation)
+                if state is None:
+                    state = self._states[abbreviation] = _StateCities(self._names[abbreviation])
+        return state
+
+
+class _StateCities:
+    """City names of one state, sorted by normalized name, with a trigram posting list per trigram."""
+
+    def __init__(self, names: dict[str, str]) -> None:
+        self.keys = sorted(names)
+        self.names = [names[key] for key in self.keys]
+        self.sizes = array("H")
+        self.postings: dict[str, array] = {}
+        for position, key in enumerate(self.keys):
+            trigrams = _trigrams(key)
+            self.sizes.append(len(trigrams))
+            for trigram in trigrams:
+                self.postings.setdefault(trigram, array("I")).append(position)
+
+    def find(self, key: str) -> int | None:
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return position
+        return None
+
+    def complete(self, prefix: str, limit: int) -> list[str]:
+        start = bisect_left(self.keys, prefix)
+        end = min(start + limit, len(self.keys))
+        return [self.names[position] for position in range(start, end) if self.keys[position].startswith(prefix)]
+
+    def suggest(self, key: str, limit: int, min_similarity: float) -> list[str]:
+        trigrams = _trigrams(key)
+        shared: dict[int, int] = {}
+        for trigram in trigrams:
+            for position in self.postings.get(trigram, ()):
+                shared[position] = shared.get(position, 0) + 1
+
+        scored = []
+        for position, count in shared.items():
+            similarity = count / (len(trigrams) + self.sizes[position] - count)
+            if similarity >= min_similarity:
+                scored.append((-similarity, self.keys[position], position))
+        scored.sort()
+        return [self.names[position] for _, _, position in scored[:limit]]
+
+
+def _normalize(name: str) -> str:
+    """Return the comparison key of a name: casefolded, with punctuation and repeated whitespace collapsed."""
+    return _NON_ALPHANUMERIC.sub(" ", name.casefold()).strip()
+
+
+def _trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
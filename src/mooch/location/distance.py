@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Union
+
+from mooch.location.spatial_index import EARTH_RADIUS_MILES
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    import numpy as np
+
+    from mooch.location.location import Location
+
+    Points = Union[Sequence[Location], np.ndarray, Sequence[tuple[float, float]]]
+    Point = Union[Location, tuple[float, float]]
+
+# Rows of the distance matrix computed per chunk. Each chunk needs a few temporaries of chunk_size x len(destinations)
+# float64 values, so the default bounds the working memory to roughly 8 KB per destination.
+DEFAULT_CHUNK_SIZE = 1024
+
+
+def distances_from(origin: Point, destinations: Points) -> np.ndarray:
+    """Return the great-circle distance in miles from one point to each of many points.
+
+    Requires the optional `numpy` dependency (`pip install mooch[numpy]`).
+
+    Args:
+        origin (Location | tuple[float, float]): A Location or a (latitude, longitude) pair in degrees.
+        destinations (Points): A sequence of Locations, or an array-like of shape (n, 2) of latitudes and longitudes.
+
+    Returns:
+        np.ndarray: The n distances in miles.
+
+    """
+    latitude, longitude, cos_latitude = _radians(_coordinates([origin]))
+    return _haversine(latitude, longitude, cos_latitude, *_radians(_coordinates(destinations)))
+
+
+def pairwise_distances(origins: Points, destinations: Points) -> np.ndarray:
+    """Return the great-circle distance in miles between each origin and the destination at the same position.
+
+    Requires the optional `numpy` dependency (`pip install mooch[numpy]`).
+
+    Args:
+        origins (Points): A sequence of Locations, or an array-like of shape (n, 2) of latitudes and longitudes.
+        destinations (Points): As `origins`, with the same length.
+
+    Returns:
+        np.ndarray: The n distances in miles.
+
+    """
+    origins = _coordinates(origins)
+    destinations = _coordinates(destinations)
+    if len(origins) != len(destinations):
+        msg = f"origins and destinations must have the same length, got {len(origins)} and {len(destinations)}."
+        raise ValueError(msg)
+    return _haversine(*_radians(origins), *_radians(destinations))
+
+
+def distance_matrix(
+    origins: Points,
+    destinations: Points | None = None,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> np.ndarray:
+    """Return the great-circle distance in miles between every origin and every destination.
+
+    The matrix is filled `chunk_size` origin rows at a time, so intermediate arrays stay bounded no matter how
+    many origins there are. Use `iter_distance_matrix` when the full matrix itself is too large to hold.
+
+    Requires the optional `numpy` dependency (`pip install mooch[numpy]`).
+
+    Args:
+        origins (Points): A sequence of Locations, or an array-like of shape (n, 2) of latitudes and longitudes.
+        destinations (Points): As `origins`. Defaults to the origins themselves.
+        chunk_size (int): Number of origin rows computed at once.
+
+    Returns:
+        np.ndarray: An (n, m) matrix of distances in miles.
+
+    """
+    import numpy as np  # noqa: PLC0415
+
+    origins = _coordinates(origins)
+    destinations = origins if destinations is None else _coordinates(destinations)
+    matrix = np.empty((len(origins), len(destinations)))
+    for start, block in iter_distance_matrix(origins, destinations, chunk_size=chunk_size):
+        matrix[start : start + len(block)] = block
+    return matrix
+
+
+def iter_distance_matrix(
+    origins: Points,
+    destinations: Points | None = None,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """Yield the distance matrix between origins and destinations as blocks of at most `chunk_size` rows.
+
+    Requires the optional `numpy` dependency (`pip install mooch[numpy]`).
+
+    Args:
+        origins (Points): A sequence of Locations, or an array-like of shape (n, 2) of latitudes and longitudes.
+        destinations (Points): As `origins`. Defaults to the origins themselves.
+        chunk_size (int): Maximum number of origin rows per block.
+
+    Yields:
+        tuple[int, np.ndarray]: The index of the block's first origin, and the (rows, m) block of distances in miles.
+
+    """
+    if chunk_size < 1:
+        msg = f"chunk_size must be at least 1, got {chunk_size}."
+        raise ValueError(msg)
+
+    origins = _coordinates(origins)
+    destinations = origins if destinations is None else _coordinates(destinations)
+    latitude, longitude, cos_latitude = _radians(origins)
+    destination_latitude, destination_longitude, destination_cos_latitude = _radians(destinations)
+    for start in range(0, len(origins), chunk_size):
+        rows = slice(start, start + chunk_size)
+        block = _haversine(
+            latitude[rows, None],
+            longitude[rows, None],
+            cos_latitude[rows, None],
+            destination_latitude,
+            destination_longitude,
+            destination_cos_latitude,
+        )
+        yield start, block
+
+
+def _coordinates(points: Points) -> np.ndarray:
+    """Return points as a float array of shape (n, 2) of latitudes and longitudes in degrees."""
+    import numpy as np  # noqa: PLC0415
+
+    if not isinstance(points, np.ndarray):
+        points = list(points)
+        if points and hasattr(points[0], "latitude"):
+            points = [(point.latitude, point.longitude) for point in points]
+    coordinates = np.asarray(points, dtype=float)
+    if coordinates.size == 0:
+        return coordinates.reshape(0, 2)
+    if coordinates.ndim != 2 or coordinates.shape[1] != 2:  # noqa: PLR2004
+        msg = f"Expected Locations or an array of (latitude, longitude) pairs, got shape {coordinates.shape}."
+        raise ValueError(msg)
+    return coordinates
+
+
+def _radians(coordinates: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    import numpy as np  # noqa: PLC0415
+
+    latitude = np.radians(coordinates[:, 0])
+    longitude = np.radians(coordinates[:, 1])
+    return latitude, longitude, np.cos(latitude)
+
+
+def _haversine(  # noqa: PLR0913, PLR0917
+    latitude1: np.ndarray,
+    longitude1: np.ndarray,
+    cos_latitude1: np.ndarray,
+    latitude2: np.ndarray,
+    longitude2: np.ndarray,
+    cos_latitude2: np.ndarray,
+) -> np.ndarray:
+    """Return the haversine distance in miles between broadcastable arrays of points given in radians."""
+    import numpy as np  # noqa: PLC0415
+
+    a = np.sin((latitude2 - latitude1) / 2) ** 2
+    a += cos_latitude1 * cos_latitude2 * np.sin((longitude2 - longitude1) / 2) ** 2
+    np.clip(a, 0.0, 1.0, out=a)
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    a *= 2 * EARTH_RADIUS_MILES
+    return a
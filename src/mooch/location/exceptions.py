@@ -1,3 +1,17 @@
+from __future__ import annotations
+
+
 class LocationError(Exception):
     def __init__(self, *args):  # noqa: ANN002
         super().__init__(*args)
+
+
+class ProviderUnavailableError(Exception):
+    def __init__(self, *args):  # noqa: ANN002
+        super().__init__(*args)
+
+
+class RateLimitedError(ProviderUnavailableError):
+    def __init__(self, *args, retry_after: float | None = None):  # noqa: ANN002
+        super().__init__(*args)
+        self.retry_after = retry_after
@@ -1,19 +1,98 @@
 from __future__ import annotations
 
-import requests
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
+from mooch.location.city_index import CityIndex
 from mooch.location.exceptions import LocationError
-from mooch.location.state_abbrev import abbrev_to_state, state_to_abbrev, valid_state, valid_state_abbrev
+from mooch.location.providers import (
+    API_URL,
+    OfflineProvider,
+    Place,
+    _city_and_state_fields,
+    _city_and_state_key,
+    _request,
+    _zip_code_fields,
+    _zip_code_key,
+)
+from mooch.location.rate_limit import TokenBucket
+from mooch.location.session import create_session
+from mooch.location.single_flight import SingleFlight
+from mooch.location.spatial_index import SpatialIndex
+from mooch.location.state_abbrev import ABBREV_TO_STATE, normalize_state
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    import requests
+
+    from mooch.location.cache import LocationCache
+    from mooch.location.providers import Provider
+
+
+_LOCATION_FIELDS = frozenset(("zip_code", "city", "state", "state_abbreviation", "latitude", "longitude", "places"))
+
+# Concurrent API lookups for the same key share one request.
+_in_flight = SingleFlight()
+
+_offline = OfflineProvider(authoritative=True)
 
 
 class Location:
-    def __init__(self, zip_code: int | None = None, city: str | None = None, state: str | None = None) -> None:
+    # No per-instance __dict__: unset lazy fields raise AttributeError, which falls through to __getattr__.
+    __slots__ = (
+        "_pending",
+        "cache",
+        "city",
+        "latitude",
+        "longitude",
+        "offline",
+        "places",
+        "provider",
+        "session",
+        "state",
+        "state_abbreviation",
+        "zip_code",
+    )
+
+    api_url: str = API_URL
+    default_cache: LocationCache | None = None
+    default_session: requests.Session = create_session()
+    default_provider: Provider | None = None
+    # Reject city names with no close match in the bundled ZIP database without an API request, and suggest the
+    # closest bundled name when the API rejects a city. A provider decides for itself.
+    validate_cities: bool = True
+    # Shared by every API request. Set a rate, e.g. `TokenBucket(rate=10)`, to throttle requests client-side.
+    rate_limiter: TokenBucket = TokenBucket()
+    # Retries of a throttled (429) or failed (5xx) API request, after its Retry-After delay or a backoff.
+    max_retries: int = 2
+
+    def __init__(  # noqa: PLR0913
+        self,
+        zip_code: int | None = None,
+        city: str | None = None,
+        state: str | None = None,
+        *,
+        offline: bool = False,
+        cache: LocationCache | None = None,
+        session: requests.Session | None = None,
+        provider: Provider | None = None,
+        lazy: bool = False,
+    ) -> None:
         """Initialize a Location instance with the specified zip code or city/state.
 
         Args:
             zip_code (int): The zip code to associate with this location.
             city (str): The city name to associate with this location.
             state (str): The state name to associate with this location.
+            offline (bool): Resolve from the bundled ZIP code database instead of the Zippopotam.us API.
+            cache (LocationCache): Cache for API lookups. Defaults to `Location.default_cache` (no caching if None).
+            session (requests.Session): Session used for API requests. Defaults to `Location.default_session`.
+            provider (Provider): Provider, e.g. a `ProviderChain`, to resolve through instead of the Zippopotam.us
+                API. Defaults to `Location.default_provider` (the API through `session` if None).
+            lazy (bool): Defer the lookup until a field that needs it (e.g. `latitude`) is first read. Fields known
+                from the arguments, like `state_abbreviation` for a city/state, never trigger a lookup.
 
         """
         if zip_code is not None and (city is not None or state is not None):
@@ -24,12 +103,30 @@ class Location:
             msg = "You must provide either a `zip_code` OR both `city` and `state`."
             raise ValueError(msg)
 
+        self.offline = offline
+        self.cache = cache if cache is not None else Location.default_cache
+        self.session = session if session is not None else Location.default_session
+        self.provider = provider if provider is not None else Location.default_provider
+        self._pending = None
+
+        if lazy:
+            # Only the fields known without I/O are set; __getattr__ loads the rest on first access.
+            if zip_code is not None:
+                self.zip_code = zip_code
+                self._pending = "zip_code"
+            else:
+                self.city = city
+                self.state, self.state_abbreviation = _normalize_state(state)
+                self._pending = "city_and_state"
+            return
+
         self.zip_code = zip_code
         self.city = city
         self.state = state
         self.state_abbreviation = None
         self.latitude = None
         self.longitude = None
+        self.places = None
 
         if self.zip_code is not None:
             self._load_from_zip_code()
@@ -37,42 +134,268 @@ class Location:
         if city is not None:
             self._load_from_city_and_state()
 
-    def _load_from_zip_code(self) -> None:
-        """Load and populate the location data (city, state, state abbr., lat, long) from the Zippopotam.us API."""
-        url = f"https://api.zippopotam.us/us/{self.zip_code}"
-        res = requests.get(url, timeout=5)
+    def __getattr__(self, name: str) -> object:
+        """Load a lazy Location on first access to a field that needs the lookup."""
+        if name in _LOCATION_FIELDS and self._pending is not None:
+            if self._pending == "zip_code":
+                self._load_from_zip_code()
+            else:
+                self._load_from_city_and_state()
+            self._pending = None
+            return getattr(self, name)
 
-        if res.status_code != 200:  # noqa: PLR2004
-            message = f"Invalid zip code {self.zip_code}."
-            raise LocationError(message)
+        msg = f"{type(self).__name__!r} object has no attribute {name!r}"
+        raise AttributeError(msg)
+
+    @property
+    def all_zip_codes(self) -> list[int]:
+        """Return every zip code of the looked up place, e.g. all zip codes of a city, in ascending order."""
+        return sorted({place.zip_code for place in self.places or ()})
+
+    @classmethod
+    def from_coordinates(cls, latitude: float, longitude: float, **kwargs: object) -> Location:
+        """Reverse geocode a point to a Location of the nearest zip code in the bundled ZIP code database.
+
+        Args:
+            latitude (float): Latitude of the point in degrees.
+            longitude (float): Longitude of the point in degrees.
+            **kwargs: Passed to `Location`, e.g. `offline=True` to resolve the zip code without a request.
+
+        """
+        return cls(SpatialIndex.default().reverse_geocode(latitude, longitude), **kwargs)
+
+    @classmethod
+    def bulk(  # noqa: PLR0913
+        cls,
+        zip_codes: Iterable[int] | None = None,
+        city_states: Iterable[tuple[str, str]] | None = None,
+        *,
+        max_workers: int = 8,
+        offline: bool = False,
+        cache: LocationCache | None = None,
+        session: requests.Session | None = None,
+        provider: Provider | None = None,
+    ) -> list[Location | Exception]:
+        """Resolve many zip codes OR (city, state) pairs concurrently.
+
+        Duplicate inputs are resolved once and share the same Location. A lookup that fails does not fail the
+        batch; its exception is returned in its place instead.
+
+        Args:
+            zip_codes (Iterable[int]): The zip codes to resolve.
+            city_states (Iterable[tuple[str, str]]): The (city, state) pairs to resolve.
+            max_workers (int): Maximum number of lookups running at the same time.
+            offline (bool): Resolve from the bundled ZIP code database instead of the Zippopotam.us API.
+            cache (LocationCache): Cache for API lookups. Defaults to `Location.default_cache`.
+            session (requests.Session): Session used for API requests. Defaults to `Location.default_session`.
+            provider (Provider): Provider to resolve through. Defaults to `Location.default_provider`.
+
+        Returns:
+            list[Location | Exception]: One result per input, in input order.
+
+        """
+        keys, unique = _bulk_inputs(zip_codes, city_states)
+
+        def resolve(args: tuple) -> Location | Exception:
+            try:
+                return cls(*args, offline=offline, cache=cache, session=session, provider=provider)
+            except Exception as e:  # noqa: BLE001
+                return e
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            resolved = dict(zip(unique, executor.map(resolve, unique.values())))
+        return [resolved[key] for key in keys]
+
+    @classmethod
+    def warm_cache(  # noqa: PLR0913
+        cls,
+        zip_codes: Iterable[int] | None = None,
+        city_states: Iterable[tuple[str, str]] | None = None,
+        *,
+        max_workers: int = 8,
+        cache: LocationCache | None = None,
+        session: requests.Session | None = None,
+        provider: Provider | None = None,
+    ) -> Future[int]:
+        """Resolve many zip codes OR (city, state) pairs into a cache on a background thread, e.g. at startup.
+
+        Lookups already cached are not requested again. Call `.result()` on the returned future to wait for the
+        cache to be warm.
+
+        Args:
+            zip_codes (Iterable[int]): The zip codes to resolve.
+            city_states (Iterable[tuple[str, str]]): The (city, state) pairs to resolve.
+            max_workers (int): Maximum number of lookups running at the same time.
+            cache (LocationCache): Cache to warm. Defaults to `Location.default_cache`.
+            session (requests.Session): Session used for API requests. Defaults to `Location.default_session`.
+            provider (Provider): Provider to resolve through. Defaults to `Location.default_provider`.
+
+        Returns:
+            Future[int]: Resolves to the number of inputs that are now cached as valid locations.
+
+        """
+        cache = cache if cache is not None else cls.default_cache
+        if cache is None:
+            msg = "Location.warm_cache needs a cache: pass cache= or set Location.default_cache."
+            raise ValueError(msg)
+
+        future = Future()
 
-        data = res.json()
-        self.city = data["places"][0]["place name"]
-        self.state = data["places"][0]["state"]
-        self.state_abbreviation = data["places"][0]["state abbreviation"]
-        self.latitude = float(data["places"][0]["latitude"])
-        self.longitude = float(data["places"][0]["longitude"])
+        def warm() -> None:
+            try:
+                results = cls.bulk(
+                    zip_codes,
+                    city_states,
+                    max_workers=max_workers,
+                    cache=cache,
+                    session=session,
+                    provider=provider,
+                )
+            except Exception as e:  # noqa: BLE001
+                future.set_exception(e)
+            else:
+                future.set_result(sum(not isinstance(result, Exception) for result in results))
+
+        future.set_running_or_notify_cancel()
+        threading.Thread(target=warm, name="mooch-location-warm-cache", daemon=True).start()
+        return future
+
+    def _load_from_zip_code(self) -> None:
+        """Load and populate the location data (city, state, state abbr., lat, long) from the Zippopotam.us API."""
+        message = f"Invalid zip code {self.zip_code}."
+        if self.offline:
+            self._apply(_offline.lookup_zip_code(self.zip_code), message)
+        elif self.provider is not None:
+            self._load(_zip_code_key(self.zip_code), lambda: self.provider.lookup_zip_code(self.zip_code), message)
+        else:
+            self._load(_zip_code_key(self.zip_code), self._fetch_zip_code, message)
 
     def _load_from_city_and_state(self) -> None:
         """Load and populate the location data (zipcode, lat, long) from the Zippopotam.us API."""
-        if valid_state_abbrev(self.state):
-            self.state_abbreviation = self.state
-            self.state = abbrev_to_state(self.state)
-        elif valid_state(self.state):
-            self.state_abbreviation = state_to_abbrev(self.state)
-            self.state = self.state.strip().title()
-        else:
-            message = f"Invalid state name or abbreviation: {self.state}."
-            raise LocationError(message)
+        self.state, self.state_abbreviation = _normalize_state(self.state)
+
+        message = f"Invalid city/state combination: {self.city}, {self.state}."
+        if self.offline:
+            self._apply(_offline.lookup_city_and_state(self.city, self.state_abbreviation), message)
+            return
+
+        key = _city_and_state_key(self.city, self.state_abbreviation)
+        if self.provider is not None:
+            self._load(key, lambda: self.provider.lookup_city_and_state(self.city, self.state_abbreviation), message)
+            return
+
+        if not self.validate_cities:
+            self._load(key, self._fetch_city_and_state, message)
+            return
+
+        _check_city(self.city, self.state, self.state_abbreviation)
+        try:
+            self._load(key, self._fetch_city_and_state, message)
+        except LocationError:
+            suggestion = _city_suggestion(self.city, self.state_abbreviation)
+            if not suggestion:
+                raise
+            raise LocationError(message + suggestion) from None
 
-        url = f"https://api.zippopotam.us/us/{self.state_abbreviation}/{self.city}"
-        res = requests.get(url, timeout=5)
+    def _load(self, key: str, fetch: Callable[[], dict | None], message: str) -> None:
+        """Populate the location data from the cache, or from `fetch` on a cache miss.
 
-        if res.status_code != 200:  # noqa: PLR2004
-            message = f"Invalid city/state combination: {self.city}, {self.state}."
+        `fetch` returns the location fields, or None if the lookup is invalid. Invalid lookups are cached too,
+        so they are rejected without another request until the negative entry expires. Threads that miss the
+        cache for the same key at the same time share a single `fetch`, if they look it up through the same
+        provider, or the same session and API URL.
+        """
+        cache = self.cache
+        found, values = cache.get(key) if cache is not None else (False, None)
+        if not found:
+            source = self.provider if self.provider is not None else (self.api_url, self.session)
+            values = _in_flight.do((key, source), fetch)
+            if cache is not None:
+                cache.set(key, values)
+
+        self._apply(values, message)
+
+    def _apply(self, values: dict | None, message: str) -> None:
+        """Set the location fields, or raise a LocationError with `message` if the lookup is invalid."""
+        if values is None:
             raise LocationError(message)
 
-        data = res.json()
-        self.zip_code = int(data["places"][0]["post code"])
-        self.latitude = float(data["places"][0]["latitude"])
-        self.longitude = float(data["places"][0]["longitude"])
+        for name, value in _location_fields(values).items():
+            setattr(self, name, value)
+
+    def _fetch_zip_code(self) -> dict | None:
+        """Fetch the location data (city, state, state abbr., lat, long) from the Zippopotam.us API."""
+        url = f"{self.api_url}/{self.zip_code}"
+        return self._request(url, _zip_code_fields)
+
+    def _fetch_city_and_state(self) -> dict | None:
+        """Fetch the location data (zipcode, lat, long) from the Zippopotam.us API."""
+        url = f"{self.api_url}/{self.state_abbreviation}/{self.city}"
+        return self._request(url, _city_and_state_fields)
+
+    def _request(self, url: str, parse: Callable[[dict], dict]) -> dict | None:
+        return _request(self.session, url, 5, parse, rate_limiter=self.rate_limiter, max_retries=self.max_retries)
+
+
+def _bulk_inputs(
+    zip_codes: Iterable[int] | None,
+    city_states: Iterable[tuple[str, str]] | None,
+) -> tuple[list, dict[object, tuple]]:
+    """Return the dedup key of every bulk input, and the (zip_code, city, state) arguments of each distinct key."""
+    if (zip_codes is None) == (city_states is None):
+        msg = "Provide either `zip_codes` OR `city_states`, but not both."
+        raise ValueError(msg)
+
+    if zip_codes is not None:
+        inputs = [(int(zip_code), None, None) for zip_code in zip_codes]
+        keys = [zip_code for zip_code, _, _ in inputs]
+    else:
+        inputs = [(None, city, state) for city, state in city_states]
+        keys = [(city.strip().casefold(), _state_key(state)) for _, city, state in inputs]
+
+    unique = {}
+    for key, args in zip(keys, inputs):
+        unique.setdefault(key, args)
+    return keys, unique
+
+
+def _state_key(state: str) -> str:
+    """Return a normalized key for a state name or abbreviation."""
+    return normalize_state(state) or state.strip().upper()
+
+
+def _normalize_state(state: str) -> tuple[str, str]:
+    """Return the (name, abbreviation) of a state name, abbreviation or FIPS code."""
+    abbreviation = normalize_state(state)
+    if abbreviation is None:
+        message = f"Invalid state name or abbreviation: {state}."
+        raise LocationError(message)
+    return ABBREV_TO_STATE[abbreviation], abbreviation
+
+
+def _check_city(city: str, state: str, state_abbreviation: str) -> None:
+    """Raise a LocationError if the state has no city of that name, nor one close to it.
+
+    The API knows cities by their GeoNames names, which differ from the bundled ones in places (e.g. "St. Louis"
+    and "Saint Louis"), so a name with a close match is left for the API to decide.
+    """
+    if CityIndex.default().correct(city, state_abbreviation) is None:
+        message = f"Invalid city/state combination: {city}, {state}."
+        raise LocationError(message)
+
+
+def _city_suggestion(city: str, state_abbreviation: str) -> str:
+    """Return " Did you mean <name>?" with the closest bundled name to a rejected city, or "" if there is none."""
+    index = CityIndex.default()
+    if index.contains(city, state_abbreviation):
+        return ""
+    suggestion = index.correct(city, state_abbreviation)
+    return "" if suggestion is None else f" Did you mean {suggestion}?"
+
+
+def _location_fields(values: dict) -> dict:
+    """Return looked up values as attributes, with `places` (a list of lists after a JSON round trip) as Places."""
+    places = values.get("places")
+    if places is None:
+        return values
+    return {**values, "places": tuple(Place(*place) for place in places)}
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING
+
+from mooch.location.location import _state_key
+from mooch.location.zip_database import ZipRecord
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+    import numpy as np
+
+    from mooch.location.location import Location
+
+_SORT_KEYS = ("zip_code", "city", "state", "latitude", "longitude")
+
+
+class LocationTable:
+    """Compact columnar container of resolved locations.
+
+    Each row is stored as a zip code (u32), city id (u32), state id (u8), latitude and longitude (f64) in typed
+    arrays, about 25 bytes per row. City names and (state, abbreviation) pairs are interned, so each distinct
+    string is stored once no matter how many rows share it. Rows are read back as `ZipRecord` tuples.
+    """
+
+    def __init__(self, locations: Iterable[Location | ZipRecord] = ()) -> None:
+        """Initialize the table.
+
+        Args:
+            locations (Iterable[Location | ZipRecord]): Resolved locations, or any objects with the same fields,
+                to add to the table.
+
+        """
+        self._zip_codes = array("I")
+        self._city_ids = array("I")
+        self._state_ids = array("B")
+        self._latitudes = array("d")
+        self._longitudes = array("d")
+        self._cities: list[str] = []
+        self._city_index: dict[str, int] = {}
+        self._states: list[tuple[str, str]] = []
+        self._state_index: dict[tuple[str, str], int] = {}
+        self.extend(locations)
+
+    def __len__(self) -> int:
+        """Return the number of rows."""
+        return len(self._zip_codes)
+
+    def __getitem__(self, index: int) -> ZipRecord:
+        """Return the row at `index`."""
+        state, state_abbreviation = self._states[self._state_ids[index]]
+        return ZipRecord(
+            self._zip_codes[index],
+            self._cities[self._city_ids[index]],
+            state,
+            state_abbreviation,
+            self._latitudes[index],
+            self._longitudes[index],
+        )
+
+    def __iter__(self) -> Iterator[ZipRecord]:
+        """Iterate over the rows in order."""
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, location: Location | ZipRecord) -> None:
+        """Add a resolved location, or any object with the same fields, as a new row."""
+        city_id = self._city_index.get(location.city)
+        if city_id is None:
+            city_id = self._city_index[location.city] = len(self._cities)
+            self._cities.append(location.city)
+
+        state = (location.state, location.state_abbreviation)
+        state_id = self._state_index.get(state)
+        if state_id is None:
+            if len(self._states) > 255:  # noqa: PLR2004
+                msg = "A LocationTable holds at most 256 distinct states."
+                raise ValueError(msg)
+            state_id = self._state_index[state] = len(self._states)
+            self._states.append(state)
+
+        self._zip_codes.append(location.zip_code)
+        self._city_ids.append(city_id)
+        self._state_ids.append(state_id)
+        self._latitudes.append(location.latitude)
+        self._longitudes.append(location.longitude)
+
+    def extend(self, locations: Iterable[Location | ZipRecord]) -> None:
+        """Add many resolved locations as new rows."""
+        for location in locations:
+            self.append(location)
+
+    def take(self, indices: Iterable[int]) -> LocationTable:
+        """Return a new table of the rows at `indices`, in that order."""
+        indices = list(indices)
+        table = LocationTable()
+        table._cities = self._cities.copy()
+        table._city_index = self._city_index.copy()
+        table._states = self._states.copy()
+        table._state_index = self._state_index.copy()
+        for name in ("_zip_codes", "_city_ids", "_state_ids", "_latitudes", "_longitudes"):
+            column = getattr(self, name)
+            setattr(table, name, array(column.typecode, map(column.__getitem__, indices)))
+        return table
+
+    def filter(
+        self,
+        *,
+        state: str | None = None,
+        city: str | None = None,
+        predicate: Callable[[ZipRecord], bool] | None = None,
+    ) -> LocationTable:
+        """Return a new table of the rows matching every given condition.
+
+        The state and city conditions compare interned ids, so they never build a row.
+
+        Args:
+            state (str): State name or abbreviation.
+            city (str): City name, compared case-insensitively.
+            predicate (Callable[[ZipRecord], bool]): Function called with each remaining row.
+
+        """
+        indices = range(len(self))
+        if state is not None:
+            abbreviation = _state_key(state)
+            state_ids = {state_id for state_id, (_, abbr) in enumerate(self._states) if abbr == abbreviation}
+            column = self._state_ids
+            indices = [index for index in indices if column[index] in state_ids]
+        if city is not None:
+            name = city.strip().casefold()
+            city_ids = {city_id for city_id, other in enumerate(self._cities) if other.casefold() == name}
+            column = self._city_ids
+            indices = [index for index in indices if column[index] in city_ids]
+        if predicate is not None:
+            indices = [index for index in indices if predicate(self[index])]
+        return self.take(indices)
+
+    def sort(self, by: str = "zip_code", *, reverse: bool = False) -> LocationTable:
+        """Return a new table sorted by a column.
+
+        Args:
+            by (str): One of "zip_code", "city", "state", "latitude" or "longitude". Cities and states sort by name.
+            reverse (bool): Sort in descending order.
+
+        """
+        if by not in _SORT_KEYS:
+            msg = f"Cannot sort by {by!r}, expected one of {', '.join(_SORT_KEYS)}."
+            raise ValueError(msg)
+
+        if by == "city":
+            # Rank the interned names once instead of comparing strings for every row.
+            ranks = _ranks(self._cities)
+            city_ids = self._city_ids
+            key = lambda index: ranks[city_ids[index]]  # noqa: E731
+        elif by == "state":
+            ranks = _ranks([state for state, _ in self._states])
+            state_ids = self._state_ids
+            key = lambda index: ranks[state_ids[index]]  # noqa: E731
+        else:
+            key = getattr(self, f"_{by}s").__getitem__
+        return self.take(sorted(range(len(self)), key=key, reverse=reverse))
+
+    def to_numpy(self) -> dict[str, np.ndarray]:
+        """Return every column as a NumPy array, keyed by field name.
+
+        `zip_code`, `latitude` and `longitude` are numeric arrays; `city`, `state` and `state_abbreviation` are
+        string arrays. Requires the optional `numpy` dependency (`pip install mooch[numpy]`).
+        """
+        import numpy as np  # noqa: PLC0415
+
+        city_ids = np.array(self._city_ids, dtype=np.uint32)
+        state_ids = np.array(self._state_ids, dtype=np.uint8)
+        states = np.array(self._states, dtype=str).reshape(-1, 2)
+        return {
+            "zip_code": np.array(self._zip_codes, dtype=np.uint32),
+            "city": np.array(self._cities, dtype=str)[city_ids],
+            "state": states[state_ids, 0],
+            "state_abbreviation": states[state_ids, 1],
+            "latitude": np.array(self._latitudes, dtype=np.float64),
+            "longitude": np.array(self._longitudes, dtype=np.float64),
+        }
+
+
+def _ranks(names: list[str]) -> list[int]:
+    """Return the position of each name in the sorted list of names."""
+    ranks = [0] * len(names)
+    for rank, index in enumerate(sorted(range(len(names)), key=names.__getitem__)):
+        ranks[index] = rank
+    return ranks
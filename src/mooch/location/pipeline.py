@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
+
+from mooch.location.cache import LocationCache
+from mooch.location.exceptions import LocationError
+from mooch.location.location import Location
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+    from concurrent.futures import Future
+
+    import requests
+
+OUTPUT_FIELDS = ("zip_code", "city", "state", "state_abbreviation", "latitude", "longitude", "error")
+
+
+def geocode_rows(  # noqa: PLR0913
+    rows: Iterable[dict],
+    *,
+    zip_column: str = "zip_code",
+    city_column: str = "city",
+    state_column: str = "state",
+    max_workers: int = 8,
+    window: int | None = None,
+    offline: bool = False,
+    cache: LocationCache | None = None,
+    session: requests.Session | None = None,
+) -> Iterator[dict]:
+    """Resolve a stream of rows and yield each row enriched with its location fields, in input order.
+
+    A row is resolved by its zip code column when it is non-empty, and by its city and state columns otherwise.
+    At most `window` rows are read ahead of the row being yielded, so memory stays constant however long the
+    input is and reading pauses while the consumer is slow. Identical lookups within the window share a
+    single request; repeats further apart are served by `cache`.
+
+    Args:
+        rows (Iterable[dict]): Input rows, e.g. from `csv.DictReader`. Consumed lazily.
+        zip_column (str): Name of the zip code column.
+        city_column (str): Name of the city column.
+        state_column (str): Name of the state column.
+        max_workers (int): Maximum number of lookups running at the same time.
+        window (int): Maximum number of rows read ahead. Defaults to 4 * `max_workers`.
+        offline (bool): Resolve from the bundled ZIP code database instead of the Zippopotam.us API.
+        cache (LocationCache): Cache for API lookups. Defaults to `Location.default_cache`.
+        session (requests.Session): Session used for API requests. Defaults to `Location.default_session`.
+
+    Yields:
+        dict: The input row updated with `OUTPUT_FIELDS`. A row that could not be resolved is left as is, with
+            only `error` set to the failure message.
+
+    """
+    window = window if window is not None else 4 * max_workers
+    pending: deque[tuple[dict, tuple]] = deque()
+    in_flight: dict[tuple, list] = {}  # key -> [future, number of pending rows waiting on it]
+
+    def finish() -> dict:
+        row, key = pending.popleft()
+        entry = in_flight[key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del in_flight[key]
+        future: Future = entry[0]
+        return row | future.result()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for row in rows:
+            args = tuple(str(row.get(column) or "").strip() for column in (zip_column, city_column, state_column))
+            key = _lookup_key(*args)
+            entry = in_flight.get(key)
+            if entry is None:
+                future = executor.submit(_resolve, *args, offline=offline, cache=cache, session=session)
+                entry = in_flight[key] = [future, 0]
+            entry[1] += 1
+            pending.append((row, key))
+
+            if len(pending) >= window:
+                yield finish()
+
+        while pending:
+            yield finish()
+
+
+def _lookup_key(zip_code: str, city: str, state: str) -> tuple:
+    """Return the key under which rows needing the same lookup share it."""
+    return ("zip", zip_code) if zip_code else ("city", city.casefold(), state.casefold())
+
+
+def _resolve(  # noqa: PLR0913
+    zip_code: str,
+    city: str,
+    state: str,
+    *,
+    offline: bool,
+    cache: LocationCache | None,
+    session: requests.Session | None,
+) -> dict:
+    """Resolve a row by its zip code, or its city and state, returning the `OUTPUT_FIELDS` to update it with."""
+    try:
+        if zip_code and not zip_code.isdigit():
+            msg = f"Invalid zip code {zip_code}."
+            raise LocationError(msg)  # noqa: TRY301
+        if zip_code:
+            location = Location(int(zip_code), offline=offline, cache=cache, session=session)
+        else:
+            location = Location(city=city, state=state, offline=offline, cache=cache, session=session)
+    except Exception as e:  # noqa: BLE001
+        return {"error": str(e) or type(e).__name__}
+    return {
+        "zip_code": f"{location.zip_code:05d}",
+        "city": location.city,
+        "state": location.state,
+        "state_abbreviation": location.state_abbreviation,
+        "latitude": location.latitude,
+        "longitude": location.longitude,
+        "error": None,
+    }
+
+
+class ThroughputReporter:
+    """Periodically write the number of rows processed and the rate to a stream."""
+
+    def __init__(self, stream: TextIO | None = None, interval: float = 5.0) -> None:
+        self.stream = stream if stream is not None else sys.stderr
+        self.interval = interval
+        self.rows = 0
+        self.errors = 0
+        self._start = time.monotonic()
+        self._last_report = self._start
+
+    def update(self, row: dict) -> None:
+        """Count a processed row, and report if `interval` seconds passed since the last report."""
+        self.rows += 1
+        if row.get("error") is not None:
+            self.errors += 1
+
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self) -> None:
+        """Write the rows processed so far and the average rate."""
+        elapsed = time.monotonic() - self._start
+        rate = self.rows / elapsed if elapsed > 0 else 0.0
+        self.stream.write(f"{self.rows} rows, {self.errors} errors, {elapsed:.1f}s, {rate:.1f} rows/s\n")
+        self.stream.flush()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Geocode a CSV or JSONL file from the command line. Returns the exit code."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mooch.location",
+        description="Enrich the rows of a CSV or JSONL file with city, state and coordinates.",
+    )
+    parser.add_argument("input", help="input file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout (default)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="file format (default: from the file extension)")
+    parser.add_argument("--zip-column", default="zip_code", help="zip code column (default: zip_code)")
+    parser.add_argument("--city-column", default="city", help="city column (default: city)")
+    parser.add_argument("--state-column", default="state", help="state column (default: state)")
+    parser.add_argument("--offline", action="store_true", help="resolve from the bundled ZIP code database")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent lookups (default: 8)")
+    parser.add_argument("--window", type=int, help="rows read ahead of the output (default: 4 * workers)")
+    parser.add_argument("--cache", help="SQLite file to persist API lookups in")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="seconds between reports (default: 5)")
+    parser.add_argument("--quiet", action="store_true", help="do not report throughput")
+    args = parser.parse_args(argv)
+
+    file_format = args.format or ("jsonl" if Path(args.input).suffix in {".jsonl", ".ndjson"} else "csv")
+    reporter = ThroughputReporter(interval=float("inf") if args.quiet else args.progress_interval)
+    cache = LocationCache(path=args.cache)
+
+    source = sys.stdin if args.input == "-" else Path(args.input).open(newline="", encoding="utf-8")  # noqa: SIM115
+    target = sys.stdout if args.output == "-" else Path(args.output).open("w", newline="", encoding="utf-8")  # noqa: SIM115
+    try:
+        if file_format == "csv":
+            reader = csv.DictReader(source)
+            fieldnames = list(reader.fieldnames or [])
+            writer = csv.DictWriter(target, [*fieldnames, *(f for f in OUTPUT_FIELDS if f not in fieldnames)])
+            writer.writeheader()
+            rows, write = reader, writer.writerow
+        else:
+            rows = (json.loads(line) for line in source if line.strip())
+            write = lambda row: target.write(json.dumps(row) + "\n")  # noqa: E731
+
+        for row in geocode_rows(
+            rows,
+            zip_column=args.zip_column,
+            city_column=args.city_column,
+            state_column=args.state_column,
+            max_workers=args.workers,
+            window=args.window,
+            offline=args.offline,
+            cache=cache,
+        ):
+            write(row)
+            reporter.update(row)
+    finally:
+        cache.close()
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    if not args.quiet:
+        reporter.report()
+    return 0
@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, NamedTuple, TypeVar
+
+import requests
+
+from mooch.location.exceptions import ProviderUnavailableError
+from mooch.location.rate_limit import TokenBucket, _failure, _pause_if_throttled
+from mooch.location.session import create_session
+from mooch.location.zip_database import ZipDatabase
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    from mooch.location.cache import LocationCache
+
+T = TypeVar("T")
+
+API_URL = "https://api.zippopotam.us/us"
+
+
+class Place(NamedTuple):
+    zip_code: int
+    city: str
+    latitude: float
+    longitude: float
+
+
+class Provider:
+    """Source of location data that a `Location` resolves through.
+
+    Subclasses implement both lookups. A lookup returns the location fields as a dict, or None if the provider
+    knows the input is invalid. It raises an exception if it can not answer, so a `ProviderChain` moves on
+    to its next provider.
+    """
+
+    def lookup_zip_code(self, zip_code: int) -> dict | None:
+        """Return the fields (city, state, state_abbreviation, latitude, longitude, places) of a zip code."""
+        raise NotImplementedError
+
+    def lookup_city_and_state(self, city: str, state_abbreviation: str) -> dict | None:
+        """Return the fields (zip_code, latitude, longitude, places) of a city and state abbreviation."""
+        raise NotImplementedError
+
+
+class OfflineProvider(Provider):
+    """Resolve from the bundled ZIP code database, without any network request."""
+
+    def __init__(self, database: ZipDatabase | None = None, *, authoritative: bool = False) -> None:
+        """Initialize the provider.
+
+        Args:
+            database (ZipDatabase): The database to search. Defaults to `ZipDatabase.default()`.
+            authoritative (bool): Treat inputs missing from the database as invalid. Otherwise a miss raises
+                ProviderUnavailableError, so a chain asks its next provider.
+
+        """
+        self.database = database
+        self.authoritative = authoritative
+
+    def lookup_zip_code(self, zip_code: int) -> dict | None:
+        """Return the fields (city, state, state_abbreviation, latitude, longitude, places) of a zip code."""
+        record = (self.database or ZipDatabase.default()).lookup(zip_code)
+        if record is None:
+            return self._miss(f"Zip code {zip_code} is not in the offline database.")
+
+        return {
+            "city": record.city,
+            "state": record.state,
+            "state_abbreviation": record.state_abbreviation,
+            "latitude": record.latitude,
+            "longitude": record.longitude,
+            "places": [Place(record.zip_code, record.city, record.latitude, record.longitude)],
+        }
+
+    def lookup_city_and_state(self, city: str, state_abbreviation: str) -> dict | None:
+        """Return the fields (zip_code, latitude, longitude, places) of a city and state abbreviation."""
+        records = (self.database or ZipDatabase.default()).lookup_city_all(city, state_abbreviation)
+        if not records:
+            return self._miss(f"{city}, {state_abbreviation} is not in the offline database.")
+
+        return {
+            "zip_code": records[0].zip_code,
+            "latitude": records[0].latitude,
+            "longitude": records[0].longitude,
+            "places": [Place(record.zip_code, record.city, record.latitude, record.longitude) for record in records],
+        }
+
+    def _miss(self, message: str) -> None:
+        if not self.authoritative:
+            raise ProviderUnavailableError(message)
+
+
+class CacheProvider(Provider):
+    """Answer from a `LocationCache`, as a tier of a `ProviderChain`.
+
+    A miss raises ProviderUnavailableError, so the chain asks its next provider, and the chain stores that
+    provider's answer in the cache, including that an input is invalid. Entries are shared with `Location`
+    lookups that use the same cache.
+    """
+
+    def __init__(self, cache: LocationCache) -> None:
+        self.cache = cache
+
+    def lookup_zip_code(self, zip_code: int) -> dict | None:
+        """Return the cached fields (city, state, state_abbreviation, latitude, longitude, places) of a zip code."""
+        return self._get(_zip_code_key(zip_code))
+
+    def lookup_city_and_state(self, city: str, state_abbreviation: str) -> dict | None:
+        """Return the cached fields (zip_code, latitude, longitude, places) of a city and state abbreviation."""
+        return self._get(_city_and_state_key(city, state_abbreviation))
+
+    def _get(self, key: str) -> dict | None:
+        found, values = self.cache.get(key)
+        if not found:
+            msg = f"{key} is not cached."
+            raise ProviderUnavailableError(msg)
+        return values
+
+
+class CircuitBreaker:
+    """Stop calling a failing or degraded upstream for a while, instead of waiting on it for every lookup.
+
+    After `failure_threshold` consecutive failed calls the circuit opens and calls are rejected immediately.
+    Calls slower than `slow_call_threshold` seconds count as failures too, even though their result is used.
+    Once `reset_timeout` seconds have passed, a single trial call is let through: its success closes the
+    circuit, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        slow_call_threshold: float = 2.0,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        """Return "closed", "open" or "half-open"."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def call(self, func: Callable[[], T]) -> T:
+        """Return `func()`, recording its outcome, or raise ProviderUnavailableError if the circuit is open."""
+        if not self._allow():
+            msg = "Circuit breaker is open, the provider is skipped."
+            raise ProviderUnavailableError(msg)
+
+        start = time.monotonic()
+        try:
+            result = func()
+        except Exception:
+            self._record(failed=True)
+            raise
+        self._record(failed=time.monotonic() - start > self.slow_call_threshold)
+        return result
+
+    def _allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._trial and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._trial = True
+                return True
+            return False
+
+    def _record(self, *, failed: bool) -> None:
+        with self._lock:
+            trial = self._trial
+            self._trial = False
+            if not failed:
+                self._failures = 0
+                self._opened_at = None
+                return
+
+            self._failures += 1
+            if trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class ZippopotamProvider(Provider):
+    """Resolve through the Zippopotam.us API, behind a circuit breaker."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        api_url: str = API_URL,
+        session: requests.Session | None = None,
+        *,
+        timeout: float = 5.0,
+        breaker: CircuitBreaker | None = None,
+        rate_limiter: TokenBucket | None = None,
+        max_retries: int = 2,
+    ) -> None:
+        """Initialize the provider.
+
+        Args:
+            api_url (str): Base URL of the API.
+            session (requests.Session): Session used for requests. Defaults to a new pooled keep-alive session.
+            timeout (float): Request timeout in seconds.
+            breaker (CircuitBreaker): Circuit breaker guarding the API. Defaults to a new `CircuitBreaker()`.
+            rate_limiter (TokenBucket): Limiter shared by the requests. Defaults to a new `TokenBucket()`, which
+                only holds requests back while the API asks to retry later.
+            max_retries (int): Retries of a throttled (429) or failed (5xx) request.
+
+        """
+        self.api_url = api_url
+        self.session = session if session is not None else create_session()
+        self.timeout = timeout
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket()
+        self.max_retries = max_retries
+
+    def lookup_zip_code(self, zip_code: int) -> dict | None:
+        """Return the fields (city, state, state_abbreviation, latitude, longitude, places) of a zip code."""
+        url = f"{self.api_url}/{zip_code}"
+        return self.breaker.call(lambda: self._request(url, _zip_code_fields))
+
+    def lookup_city_and_state(self, city: str, state_abbreviation: str) -> dict | None:
+        """Return the fields (zip_code, latitude, longitude, places) of a city and state abbreviation."""
+        url = f"{self.api_url}/{state_abbreviation}/{city}"
+        return self.breaker.call(lambda: self._request(url, _city_and_state_fields))
+
+    def _request(self, url: str, parse: Callable[[dict], dict]) -> dict | None:
+        return _request(
+            self.session,
+            url,
+            self.timeout,
+            parse,
+            rate_limiter=self.rate_limiter,
+            max_retries=self.max_retries,
+        )
+
+
+class ProviderChain(Provider):
+    """Ask providers in order, moving on to the next one whenever a provider fails or is skipped.
+
+    The first provider that answers decides the result, including that an input is invalid (None), and it is
+    stored in every `CacheProvider` that missed before it. A provider fails with ProviderUnavailableError (e.g.
+    a miss, an open circuit breaker or a throttled API) or a `requests` error; any other exception is a bug and
+    is raised. If every provider fails, the last provider's exception is raised.
+    """
+
+    def __init__(self, providers: Sequence[Provider]) -> None:
+        if not providers:
+            msg = "A ProviderChain needs at least one provider."
+            raise ValueError(msg)
+        self.providers = list(providers)
+
+    def lookup_zip_code(self, zip_code: int) -> dict | None:
+        """Return the fields (city, state, state_abbreviation, latitude, longitude, places) of a zip code."""
+        return self._first(_zip_code_key(zip_code), lambda provider: provider.lookup_zip_code(zip_code))
+
+    def lookup_city_and_state(self, city: str, state_abbreviation: str) -> dict | None:
+        """Return the fields (zip_code, latitude, longitude, places) of a city and state abbreviation."""
+        return self._first(
+            _city_and_state_key(city, state_abbreviation),
+            lambda provider: provider.lookup_city_and_state(city, state_abbreviation),
+        )
+
+    def _first(self, key: str, lookup: Callable[[Provider], dict | None]) -> dict | None:
+        missed = []
+        for provider in self.providers[:-1]:
+            try:
+                values = lookup(provider)
+            except (ProviderUnavailableError, requests.RequestException):
+                if isinstance(provider, CacheProvider):
+                    missed.append(provider)
+                continue
+            break
+        else:
+            values = lookup(self.providers[-1])
+
+        for provider in missed:
+            provider.cache.set(key, values)
+        return values
+
+
+def _request(  # noqa: PLR0913
+    session: requests.Session,
+    url: str,
+    timeout: float,
+    parse: Callable[[dict], dict],
+    *,
+    rate_limiter: TokenBucket | None = None,
+    max_retries: int = 0,
+) -> dict | None:
+    """Fetch and parse an API response. Returns None if the lookup is invalid (404).
+
+    Throttled (429) and server error (5xx) responses are retried up to `max_retries` times, after their
+    Retry-After delay or an exponential backoff, and then raise RateLimitedError or ProviderUnavailableError. A
+    429 pauses the whole `rate_limiter`, also when it is not retried, so other threads sharing it hold off too.
+    """
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        res = session.get(url, timeout=timeout)
+
+        if res.status_code == 404:  # noqa: PLR2004
+            return None
+        if res.status_code == 200:  # noqa: PLR2004
+            return parse(res.json())
+
+        error, delay = _failure(url, res, attempt)
+        paused = _pause_if_throttled(rate_limiter, error, delay)
+        if delay is None or attempt >= max_retries:
+            raise error
+        if not paused:
+            time.sleep(delay)
+        attempt += 1
+
+
+def _zip_code_fields(data: dict) -> dict:
+    """Return the location fields (city, state, state abbr., lat, long, places) of a zip code API response."""
+    zip_code = int(data["post code"])
+    return {
+        "city": data["places"][0]["place name"],
+        "state": data["places"][0]["state"],
+        "state_abbreviation": data["places"][0]["state abbreviation"],
+        "latitude": float(data["places"][0]["latitude"]),
+        "longitude": float(data["places"][0]["longitude"]),
+        "places": [_place(place, zip_code) for place in data["places"]],
+    }
+
+
+def _city_and_state_fields(data: dict) -> dict:
+    """Return the location fields (zipcode, lat, long, places) of a city/state API response."""
+    return {
+        "zip_code": int(data["places"][0]["post code"]),
+        "latitude": float(data["places"][0]["latitude"]),
+        "longitude": float(data["places"][0]["longitude"]),
+        "places": [_place(place, int(place["post code"])) for place in data["places"]],
+    }
+
+
+def _place(place: dict, zip_code: int) -> Place:
+    return Place(zip_code, place["place name"], float(place["latitude"]), float(place["longitude"]))
+
+
+def _zip_code_key(zip_code: int) -> str:
+    return f"zip:{zip_code}"
+
+
+def _city_and_state_key(city: str, state_abbreviation: str) -> str:
+    return f"city:{state_abbreviation}:{city.strip().casefold()}"
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Union
+
+from mooch.location.exceptions import ProviderUnavailableError, RateLimitedError
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+    Response = Union[requests.Response, httpx.Response]
+
+# Retry-After delays longer than this are not waited out; the RateLimitedError is raised instead.
+MAX_RETRY_AFTER = 60.0
+# First backoff delay in seconds for a server error or a 429 without Retry-After, doubled on every retry.
+BACKOFF = 0.5
+
+
+class TokenBucket:
+    """Client-side rate limiter shared by every thread (and task) making requests through it.
+
+    Each request takes a token; tokens refill at `rate` per second up to `capacity`, so bursts of up to
+    `capacity` requests go through at once and the long-run rate never exceeds `rate`. A bucket without a
+    rate never delays requests on its own, but still holds every caller back during a `pause`, e.g. for the
+    Retry-After delay of a throttled response.
+    """
+
+    def __init__(self, rate: float | None = None, capacity: float | None = None) -> None:
+        """Initialize the bucket.
+
+        Args:
+            rate (float | None): Requests per second. None for no limit.
+            capacity (float | None): Maximum burst size. Defaults to one second worth of requests (at least 1).
+
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate or 1.0, 1.0)
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds the caller has to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._paused_until - now, 0.0)
+            if self.rate is None:
+                return wait
+
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+    def acquire(self) -> None:
+        """Block until the caller may make a request."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait, without blocking the event loop, until the caller may make a request."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every request back for `seconds`, e.g. after a 429 response."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def _failure(url: str, response: Response, attempt: int) -> tuple[ProviderUnavailableError, float | None]:
+    """Return the error for an unexpected response and the seconds to wait before retrying it (None: don't)."""
+    status_code = response.status_code
+    if status_code == 429:  # noqa: PLR2004
+        retry_after = _retry_after(response.headers.get("Retry-After"))
+        error = RateLimitedError(f"Rate limited by {url} (HTTP 429).", retry_after=retry_after)
+        if retry_after is None:
+            return error, BACKOFF * 2**attempt
+        return error, retry_after if retry_after <= MAX_RETRY_AFTER else None
+
+    error = ProviderUnavailableError(f"Unexpected HTTP {status_code} from {url}.")
+    return error, BACKOFF * 2**attempt if status_code >= 500 else None  # noqa: PLR2004
+
+
+def _pause_if_throttled(rate_limiter: TokenBucket | None, error: ProviderUnavailableError, delay: float | None) -> bool:
+    """Hold back every request sharing `rate_limiter` after a 429, whether or not it is retried.
+
+    The pause lasts the Retry-After delay, capped at `MAX_RETRY_AFTER`, or else the backoff `delay`. Returns
+    whether the limiter was paused, in which case a retry waits in `acquire` instead of sleeping.
+    """
+    if rate_limiter is None or not isinstance(error, RateLimitedError):
+        return False
+    seconds = error.retry_after if error.retry_after is not None else delay
+    if seconds is None:
+        return False
+    rate_limiter.pause(min(seconds, MAX_RETRY_AFTER))
+    return True
+
+
+def _retry_after(value: str | None) -> float | None:
+    """Return the seconds of a Retry-After header, given as seconds or as an HTTP date, or None if unusable."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=dt.timezone.utc)
+    return max((date - dt.datetime.now(dt.timezone.utc)).total_seconds(), 0.0)
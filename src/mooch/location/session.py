@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def create_session(pool_connections: int = 4, pool_maxsize: int = 32) -> requests.Session:
+    """Create a `requests.Session` with a keep-alive connection pool, suitable for sharing across threads.
+
+    Args:
+        pool_connections (int): Number of hosts to keep a connection pool for.
+        pool_maxsize (int): Maximum number of kept-alive connections per host. Should be at least the number of
+            threads making requests concurrently, e.g. the `max_workers` passed to `Location.bulk`.
+
+    Returns:
+        requests.Session: The configured session.
+
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Hashable
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: T | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key, across threads, into a single in-flight call.
+
+    The first caller for a key runs the function; callers arriving while it runs wait and receive the same
+    result or exception. Nothing is remembered once the call completes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """Return `func()`, sharing the call with any other thread currently calling `do` with the same key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent awaits with the same key, within an event loop, into a single in-flight call."""
+
+    def __init__(self) -> None:
+        self._calls: dict[tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Return `await func()`, sharing the call with any other task currently awaiting `do` with the same key."""
+        loop = asyncio.get_running_loop()
+        call_key = (loop, key)
+        while (future := self._calls.get(call_key)) is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:  # noqa: PERF203
+                if not future.cancelled():
+                    raise
+                # The task running the call was cancelled, not this one: retry, possibly as the new leader.
+
+        future = self._calls[call_key] = loop.create_future()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark as retrieved, the exception is re-raised to this caller below
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[call_key]
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import heapq
+import math
+import threading
+from array import array
+from typing import TYPE_CHECKING
+
+from mooch.location.zip_database import ZipDatabase
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+EARTH_RADIUS_MILES = 3958.8
+_MILES_PER_DEGREE = math.radians(1) * EARTH_RADIUS_MILES
+
+
+def haversine_miles(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """Return the great-circle distance in miles between two points given in degrees."""
+    phi1 = math.radians(latitude1)
+    phi2 = math.radians(latitude2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    phi = math.radians(latitude)
+    lam = math.radians(longitude)
+    return math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)
+
+
+def _chord_squared(miles: float) -> float:
+    """Return the squared chord length, on the unit sphere, of a great-circle distance in miles."""
+    return (2 * math.sin(min(math.pi, miles / EARTH_RADIUS_MILES) / 2)) ** 2
+
+
+def _chord_miles(chord_squared: float) -> float:
+    """Return the great-circle distance in miles of a squared chord length on the unit sphere."""
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+
+class SpatialIndex:
+    """Grid index of ZIP code coordinates for nearest-ZIP, radius and reverse geocoding queries.
+
+    Points are bucketed into `cell_size` degree latitude/longitude cells. Queries only compute distances to
+    points in the cells that can contain a match.
+    """
+
+    _default: SpatialIndex | None = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, points: Iterable[tuple[int, float, float]], cell_size: float = 0.25) -> None:
+        """Build the index.
+
+        Args:
+            points (Iterable[tuple[int, float, float]]): The (zip code, latitude, longitude) of every point.
+            cell_size (float): Grid cell size in degrees.
+
+        """
+        self.cell_size = cell_size
+        self._columns = round(360 / cell_size)
+        self._zip_codes = array("I")
+        self._vectors = array("d")  # unit vectors (x, y, z); squared chord length orders points like distance
+        self._cells: dict[tuple[int, int], list[int]] = {}
+
+        for zip_code, latitude, longitude in points:
+            self._cells.setdefault(self._cell(latitude, longitude), []).append(len(self._zip_codes))
+            self._zip_codes.append(zip_code)
+            self._vectors.extend(_unit_vector(latitude, longitude))
+
+    @classmethod
+    def default(cls) -> SpatialIndex:
+        """Return the process-wide index of the bundled ZIP database, building it on first use."""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls(ZipDatabase.default().coordinates())
+        return cls._default
+
+    def __len__(self) -> int:
+        """Return the number of points in the index."""
+        return len(self._zip_codes)
+
+    def within(self, latitude: float, longitude: float, radius_miles: float) -> list[tuple[int, float]]:
+        """Return the (zip code, distance in miles) of every point within a radius, nearest first."""
+        # Bounding box of the spherical cap: its longitude half-width is asin(sin(radius) / cos(latitude)).
+        radius = radius_miles / EARTH_RADIUS_MILES
+        radius_degrees = math.degrees(radius)
+        rows = range(
+            math.floor((latitude - radius_degrees) / self.cell_size),
+            math.floor((latitude + radius_degrees) / self.cell_size) + 1,
+        )
+        cos_latitude = math.cos(math.radians(latitude))
+        if radius < math.pi / 2 and math.sin(radius) < cos_latitude:
+            half_width = math.degrees(math.asin(math.sin(radius) / cos_latitude))
+            first, _ = divmod(longitude + 180 - half_width, self.cell_size)
+            last, _ = divmod(longitude + 180 + half_width, self.cell_size)
+            columns = sorted({int(c) % self._columns for c in range(int(first), int(last) + 1)})
+        else:
+            columns = list(range(self._columns))
+
+        x, y, z = _unit_vector(latitude, longitude)
+        limit = _chord_squared(radius_miles)
+        vectors = self._vectors
+        matches = []
+        for point in self._points(rows, columns):
+            i = 3 * point
+            chord = (vectors[i] - x) ** 2 + (vectors[i + 1] - y) ** 2 + (vectors[i + 2] - z) ** 2
+            if chord <= limit:
+                matches.append((chord, self._zip_codes[point]))
+        matches.sort()
+        return [(zip_code, _chord_miles(chord)) for chord, zip_code in matches]
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> list[tuple[int, float]]:
+        """Return the (zip code, distance in miles) of the `k` nearest points, nearest first."""
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+
+        row, column = self._cell(latitude, longitude)
+        x, y, z = _unit_vector(latitude, longitude)
+        vectors = self._vectors
+        zip_codes = self._zip_codes
+        best: list[tuple[float, int]] = []  # max-heap of (-chord, -zip code), so ties keep the lowest zip codes
+        ring = 0
+        seen = 0
+        while True:
+            if (2 * ring + 1) ** 2 > len(self._cells):
+                # The rings so far span more cells than the index has occupied cells: scan every point instead.
+                best.clear()
+                seen = 0
+                points = range(len(self))
+            else:
+                points = self._ring(row, column, ring)
+
+            for point in points:
+                seen += 1
+                i = 3 * point
+                chord = (vectors[i] - x) ** 2 + (vectors[i + 1] - y) ** 2 + (vectors[i + 2] - z) ** 2
+                candidate = (-chord, -zip_codes[point])
+                if len(best) < k:
+                    heapq.heappush(best, candidate)
+                elif candidate > best[0]:
+                    heapq.heapreplace(best, candidate)
+
+            if seen == len(self) or (
+                len(best) == k and -best[0][0] <= _chord_squared(self._ring_distance(latitude, ring))
+            ):
+                break
+            ring += 1
+            if ring * self.cell_size > 180:  # noqa: PLR2004
+                break
+
+        return [(-zip_code, _chord_miles(-chord)) for chord, zip_code in sorted(best, reverse=True)]
+
+    def reverse_geocode(self, latitude: float, longitude: float) -> int | None:
+        """Return the zip code nearest to a point, or None if the index is empty."""
+        nearest = self.nearest(latitude, longitude, 1)
+        return nearest[0][0] if nearest else None
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self.cell_size), math.floor((longitude + 180) / self.cell_size) % self._columns
+
+    def _points(self, rows: Iterable[int], columns: list[int]) -> Iterator[int]:
+        for row in rows:
+            for column in columns:
+                yield from self._cells.get((row, column), ())
+
+    def _ring(self, row: int, column: int, ring: int) -> Iterator[int]:
+        """Yield the points in the cells exactly `ring` cells away (Chebyshev distance) from a cell."""
+        if ring == 0:
+            yield from self._cells.get((row, column), ())
+            return
+
+        if 2 * ring + 1 >= self._columns:
+            columns = list(range(self._columns))
+        else:
+            columns = [(column + offset) % self._columns for offset in range(-ring, ring + 1)]
+        for edge in (row - ring, row + ring):
+            for c in columns:
+                yield from self._cells.get((edge, c), ())
+        if 2 * ring + 1 < self._columns:
+            for r in range(row - ring + 1, row + ring):
+                yield from self._cells.get((r, (column - ring) % self._columns), ())
+                yield from self._cells.get((r, (column + ring) % self._columns), ())
+
+    def _ring_distance(self, latitude: float, ring: int) -> float:
+        """Return a lower bound, in miles, of the distance to any point outside the first `ring` rings."""
+        degrees = ring * self.cell_size
+        widest = math.cos(math.radians(min(90.0, abs(latitude) + degrees + self.cell_size)))
+        latitude_bound = degrees * _MILES_PER_DEGREE
+        longitude_bound = 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, widest * math.sin(math.radians(degrees) / 2)))
+        return min(latitude_bound, longitude_bound)
@@ -1,3 +1,12 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    import numpy as np
+
 STATE_TO_ABBREV = {
     "Alabama": "AL",
     "Alaska": "AK",
@@ -52,33 +61,220 @@ STATE_TO_ABBREV = {
 }
 
 
+# The District of Columbia, the territories and the freely associated states, which all have USPS codes.
+TERRITORY_TO_ABBREV = {
+    "District of Columbia": "DC",
+    "American Samoa": "AS",
+    "Federated States of Micronesia": "FM",
+    "Guam": "GU",
+    "Marshall Islands": "MH",
+    "Northern Mariana Islands": "MP",
+    "Palau": "PW",
+    "Puerto Rico": "PR",
+    "United States Minor Outlying Islands": "UM",
+    "Virgin Islands": "VI",
+}
+
+ABBREV_TO_STATE = {abbrev: state for state, abbrev in (*STATE_TO_ABBREV.items(), *TERRITORY_TO_ABBREV.items())}
+
+ABBREV_TO_FIPS = {
+    "AL": "01",
+    "AK": "02",
+    "AZ": "04",
+    "AR": "05",
+    "CA": "06",
+    "CO": "08",
+    "CT": "09",
+    "DE": "10",
+    "DC": "11",
+    "FL": "12",
+    "GA": "13",
+    "HI": "15",
+    "ID": "16",
+    "IL": "17",
+    "IN": "18",
+    "IA": "19",
+    "KS": "20",
+    "KY": "21",
+    "LA": "22",
+    "ME": "23",
+    "MD": "24",
+    "MA": "25",
+    "MI": "26",
+    "MN": "27",
+    "MS": "28",
+    "MO": "29",
+    "MT": "30",
+    "NE": "31",
+    "NV": "32",
+    "NH": "33",
+    "NJ": "34",
+    "NM": "35",
+    "NY": "36",
+    "NC": "37",
+    "ND": "38",
+    "OH": "39",
+    "OK": "40",
+    "OR": "41",
+    "PA": "42",
+    "RI": "44",
+    "SC": "45",
+    "SD": "46",
+    "TN": "47",
+    "TX": "48",
+    "UT": "49",
+    "VT": "50",
+    "VA": "51",
+    "WA": "53",
+    "WV": "54",
+    "WI": "55",
+    "WY": "56",
+    "AS": "60",
+    "FM": "64",
+    "GU": "66",
+    "MH": "68",
+    "MP": "69",
+    "PW": "70",
+    "PR": "72",
+    "UM": "74",
+    "VI": "78",
+}
+
+# Other common spellings of names, matched like the names themselves.
+_ALIASES = {
+    "Washington DC": "DC",
+    "US Virgin Islands": "VI",
+    "Micronesia": "FM",
+}
+
+
+def _key(value: str) -> str:
+    """Return the lookup key of a name, abbreviation or FIPS code: casefolded, without periods or extra spaces."""
+    return " ".join(value.replace(".", "").split()).casefold()
+
+
+# Every lookup is a dict access: normalized key -> abbreviation, per kind of input and for all of them.
+_NAMES = {
+    _key(state): abbrev for state, abbrev in (*STATE_TO_ABBREV.items(), *TERRITORY_TO_ABBREV.items(), *_ALIASES.items())
+}
+_ABBREVIATIONS = {abbrev.casefold(): abbrev for abbrev in ABBREV_TO_STATE}
+_FIPS = {code: abbrev for abbrev, fips in ABBREV_TO_FIPS.items() for code in (fips, fips.lstrip("0"))}
+_INDEX = {**_FIPS, **_ABBREVIATIONS, **_NAMES}
+
+# Raw spellings resolved without building a key, so the common ones need a single dict access.
+_EXACT = {
+    variant: abbrev
+    for key, abbrev in _INDEX.items()
+    for variant in (key, key.upper(), key.title(), ABBREV_TO_STATE[abbrev] if key in _NAMES else key)
+}
+_TARGETS = {
+    "abbreviation": {abbrev: abbrev for abbrev in ABBREV_TO_STATE},
+    "name": ABBREV_TO_STATE,
+    "fips": ABBREV_TO_FIPS,
+}
+_EXACT_TARGETS = {
+    to: {variant: target[abbrev] for variant, abbrev in _EXACT.items()} for to, target in _TARGETS.items()
+}
+
+
 def valid_state(state: str) -> bool:
     """Check if the provided state name is valid."""
-    state_clean = state.strip().title()
-    return state_clean in STATE_TO_ABBREV
+    return _key(state) in _NAMES
 
 
 def valid_state_abbrev(abbrev: str) -> bool:
     """Check if the provided state abbreviation is valid."""
-    abbrev_clean = abbrev.strip().upper()
-    return abbrev_clean in STATE_TO_ABBREV.values()
+    return abbrev.strip().upper() in ABBREV_TO_STATE
 
 
 def state_to_abbrev(state: str) -> str:
     """Convert a full U.S. state name to its two-letter abbreviation."""
-    state_clean = state.strip().title()
-    if not valid_state(state_clean):
+    abbrev = _NAMES.get(_key(state))
+    if abbrev is None:
         msg = f"Invalid state name: '{state}'"
         raise ValueError(msg)
 
-    return STATE_TO_ABBREV.get(state_clean)
+    return abbrev
 
 
 def abbrev_to_state(abbrev: str) -> str:
     """Convert a state abbreviation to its full name."""
-    abbrev_clean = abbrev.strip().upper()
-    if not valid_state_abbrev(abbrev_clean):
+    state = ABBREV_TO_STATE.get(abbrev.strip().upper())
+    if state is None:
         msg = f"Invalid state abbreviation: '{abbrev}'"
         raise ValueError(msg)
-    abbrev_to_state_dict = {v: k for k, v in STATE_TO_ABBREV.items()}
-    return abbrev_to_state_dict.get(abbrev_clean)
+
+    return state
+
+
+def normalize_state(state: str) -> str | None:
+    """Return the abbreviation of a state name, abbreviation or FIPS code in any case or spacing, or None if unknown."""
+    abbrev = _EXACT.get(state)
+    if abbrev is None and isinstance(state, (str, int)):
+        abbrev = _INDEX.get(_key(str(state)))
+    return abbrev
+
+
+def normalize_states(states: Iterable[str], to: str = "abbreviation") -> list[str | None]:
+    """Normalize many state names, abbreviations or FIPS codes, in any case or spacing.
+
+    Every distinct value is normalized once, so repeated values (the usual state column) cost a dict access each.
+
+    Args:
+        states (Iterable[str]): The values to normalize. Values need to be hashable.
+        to (str): What to return for each value: its "abbreviation", its "name" or its "fips" code.
+
+    Returns:
+        list[str | None]: One result per value, in input order. None for values that are not a known state.
+
+    """
+    if to not in _TARGETS:
+        msg = f"Invalid normalization target: '{to}'. Expected 'abbreviation', 'name' or 'fips'."
+        raise ValueError(msg)
+
+    target = _TARGETS[to]
+    found = _EXACT_TARGETS[to].copy()
+
+    def resolve(state: str) -> str | None:
+        abbrev = normalize_state(state)
+        found[state] = value = None if abbrev is None else target[abbrev]
+        return value
+
+    return [found[state] if state in found else resolve(state) for state in states]
+
+
+def normalize_state_array(states: np.ndarray | Sequence, to: str = "abbreviation") -> tuple[np.ndarray, np.ndarray]:
+    """Normalize a whole column of state names, abbreviations or FIPS codes, e.g. a NumPy array or pandas Series.
+
+    The column is factorized first, so each distinct value is normalized once and the results are gathered back
+    with a single take. Requires the optional `numpy` dependency (`pip install mooch[numpy]`).
+
+    Args:
+        states (np.ndarray | Sequence): A NumPy string (str or bytes) or object array, or any sequence of values.
+        to (str): What to return for each value: its "abbreviation", its "name" or its "fips" code.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The normalized values as a string array of the input's shape, with "" for
+            values that are not a known state, and a boolean array marking the known ones.
+
+    """
+    import numpy as np  # noqa: PLC0415
+
+    values = np.asarray(states)
+    flat = values.ravel()
+    if flat.dtype.kind in "US":
+        uniques = np.unique(flat)
+        codes = np.searchsorted(uniques, flat)
+        uniques = uniques.tolist()
+        if flat.dtype.kind == "S":
+            uniques = [value.decode("utf-8", "replace") for value in uniques]
+    else:
+        items = flat.tolist()
+        uniques = list(dict.fromkeys(items))
+        positions = {value: position for position, value in enumerate(uniques)}
+        codes = np.fromiter(map(positions.__getitem__, items), dtype=np.intp, count=len(items))
+
+    normalized = normalize_states(uniques, to)
+    results = np.array([value or "" for value in normalized], dtype=str)
+    valid = np.array([value is not None for value in normalized], dtype=bool)
+    return results[codes].reshape(values.shape), valid[codes].reshape(values.shape)
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import mmap
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+DEFAULT_DATABASE_PATH = Path(__file__).parent / "data" / "us_zip_codes.bin"
+
+_MAGIC = b"MZIP"
+_VERSION = 2
+_HEADER = struct.Struct("<4sHHII")  # magic, version, state count, city count, record count
+_STATE = struct.Struct("<2s32s")  # abbreviation, NUL padded UTF-8 name
+_ALIGNMENT = 8
+_COORDINATE_SCALE = 10_000  # coordinates are stored as signed 1/10000th degree integers
+
+# Fixed-width record columns following the state table, in file order. Every column is sorted by ZIP code.
+_RECORD_COLUMNS = (("zip_codes", "I"), ("city_ids", "H"), ("state_ids", "B"), ("latitudes", "i"), ("longitudes", "i"))
+
+
+class ZipRecord(NamedTuple):
+    zip_code: int
+    city: str
+    state: str
+    state_abbreviation: str
+    latitude: float
+    longitude: float
+
+
+class ZipDatabase:
+    """Offline lookup table of U.S. ZIP codes, searched in place from a memory-mapped file.
+
+    File layout (little-endian, every section starts on an 8 byte boundary):
+        - header: magic, version, state count, city count, record count
+        - state table: fixed-width (abbreviation, name) entries
+        - record columns: zip code (u32), city id (u16), state id (u8), latitude (i32), longitude (i32)
+        - city table: city count + 1 offsets (u32) into a UTF-8 blob of city names
+
+    Only the small state table is copied into the process, so every process that opens the same file
+    shares its page-cache pages and opening it is close to instant.
+    """
+
+    _default: ZipDatabase | None = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, path: str | Path = DEFAULT_DATABASE_PATH) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        self._views = []
+
+        try:
+            magic, version, state_count, city_count, record_count = _HEADER.unpack_from(self._buffer, 0)
+        except struct.error:
+            magic = version = None
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            msg = f"Unsupported ZIP database file: {self.path}"
+            raise ValueError(msg)
+        offset = _aligned(_HEADER.size)
+
+        self._state_abbreviations = []
+        self._state_names = []
+        for abbrev, name in _STATE.iter_unpack(self._buffer[offset : offset + _STATE.size * state_count]):
+            self._state_abbreviations.append(abbrev.decode("ascii"))
+            self._state_names.append(name.rstrip(b"\0").decode("utf-8"))
+        offset = _aligned(offset + _STATE.size * state_count)
+
+        for name, typecode in _RECORD_COLUMNS:
+            column, offset = self._column(typecode, offset, record_count)
+            setattr(self, f"_{name}", column)
+        self._city_offsets, offset = self._column("I", offset, city_count + 1)
+        self._city_names = self._buffer[offset : offset + self._city_offsets[city_count]]
+        self._views.append(self._city_names)
+
+        self._city_index: dict[tuple[str, str], list[int]] | None = None
+        self._city_index_lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> ZipDatabase:
+        """Return the process-wide instance of the bundled ZIP database, opening it on first use."""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls()
+        return cls._default
+
+    def __len__(self) -> int:
+        """Return the number of ZIP codes in the database."""
+        return len(self._zip_codes)
+
+    def __contains__(self, zip_code: int) -> bool:
+        """Return True if the ZIP code is in the database."""
+        return self._find(int(zip_code)) is not None
+
+    def close(self) -> None:
+        """Release the memory map. The database can not be used afterwards."""
+        for view in reversed(self._views):
+            view.release()
+        self._buffer.release()
+        self._mmap.close()
+
+    def lookup(self, zip_code: int) -> ZipRecord | None:
+        """Return the record for a ZIP code, or None if the ZIP code is unknown."""
+        row = self._find(int(zip_code))
+        return None if row is None else self._record(row)
+
+    def lookup_city(self, city: str, state_abbreviation: str) -> ZipRecord | None:
+        """Return the lowest ZIP code record for a city and state abbreviation, or None if there is no match."""
+        if self._city_index is None:
+            self._build_city_index()
+        rows = self._city_index.get((state_abbreviation.strip().upper(), city.strip().casefold()))
+        return None if rows is None else self._record(rows[0])
+
+    def lookup_city_all(self, city: str, state_abbreviation: str) -> list[ZipRecord]:
+        """Return the records of every ZIP code of a city and state abbreviation, in ZIP code order."""
+        if self._city_index is None:
+            self._build_city_index()
+        rows = self._city_index.get((state_abbreviation.strip().upper(), city.strip().casefold()), ())
+        return [self._record(row) for row in rows]
+
+    def coordinates(self) -> Iterator[tuple[int, float, float]]:
+        """Yield the (zip code, latitude, longitude) of every record with coordinates, in ZIP code order."""
+        for zip_code, latitude, longitude in zip(self._zip_codes, self._latitudes, self._longitudes):
+            if latitude == longitude == 0:
+                # (0, 0) is a missing-coordinates placeholder, not a place in the Gulf of Guinea.
+                continue
+            yield zip_code, latitude / _COORDINATE_SCALE, longitude / _COORDINATE_SCALE
+
+    def cities(self) -> Iterator[tuple[str, str]]:
+        """Yield the distinct (state abbreviation, city name) pairs of the records, in ZIP code order."""
+        seen = set()
+        for state_id, city_id in zip(self._state_ids, self._city_ids):
+            if (state_id, city_id) not in seen:
+                seen.add((state_id, city_id))
+                yield self._state_abbreviations[state_id], self._city(city_id)
+
+    def _column(self, typecode: str, offset: int, count: int) -> tuple[memoryview | array, int]:
+        """Return a zero-copy view of a column (a byte-swapped copy on big-endian hosts) and the next offset."""
+        end = offset + array(typecode).itemsize * count
+        view = self._buffer[offset:end]
+        if sys.byteorder == "big":
+            column = array(typecode, view.tobytes())
+            column.byteswap()
+            view.release()
+        else:
+            column = view.cast(typecode)
+            self._views.extend((view, column))
+        return column, _aligned(end)
+
+    def _city(self, city_id: int) -> str:
+        return str(self._city_names[self._city_offsets[city_id] : self._city_offsets[city_id + 1]], "utf-8")
+
+    def _find(self, zip_code: int) -> int | None:
+        zip_codes = self._zip_codes
+        row = bisect_left(zip_codes, zip_code)
+        if row < len(zip_codes) and zip_codes[row] == zip_code:
+            return row
+        return None
+
+    def _record(self, row: int) -> ZipRecord:
+        state_id = self._state_ids[row]
+        return ZipRecord(
+            zip_code=self._zip_codes[row],
+            city=self._city(self._city_ids[row]),
+            state=self._state_names[state_id],
+            state_abbreviation=self._state_abbreviations[state_id],
+            latitude=self._latitudes[row] / _COORDINATE_SCALE,
+            longitude=self._longitudes[row] / _COORDINATE_SCALE,
+        )
+
+    def _build_city_index(self) -> None:
+        with self._city_index_lock:
+            if self._city_index is not None:
+                return
+            folded = [self._city(city_id).casefold() for city_id in range(len(self._city_offsets) - 1)]
+            index = {}
+            for row in range(len(self._zip_codes)):
+                key = (self._state_abbreviations[self._state_ids[row]], folded[self._city_ids[row]])
+                index.setdefault(key, []).append(row)
+            self._city_index = index
+
+
+def write_zip_database(records: Iterable[ZipRecord], path: str | Path) -> int:
+    """Write ZIP code records to a binary ZIP database file.
+
+    Args:
+        records (Iterable[ZipRecord]): The records to store. Duplicate ZIP codes keep the first record.
+        path (str | Path): Destination file.
+
+    Returns:
+        int: The number of records written.
+
+    """
+    by_zip = {}
+    for record in records:
+        by_zip.setdefault(int(record.zip_code), record)
+
+    states = {}
+    cities = {}
+    for record in by_zip.values():
+        states.setdefault(record.state_abbreviation, record.state)
+        cities.setdefault(record.city, None)
+    state_ids = {abbrev: i for i, abbrev in enumerate(sorted(states))}
+    city_ids = {city: i for i, city in enumerate(sorted(cities))}
+    if len(state_ids) > 0xFF or len(city_ids) > 0xFFFF:  # noqa: PLR2004
+        msg = "Too many distinct states or cities for the ZIP database format."
+        raise ValueError(msg)
+
+    columns = [array(typecode) for _, typecode in _RECORD_COLUMNS]
+    for zip_code in sorted(by_zip):
+        record = by_zip[zip_code]
+        columns[0].append(zip_code)
+        columns[1].append(city_ids[record.city])
+        columns[2].append(state_ids[record.state_abbreviation])
+        columns[3].append(round(float(record.latitude) * _COORDINATE_SCALE))
+        columns[4].append(round(float(record.longitude) * _COORDINATE_SCALE))
+
+    city_names = [city.encode("utf-8") for city in city_ids]
+    city_offsets = array("I", [0])
+    for name in city_names:
+        city_offsets.append(city_offsets[-1] + len(name))
+    columns.append(city_offsets)
+
+    with Path(path).open("wb") as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, len(state_ids), len(city_ids), len(by_zip)))
+        _pad(file)
+        file.writelines(_STATE.pack(abbrev.encode("ascii"), states[abbrev].encode("utf-8")) for abbrev in state_ids)
+        _pad(file)
+        for column in columns:
+            if sys.byteorder == "big":
+                column.byteswap()
+            file.write(column.tobytes())
+            _pad(file)
+        file.write(b"".join(city_names))
+
+    return len(by_zip)
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _pad(file: BinaryIO) -> None:
+    position = file.tell()
+    file.write(bytes(_aligned(position) - position))
@@ -79,3 +79,25 @@ def test_log_entry_exit_preserves_signature_async():
 
     assert foo.__name__ == "foo"
     assert foo.__qualname__.endswith("foo")
+
+
+def test_log_entry_exit_sample_every(patch_logger):
+    @log_entry_exit(sample_every=2)
+    def foo(a):
+        return a
+
+    assert [foo(i) for i in range(4)] == [0, 1, 2, 3]
+    assert patch_logger.records == ["Entering foo() with args=(0,), kwargs={}", "Exiting foo()"] + [
+        "Entering foo() with args=(2,), kwargs={}",
+        "Exiting foo()",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_log_entry_exit_async_sample_rate(patch_logger):
+    @log_entry_exit(sample_rate=1.0)
+    async def bar():
+        return 1
+
+    assert await bar() == 1
+    assert len(patch_logger.records) == 2
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import threading
+import tracemalloc
+
+import pytest
+
+from mooch.decorators.memory import log_memory_stats, memory_stats, track_memory
+
+
+def test_track_memory_records_peak_and_net():
+    kept = []
+
+    @track_memory
+    def allocate():
+        temporary = bytearray(1_000_000)
+        kept.append(bytearray(100_000))
+        del temporary
+
+    allocate.memory_profile.reset()
+    allocate()
+
+    stats = allocate.memory_profile.stats()
+    assert stats.count == stats.samples == 1
+    assert stats.peak_max >= 1_100_000
+    assert 100_000 <= stats.net_max < 200_000
+    site, size = stats.top_sites[0]
+    assert site.startswith(__file__)
+    assert size >= 100_000
+    assert not tracemalloc.is_tracing()
+
+
+def test_track_memory_nested_calls_keep_outer_peak():
+    @track_memory(top=0)
+    def inner():
+        return bytearray(10)
+
+    @track_memory(top=0)
+    def outer():
+        data = bytearray(500_000)
+        del data
+        inner()
+
+    outer.memory_profile.reset()
+    outer()
+
+    stats = outer.memory_profile.stats()
+    assert stats.peak_max >= 499_000
+    assert stats.top_sites == []
+
+
+@pytest.mark.asyncio
+async def test_track_memory_async():
+    @track_memory
+    async def allocate():
+        await asyncio.sleep(0)
+        return bytearray(200_000)
+
+    allocate.memory_profile.reset()
+    result = await allocate()
+
+    assert len(result) == 200_000
+    assert allocate.memory_profile.stats().net_max >= 200_000
+
+
+def test_track_memory_sampling_and_errors():
+    calls = []
+
+    @track_memory(sample_every=4, top=0)
+    def fail():
+        calls.append(1)
+        raise ValueError
+
+    fail.memory_profile.reset()
+    for _ in range(8):
+        with pytest.raises(ValueError):
+            fail()
+
+    stats = fail.memory_profile.stats()
+    assert len(calls) == 8
+    assert stats.samples == 2
+    assert stats.count == 8
+
+
+def test_track_memory_leaves_existing_tracing_on():
+    @track_memory(top=0)
+    def noop():
+        pass
+
+    tracemalloc.start()
+    try:
+        noop()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_memory_stats_and_log(caplog):
+    @track_memory
+    def allocate():
+        return bytearray(50_000)
+
+    allocate.memory_profile.reset()
+    allocate()
+
+    name = allocate.memory_profile.name
+    assert memory_stats()[name].count == 1
+    with caplog.at_level(logging.INFO):
+        log_memory_stats(reset=True)
+    assert any(message.startswith(f"{name}: count=1, peak mean=") for message in caplog.messages)
+    assert memory_stats()[name].count == 0
+
+
+@pytest.mark.asyncio
+async def test_track_memory_concurrent_tasks_keep_their_peaks():
+    @track_memory(top=0)
+    async def big():
+        data = bytearray(5_000_000)
+        del data
+        await asyncio.sleep(0.01)
+
+    @track_memory(top=0)
+    async def small():
+        await asyncio.sleep(0)
+        return bytearray(10)
+
+    big.memory_profile.reset()
+    small.memory_profile.reset()
+    await asyncio.gather(big(), small())
+
+    assert big.memory_profile.stats().peak_max >= 5_000_000
+
+
+def test_track_memory_concurrent_threads_keep_their_peaks():
+    allocated = threading.Event()
+    started = threading.Event()
+
+    @track_memory(top=0)
+    def big():
+        data = bytearray(5_000_000)
+        del data
+        allocated.set()
+        started.wait(5)
+
+    @track_memory(top=0)
+    def small():
+        started.set()
+        return bytearray(10)
+
+    big.memory_profile.reset()
+    thread = threading.Thread(target=big)
+    thread.start()
+    allocated.wait(5)
+    small()
+    thread.join()
+
+    assert big.memory_profile.stats().peak_max >= 5_000_000
+    assert not tracemalloc.is_tracing()
+
+
+def test_track_memory_second_decoration_keeps_its_options():
+    def allocate():
+        return bytearray(100_000)
+
+    every_call = track_memory(top=0)(allocate)
+    sampled = track_memory(top=3, sample_every=10)(allocate)
+    assert sampled.memory_profile is every_call.memory_profile
+
+    every_call.memory_profile.reset()
+    every_call()
+    for _ in range(10):
+        sampled()
+
+    stats = every_call.memory_profile.stats()
+    assert stats.samples == 2
+    assert stats.count == 11
+    assert stats.top_sites
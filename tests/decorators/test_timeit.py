@@ -1,9 +1,15 @@
 import asyncio
+import gc
 import logging
+import math
+import re
+import threading
+import time
+import weakref
 
 import pytest
 
-from mooch.decorators.timeit import timeit
+from mooch.decorators.timeit import LatencyHistogram, log_timeit_stats, timeit, timeit_stats
 
 
 def test_timeit_sync_logs_execution_time(caplog):
@@ -49,3 +55,349 @@ async def test_timeit_async_preserves_function_metadata():
 
     assert bar.__name__ == "bar"
     assert bar.__doc__ == "Async docstring."
+
+
+def test_timeit_aggregate_records_histogram():
+    @timeit(aggregate=True)
+    def square(x):
+        return x * x
+
+    square.histogram.reset()
+    for _ in range(100):
+        assert square(3) == 9
+
+    stats = square.histogram.stats()
+    assert stats.count == 100
+    assert 0 < stats.min <= stats.p50 <= stats.p95 <= stats.p99 <= stats.max
+    assert stats.min <= stats.mean <= stats.max
+
+
+def test_timeit_aggregate_records_calls_that_raise():
+    @timeit(aggregate=True)
+    def fail():
+        raise ValueError
+
+    fail.histogram.reset()
+    with pytest.raises(ValueError):
+        fail()
+    assert fail.histogram.stats().count == 1
+
+
+@pytest.mark.asyncio
+async def test_timeit_aggregate_async():
+    @timeit(aggregate=True)
+    async def nap():
+        await asyncio.sleep(0.01)
+
+    nap.histogram.reset()
+    await asyncio.gather(nap(), nap())
+
+    stats = nap.histogram.stats()
+    assert stats.count == 2
+    assert stats.min >= 0.01 * (1 - 1 / 64)
+
+
+def test_latency_histogram_percentiles_are_close():
+    histogram = LatencyHistogram("test")
+    durations = [1_000 * i for i in range(1, 10_001)]
+    for duration in durations:
+        histogram.record(duration)
+
+    stats = histogram.stats()
+    assert stats.count == 10_000
+    assert stats.min == pytest.approx(1e-6, rel=0.02)
+    assert stats.mean == pytest.approx(sum(durations) / len(durations) / 1e9)
+    assert stats.p50 == pytest.approx(5e-3, rel=0.02)
+    assert stats.p95 == pytest.approx(9.5e-3, rel=0.02)
+    assert stats.p99 == pytest.approx(9.9e-3, rel=0.02)
+    assert stats.max == pytest.approx(1e-2, rel=0.02)
+
+
+def test_latency_histogram_merges_threads():
+    histogram = LatencyHistogram("test")
+
+    def record():
+        for _ in range(1_000):
+            histogram.record(5_000)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    histogram.record(5_000)
+
+    assert histogram.stats().count == 4_001
+    assert len(histogram._shards) == 1
+
+
+def test_latency_histogram_recorder():
+    histogram = LatencyHistogram("test")
+    recorder = histogram.recorder(10)
+    assert histogram.recorder(10) is recorder
+    for _ in range(5):
+        recorder(2_000)
+    histogram.record(2_000, 10)
+    histogram.record(4_000)
+
+    stats = histogram.stats()
+    assert stats.samples == 7
+    assert stats.count == 61
+    assert stats.mean == pytest.approx((60 * 2_000 + 4_000) / 61 / 1e9)
+
+
+def test_latency_histogram_reset_clears_live_threads():
+    histogram = LatencyHistogram("test")
+    recorded = threading.Event()
+    done = threading.Event()
+
+    def record():
+        histogram.record(5_000)
+        recorded.set()
+        done.wait()
+        histogram.record(5_000)
+
+    thread = threading.Thread(target=record)
+    thread.start()
+    recorded.wait()
+    histogram.reset()
+    assert histogram.stats().count == 0
+    done.set()
+    thread.join()
+    assert histogram.stats().count == 1
+
+
+def test_latency_histogram_empty_and_reset():
+    histogram = LatencyHistogram("test")
+    histogram.record(10)
+    histogram.reset()
+
+    stats = histogram.stats()
+    assert stats.count == 0
+    assert math.isnan(stats.p50)
+
+
+def test_latency_histogram_reports_periodically(caplog):
+    histogram = LatencyHistogram("tests.report", report_interval=0)
+
+    with caplog.at_level(logging.INFO):
+        histogram.record(1_000_000)
+    assert any(message.startswith("tests.report: count=1, ") for message in caplog.messages)
+
+
+def test_timeit_stats_and_log(caplog):
+    @timeit(aggregate=True)
+    def noop():
+        pass
+
+    noop.histogram.reset()
+    noop()
+
+    assert timeit_stats()[noop.histogram.name].count == 1
+    with caplog.at_level(logging.INFO):
+        log_timeit_stats(reset=True)
+    assert any(message.startswith(f"{noop.histogram.name}: count=1") for message in caplog.messages)
+    assert timeit_stats()[noop.histogram.name].count == 0
+
+
+def test_timeit_sample_every_scales_count():
+    calls = []
+
+    @timeit(aggregate=True, sample_every=10)
+    def work():
+        calls.append(1)
+
+    work.histogram.reset()
+    for _ in range(1_000):
+        work()
+
+    stats = work.histogram.stats()
+    assert len(calls) == 1_000
+    assert stats.samples == 100
+    assert stats.count == 1_000
+    assert "samples=100" in work.histogram.summary()
+
+
+def test_timeit_sample_rate_scales_count():
+    @timeit(aggregate=True, sample_rate=0.25)
+    def work():
+        pass
+
+    work.histogram.reset()
+    for _ in range(4_000):
+        work()
+
+    stats = work.histogram.stats()
+    assert 700 < stats.samples < 1_300
+    assert stats.count == round(stats.samples / 0.25)
+
+
+def test_timeit_sample_every_logs_some_calls(caplog):
+    @timeit(sample_every=3)
+    def work():
+        return 1
+
+    with caplog.at_level(logging.DEBUG):
+        assert [work() for _ in range(6)] == [1] * 6
+    assert sum("work executed in" in message for message in caplog.messages) == 2
+
+
+@pytest.mark.asyncio
+async def test_timeit_async_sampling():
+    @timeit(aggregate=True, sample_every=2)
+    async def work():
+        return 1
+
+    work.histogram.reset()
+    assert [await work() for _ in range(4)] == [1] * 4
+    assert work.histogram.stats().samples == 2
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"sample_every": 0}, {"sample_rate": 0}, {"sample_rate": 1.5}, {"sample_every": 2, "sample_rate": 0.5}],
+)
+def test_timeit_invalid_sampling(kwargs):
+    with pytest.raises(ValueError, match="sample"):
+        timeit(lambda: None, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_timeit_async_splits_running_and_suspended_time(caplog):
+    @timeit(block_threshold=None)
+    async def work():
+        time.sleep(0.02)
+        await asyncio.sleep(0.05)
+        return 1
+
+    with caplog.at_level(logging.DEBUG):
+        assert await work() == 1
+
+    (message,) = [m for m in caplog.messages if "work executed in" in m]
+    running, suspended = re.search(r"\((\S+) running, (\S+) suspended in awaits\)", message).groups()
+    assert 0.02 <= float(running) < 0.05
+    assert float(suspended) >= 0.045
+
+
+@pytest.mark.asyncio
+async def test_timeit_async_flags_blocking_step(caplog):
+    @timeit(block_threshold=0.02)
+    async def blocking():
+        await asyncio.sleep(0)
+        time.sleep(0.03)
+
+    @timeit(block_threshold=0.02)
+    async def waiting():
+        await asyncio.sleep(0.03)
+
+    with caplog.at_level(logging.WARNING):
+        await blocking()
+        await waiting()
+
+    assert [m.split(" for ")[0] for m in caplog.messages] == ["blocking blocked the event loop"]
+
+
+@pytest.mark.asyncio
+async def test_timeit_async_does_not_check_blocking_by_default(caplog):
+    @timeit
+    async def blocking():
+        time.sleep(0.15)
+
+    with caplog.at_level(logging.WARNING):
+        await blocking()
+    assert caplog.messages == []
+
+
+def test_timeit_sync_aggregate_has_no_running_histogram():
+    @timeit(aggregate=True)
+    def work():
+        pass
+
+    work()
+    assert not hasattr(work, "running_histogram")
+    assert f"{work.histogram.name} (running)" not in timeit_stats()
+
+
+@pytest.mark.asyncio
+async def test_timeit_async_aggregate_running_histogram():
+    @timeit(aggregate=True)
+    async def work():
+        time.sleep(0.01)
+        await asyncio.sleep(0.03)
+
+    work.histogram.reset()
+    work.running_histogram.reset()
+    await work()
+
+    # min is the lower bound of its bucket, up to 1/64 below the true duration
+    assert work.histogram.stats().min >= 0.04 * (1 - 1 / 64)
+    running = timeit_stats()[f"{work.histogram.name} (running)"]
+    assert running.count == 1
+    assert 0.01 <= running.max < 0.03
+
+
+@pytest.mark.asyncio
+async def test_timeit_async_stepping_propagates_errors_and_cancellation():
+    @timeit(aggregate=True)
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError
+
+    @timeit(aggregate=True)
+    async def handle_cancel():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            return "cancelled"
+
+    with pytest.raises(ValueError):
+        await fail()
+
+    task = asyncio.ensure_future(handle_cancel())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    assert await task == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_timeit_async_stepping_leaves_no_reference_cycle():
+    errors = []
+
+    @timeit(aggregate=True)
+    async def handle_cancel():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError as e:
+            errors.append(weakref.ref(e))
+
+    # Garbage left in a cycle is finalized by whichever later test triggers a collection, running code that
+    # can let other threads run in the middle of it.
+    gc.disable()
+    try:
+        task = asyncio.ensure_future(handle_cancel())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await task
+        del task
+        assert errors[0]() is None
+    finally:
+        gc.enable()
+
+
+def test_timeit_wrappers_with_different_sampling_share_histogram():
+    def work():
+        pass
+
+    every_call = timeit(aggregate=True)(work)
+    sampled = timeit(aggregate=True, sample_every=100)(work)
+    assert sampled.histogram is every_call.histogram
+
+    every_call.histogram.reset()
+    for _ in range(100):
+        every_call()
+    for _ in range(1_000):
+        sampled()
+
+    stats = every_call.histogram.stats()
+    assert stats.samples == 110
+    assert stats.count == 1_100
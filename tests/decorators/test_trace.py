@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from mooch.decorators.trace import clear_trace, export_trace, set_trace_capacity, span, trace, trace_spans
+
+
+@pytest.fixture(autouse=True)
+def empty_trace():
+    clear_trace()
+    yield
+    set_trace_capacity(10_000)
+    clear_trace()
+
+
+def test_span_records_parent_and_child():
+    with span("parent", user="alice") as attributes:
+        with span("child"):
+            pass
+        attributes["rows"] = 3
+
+    child, parent = trace_spans()
+    assert (child.name, parent.name) == ("child", "parent")
+    assert parent.parent_id is None
+    assert child.parent_id == parent.span_id
+    assert parent.attributes == {"user": "alice", "rows": 3}
+    assert parent.start_ns <= child.start_ns
+    assert child.duration_ns <= parent.duration_ns
+    assert child.track_name == threading.current_thread().name
+
+
+def test_trace_decorator_records_errors():
+    @trace
+    def fail():
+        raise ValueError
+
+    @trace(name="outer")
+    def outer():
+        fail()
+
+    with pytest.raises(ValueError):
+        outer()
+
+    inner, outer_span = trace_spans()
+    assert inner.name.endswith("fail")
+    assert inner.error == "ValueError"
+    assert outer_span.name == "outer"
+    assert outer_span.error == "ValueError"
+    assert inner.parent_id == outer_span.span_id
+
+
+@pytest.mark.asyncio
+async def test_trace_async_tasks_continue_parent_span():
+    @trace
+    async def child(n):
+        await asyncio.sleep(0.01)
+        return n
+
+    @trace
+    async def parent():
+        return await asyncio.gather(child(1), child(2))
+
+    assert await parent() == [1, 2]
+
+    spans = {s.span_id: s for s in trace_spans()}
+    (root,) = [s for s in spans.values() if s.parent_id is None]
+    children = [s for s in spans.values() if s.parent_id == root.span_id]
+    assert len(children) == 2
+    assert len({s.track_id for s in children}) == 2
+    assert all(s.duration_ns >= 10_000_000 for s in children)
+
+
+def test_plain_thread_starts_without_parent():
+    with span("main"):
+        thread = threading.Thread(target=_traced_worker)
+        thread.start()
+        thread.join()
+
+    worker, main = trace_spans()
+    assert worker.parent_id is None
+    assert worker.track_id != main.track_id
+
+
+def _traced_worker():
+    with span("worker"):
+        pass
+
+
+def test_ring_buffer_keeps_latest_spans():
+    set_trace_capacity(3)
+    for i in range(5):
+        with span(f"span {i}"):
+            pass
+
+    assert [s.name for s in trace_spans()] == ["span 2", "span 3", "span 4"]
+
+
+def test_export_trace_chrome_format(tmp_path):
+    with span("parent", zip_code=12345), span("child"):
+        pass
+
+    path = tmp_path / "trace.json"
+    exported = export_trace(path)
+    assert json.loads(path.read_text()) == exported
+
+    metadata = [e for e in exported["traceEvents"] if e["ph"] == "M"]
+    complete = [e for e in exported["traceEvents"] if e["ph"] == "X"]
+    assert metadata[0]["args"]["name"] == threading.current_thread().name
+    assert [e["name"] for e in complete] == ["child", "parent"]
+    child, parent = complete
+    assert child["tid"] == parent["tid"] == metadata[0]["tid"]
+    assert parent["ts"] <= child["ts"]
+    assert child["ts"] + child["dur"] <= parent["ts"] + parent["dur"]
+    assert parent["args"]["zip_code"] == 12345
+    assert child["args"]["parent_id"] == parent["args"]["span_id"]
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from mooch.location.async_location import AsyncLocation
+from mooch.location.cache import LocationCache
+from mooch.location.city_index import CityIndex
+from mooch.location.exceptions import LocationError, ProviderUnavailableError
+from mooch.location.location import _check_city
+
+PLACES = {
+    "/us/62704": {
+        "place name": "Springfield",
+        "longitude": "-89.6889",
+        "latitude": "39.7725",
+        "state": "Illinois",
+        "state abbreviation": "IL",
+    },
+    "/us/IL/Springfield": {
+        "place name": "Springfield",
+        "longitude": "-89.6495",
+        "latitude": "39.8",
+        "post code": "62701",
+    },
+}
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = delay
+        self.paths = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.statuses = []  # answered, in order, before any lookup
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.paths.append(self.path)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+            status = server.statuses.pop(0) if server.statuses else None
+        if status is not None:
+            self.send_response(status)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        place = PLACES.get(self.path)
+        if place is None and self.path.startswith("/us/1"):
+            place = dict(PLACES["/us/62704"], **{"place name": self.path})
+        data = {"post code": self.path.rsplit("/", 1)[-1], "places": [place]}
+        body = b"{}" if place is None else json.dumps(data).encode()
+        self.send_response(404 if place is None else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    monkeypatch.setattr(AsyncLocation, "api_url", f"http://127.0.0.1:{server.server_port}/us")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_from_zip(stub_server):
+    location = await AsyncLocation.from_zip(62704)
+    assert location.zip_code == 62704
+    assert location.city == "Springfield"
+    assert location.state == "Illinois"
+    assert location.state_abbreviation == "IL"
+    assert location.latitude == 39.7725
+    assert location.longitude == -89.6889
+
+
+@pytest.mark.asyncio
+async def test_from_city_state(stub_server):
+    location = await AsyncLocation.from_city_state("Springfield", "illinois")
+    assert location.city == "Springfield"
+    assert location.state == "Illinois"
+    assert location.state_abbreviation == "IL"
+    assert location.zip_code == 62701
+    assert location.all_zip_codes == [62701]
+    assert stub_server.paths == ["/us/IL/Springfield"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_zip(stub_server):
+    with pytest.raises(LocationError) as excinfo:
+        await AsyncLocation.from_zip(99999)
+    assert "Invalid zip code 99999." in str(excinfo.value)
+
+
+@pytest.mark.asyncio
+async def test_retries_throttled_and_failed_requests(stub_server, monkeypatch):
+    monkeypatch.setattr("mooch.location.rate_limit.BACKOFF", 0.01)
+    stub_server.statuses = [429, 503]
+    location = await AsyncLocation.from_zip(62704)
+    assert location.city == "Springfield"
+    assert len(stub_server.paths) == 3
+
+    stub_server.statuses = [503] * 3
+    cache = LocationCache()
+    with pytest.raises(ProviderUnavailableError):
+        await AsyncLocation.from_zip(62704, cache=cache)
+    assert cache.get("zip:62704") == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_invalid_state_does_not_request(stub_server):
+    with pytest.raises(LocationError) as excinfo:
+        await AsyncLocation.from_city_state("Springfield", "InvalidState")
+    assert "Invalid state name or abbreviation" in str(excinfo.value)
+    assert stub_server.paths == []
+
+
+@pytest.mark.asyncio
+async def test_unknown_city_does_not_request(stub_server):
+    with pytest.raises(LocationError) as excinfo:
+        await AsyncLocation.from_city_state("Xyzzy", "IL")
+    assert str(excinfo.value) == "Invalid city/state combination: Xyzzy, Illinois."
+    assert stub_server.paths == []
+
+
+@pytest.mark.asyncio
+async def test_misspelled_city_suggested_after_api_rejects_it(stub_server):
+    with pytest.raises(LocationError) as excinfo:
+        await AsyncLocation.from_city_state("Chicgo", "IL")
+    assert "Did you mean Chicago?" in str(excinfo.value)
+    assert stub_server.paths == ["/us/IL/Chicgo"]
+
+
+@pytest.mark.asyncio
+async def test_city_index_built_off_the_event_loop(stub_server, monkeypatch):
+    threads = []
+
+    def check_city(*args):
+        threads.append(threading.current_thread())
+        _check_city(*args)
+
+    monkeypatch.setattr(CityIndex, "_default", None)
+    monkeypatch.setattr("mooch.location.async_location._check_city", check_city)
+    await AsyncLocation.from_city_state("Springfield", "IL")
+    await AsyncLocation.from_city_state("Springfield", "IL")
+
+    assert threads[0] is not threading.current_thread()
+    assert threads[1] is threading.current_thread()
+    assert CityIndex.default_built("IL")
+    assert not CityIndex.default_built("WY")
+
+
+@pytest.mark.asyncio
+async def test_cache(stub_server):
+    cache = LocationCache()
+    await AsyncLocation.from_zip(62704, cache=cache)
+    location = await AsyncLocation.from_zip(62704, cache=cache)
+    assert location.city == "Springfield"
+    assert stub_server.paths == ["/us/62704"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_respects_concurrency_cap(stub_server):
+    stub_server.delay = 0.02
+    zip_codes = [10000 + i for i in range(20)]
+    results = await AsyncLocation.bulk(zip_codes=[*zip_codes, 99999, 10000], max_concurrency=4)
+    assert [result.city for result in results[:20]] == [f"/us/{zip_code}" for zip_code in zip_codes]
+    assert isinstance(results[20], LocationError)
+    assert results[21] is results[0]
+    assert len(stub_server.paths) == 21
+    assert stub_server.max_in_flight <= 4
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_lookups_share_one_request(stub_server):
+    stub_server.delay = 0.02
+    locations = await asyncio.gather(*(AsyncLocation.from_zip(62704) for _ in range(8)))
+    assert [location.city for location in locations] == ["Springfield"] * 8
+    assert stub_server.paths == ["/us/62704"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_through_different_clients_do_not_share(stub_server):
+    stub_server.delay = 0.02
+    async with httpx.AsyncClient() as first, httpx.AsyncClient() as second:
+        await asyncio.gather(*(AsyncLocation.from_zip(62704, client=client) for client in (first, second)))
+    assert stub_server.paths == ["/us/62704", "/us/62704"]
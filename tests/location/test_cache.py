@@ -0,0 +1,104 @@
+import gzip
+import json
+import time
+
+import pytest
+
+from mooch.location.cache import CacheInfo, LocationCache
+
+SPRINGFIELD = {"city": "Springfield", "state": "Illinois", "state_abbreviation": "IL", "latitude": 39.7725}
+
+
+def test_get_miss_then_hit():
+    cache = LocationCache()
+    assert cache.get("zip:62704") == (False, None)
+    cache.set("zip:62704", SPRINGFIELD)
+    assert cache.get("zip:62704") == (True, SPRINGFIELD)
+    assert cache.cache_info() == CacheInfo(hits=1, misses=1, evictions=0, maxsize=4096, currsize=1)
+
+
+def test_negative_entry():
+    cache = LocationCache()
+    cache.set("zip:99999", None)
+    assert cache.get("zip:99999") == (True, None)
+
+
+def test_lru_eviction():
+    cache = LocationCache(maxsize=2)
+    cache.set("a", {"n": 1})
+    cache.set("b", {"n": 2})
+    cache.get("a")
+    cache.set("c", {"n": 3})
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, {"n": 1})
+    assert cache.get("c") == (True, {"n": 3})
+    assert cache.cache_info().evictions == 1
+
+
+def test_ttl_expiry():
+    cache = LocationCache(ttl=0.01, negative_ttl=0)
+    cache.set("a", {"n": 1})
+    cache.set("b", None)
+    assert cache.get("b") == (False, None)
+    time.sleep(0.02)
+    assert cache.get("a") == (False, None)
+    assert cache.cache_info().currsize == 0
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    path = tmp_path / "locations.sqlite"
+    cache = LocationCache(path=path)
+    cache.set("zip:62704", SPRINGFIELD)
+    cache.set("zip:99999", None)
+    cache.close()
+
+    cache = LocationCache(path=path)
+    assert cache.get("zip:62704") == (True, SPRINGFIELD)
+    assert cache.get("zip:99999") == (True, None)
+    assert cache.cache_info().currsize == 2
+    cache.close()
+
+
+def test_clear(tmp_path):
+    cache = LocationCache(path=tmp_path / "locations.sqlite")
+    cache.set("a", {"n": 1})
+    cache.get("a")
+    cache.clear()
+    assert cache.cache_info() == CacheInfo(hits=0, misses=0, evictions=0, maxsize=4096, currsize=0)
+    assert cache.get("a") == (False, None)
+    cache.close()
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "locations.json.gz"
+    cache = LocationCache(negative_ttl=0)
+    cache.set("zip:62704", SPRINGFIELD)
+    cache.set("zip:99999", None)  # already expired, not exported
+    assert cache.export_snapshot(path) == 1
+
+    restored = LocationCache(path=tmp_path / "locations.sqlite")
+    assert restored.load_snapshot(path) == 1
+    assert restored.get("zip:62704") == (True, SPRINGFIELD)
+    restored.clear()
+    restored.set("zip:99999", None)
+    restored._entries.clear()  # the SQLite tier is exported too
+    assert restored.export_snapshot(path) == 1
+    restored.close()
+    assert LocationCache().load_snapshot(path) == 1
+
+
+def test_snapshot_keeps_remaining_ttl(tmp_path):
+    path = tmp_path / "locations.json.gz"
+    cache = LocationCache(ttl=0.05)
+    cache.set("zip:62704", SPRINGFIELD)
+    cache.export_snapshot(path)
+    time.sleep(0.06)
+    assert LocationCache().load_snapshot(path) == 0
+
+
+def test_snapshot_rejects_unknown_files(tmp_path):
+    path = tmp_path / "other.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        json.dump({"version": 99, "entries": []}, file)
+    with pytest.raises(ValueError, match="Unsupported location cache snapshot"):
+        LocationCache().load_snapshot(path)
@@ -0,0 +1,59 @@
+import pytest
+
+from mooch.location.city_index import CityIndex
+from mooch.location.zip_database import ZipDatabase
+
+CITIES = [
+    ("IL", "Springfield"),
+    ("IL", "Spring Grove"),
+    ("IL", "Springerton"),
+    ("IL", "Chicago"),
+    ("IL", "Chicago Ridge"),
+    ("IL", "Sheffield"),
+    ("MO", "Springfield"),
+    ("MO", "Saint Louis"),
+    ("MO", "Lake Saint Louis"),
+    ("IL", "springfield"),
+]
+
+
+@pytest.fixture
+def index():
+    return CityIndex(CITIES)
+
+
+def test_contains(index):
+    assert index.contains("Springfield", "IL")
+    assert index.contains("  SPRINGFIELD ", "il")
+    assert index.contains("saint-louis", "MO")
+    assert not index.contains("Chicago", "MO")
+    assert not index.contains("Springfield", "ZZ")
+
+
+def test_complete(index):
+    assert index.complete("spr", "IL") == ["Spring Grove", "Springerton", "Springfield"]
+    assert index.complete("spr", "IL", limit=2) == ["Spring Grove", "Springerton"]
+    assert index.complete("chicago", "IL") == ["Chicago", "Chicago Ridge"]
+    assert index.complete("x", "IL") == []
+    assert index.complete("spr", "ZZ") == []
+
+
+def test_suggest(index):
+    assert index.suggest("Springfeld", "IL")[0] == "Springfield"
+    assert index.suggest("Chicgo", "IL", limit=1) == ["Chicago"]
+    assert index.suggest("st louis", "MO") == ["Saint Louis", "Lake Saint Louis"]
+    assert index.suggest("Qwxz", "IL") == []
+
+
+def test_correct(index):
+    assert index.correct("springfield", "IL") == "Springfield"
+    assert index.correct("Sprngfield", "IL") == "Springfield"
+    assert index.correct("Qwxz", "IL") is None
+    assert index.correct("Springfield", "ZZ") is None
+
+
+def test_default_index_matches_database():
+    index = CityIndex.default()
+    assert index.contains("Springfield", "IL")
+    assert index.contains("Beverly Hills", "CA")
+    assert ("IL", "Springfield") in set(ZipDatabase.default().cities())
@@ -0,0 +1,72 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from mooch.location.distance import distance_matrix, distances_from, iter_distance_matrix, pairwise_distances
+from mooch.location.location import Location
+from mooch.location.spatial_index import haversine_miles
+
+POINTS = [
+    (39.7725, -89.6889),
+    (39.8, -89.6495),
+    (41.8858, -87.6181),
+    (40.7484, -73.9967),
+    (61.2166, -149.8756),
+    (-14.2756, -170.7048),
+]
+
+
+def brute_force(origins, destinations):
+    return np.array([[haversine_miles(*origin, *destination) for destination in destinations] for origin in origins])
+
+
+def test_distances_from():
+    distances = distances_from(POINTS[0], POINTS)
+    assert distances.shape == (len(POINTS),)
+    assert distances[0] == 0
+    np.testing.assert_allclose(distances, brute_force(POINTS[:1], POINTS)[0])
+
+
+def test_distances_from_locations():
+    locations = [Location(zip_code=zip_code, offline=True) for zip_code in (62704, 60601, 10001)]
+    distances = distances_from(locations[0], locations)
+    assert distances[1] == pytest.approx(181.76, abs=0.01)
+    np.testing.assert_allclose(distances, distances_from((39.7725, -89.6889), np.array(POINTS)[[0, 2, 3]]))
+
+
+def test_pairwise_distances():
+    distances = pairwise_distances(POINTS, POINTS[::-1])
+    expected = [haversine_miles(*origin, *destination) for origin, destination in zip(POINTS, POINTS[::-1])]
+    np.testing.assert_allclose(distances, expected)
+
+
+def test_pairwise_distances_length_mismatch():
+    with pytest.raises(ValueError, match="same length"):
+        pairwise_distances(POINTS, POINTS[:2])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 1024])
+def test_distance_matrix(chunk_size):
+    matrix = distance_matrix(POINTS, POINTS[:3], chunk_size=chunk_size)
+    assert matrix.shape == (len(POINTS), 3)
+    np.testing.assert_allclose(matrix, brute_force(POINTS, POINTS[:3]))
+
+
+def test_distance_matrix_defaults_to_origins():
+    matrix = distance_matrix(np.array(POINTS))
+    np.testing.assert_allclose(matrix, matrix.T)
+    np.testing.assert_array_equal(np.diag(matrix), 0)
+
+
+def test_iter_distance_matrix():
+    blocks = list(iter_distance_matrix(POINTS, chunk_size=4))
+    assert [(start, block.shape) for start, block in blocks] == [(0, (4, 6)), (4, (2, 6))]
+
+
+def test_empty_and_invalid_inputs():
+    assert distance_matrix([], POINTS).shape == (0, len(POINTS))
+    assert distances_from(POINTS[0], []).shape == (0,)
+    with pytest.raises(ValueError, match="shape"):
+        distances_from(POINTS[0], [1.0, 2.0, 3.0])
+    with pytest.raises(ValueError, match="chunk_size"):
+        distance_matrix(POINTS, chunk_size=0)
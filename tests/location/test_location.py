@@ -1,8 +1,14 @@
+import threading
+import time
+
 import pytest
 import requests
 
-from mooch.location.exceptions import LocationError
+from mooch.location.cache import LocationCache
+from mooch.location.exceptions import LocationError, ProviderUnavailableError, RateLimitedError
 from mooch.location.location import Location
+from mooch.location.providers import Place, Provider
+from mooch.location.rate_limit import TokenBucket
 
 
 def test_zip_to_city_state_success(monkeypatch):
@@ -30,7 +36,7 @@ def test_zip_to_city_state_success(monkeypatch):
         assert timeout == 5
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
     location = Location(62704)
     assert location.city == "Springfield"
     assert location.state == "Illinois"
@@ -46,17 +52,23 @@ def test_zip_to_city_state_failure_status(monkeypatch):
     def mock_get(url, timeout):
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
     with pytest.raises(LocationError) as excinfo:
         location = Location(99999)
     assert "Invalid zip code 99999." in str(excinfo.value)
 
 
+def test_offline_zip_code_without_coordinates():
+    # The bundled data leaves out ZIP codes the source only has (0, 0) placeholder coordinates for.
+    with pytest.raises(LocationError):
+        Location(9000, offline=True)
+
+
 def test_zip_to_city_state_request_timeout(monkeypatch):
     def mock_get(url, timeout):
         raise requests.Timeout("Request timed out")
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
     with pytest.raises(requests.Timeout):
         location = Location(90210)
 
@@ -93,7 +105,7 @@ def test_location_init_with_city_and_state_success(monkeypatch):
         assert timeout == 5
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
 
     location = Location(city="Springfield", state="Illinois")
     assert location.city == "Springfield"
@@ -111,7 +123,7 @@ def test_location_init_with_city_and_state_invalid_state(monkeypatch):
     def mock_get(url, timeout):
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
 
     with pytest.raises(LocationError) as excinfo:
         _ = Location(city="Springfield", state="InvalidState")
@@ -144,7 +156,7 @@ def test_location_init_with_city_and_state_valid_abbrev(monkeypatch):
         assert timeout == 5
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
 
     location = Location(city="Springfield", state="IL")
     assert location.city == "Springfield"
@@ -159,7 +171,7 @@ def test_city_state_request_timeout(monkeypatch):
     def mock_get(url, timeout):
         raise requests.Timeout("Request timed out")
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
     with pytest.raises(requests.Timeout):
         location = Location(city="Springfield", state="Illinois")
 
@@ -171,7 +183,7 @@ def test_city_state_failure_status(monkeypatch):
     def mock_get(url, timeout):
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
     with pytest.raises(LocationError) as excinfo:
         location = Location(city="Fake City", state="IL")
     assert "Invalid city/state combination" in str(excinfo.value)
@@ -187,3 +199,544 @@ def test_zip_and_state_but_not_city():
     with pytest.raises(ValueError) as excinfo:
         _ = Location(zip_code=62704, state="IL")
     assert "but not both" in str(excinfo.value)
+
+
+def test_offline_zip_code(monkeypatch):
+    def mock_get(url, timeout):
+        raise AssertionError("offline lookups must not use the network")
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    location = Location(62704, offline=True)
+    assert location.city == "Springfield"
+    assert location.state == "Illinois"
+    assert location.state_abbreviation == "IL"
+    assert location.latitude == 39.7725
+    assert location.longitude == -89.6889
+
+
+def test_offline_city_and_state(monkeypatch):
+    def mock_get(url, timeout):
+        raise AssertionError("offline lookups must not use the network")
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    location = Location(city="Springfield", state="IL", offline=True)
+    assert location.state == "Illinois"
+    assert location.zip_code == 62701
+    assert location.latitude == 39.8
+    assert location.longitude == -89.6495
+
+
+def test_offline_invalid_zip_code():
+    with pytest.raises(LocationError) as excinfo:
+        Location(99999, offline=True)
+    assert "Invalid zip code 99999." in str(excinfo.value)
+
+
+def test_offline_invalid_city_and_state():
+    with pytest.raises(LocationError) as excinfo:
+        Location(city="Fake City", state="IL", offline=True)
+    assert "Invalid city/state combination" in str(excinfo.value)
+
+
+def test_cache_reuses_zip_code_lookup(monkeypatch):
+    calls = []
+
+    class MockResponse:
+        status_code = 200
+
+        def json(self):
+            return {
+                "post code": "62704",
+                "places": [
+                    {
+                        "place name": "Springfield",
+                        "longitude": "-89.6889",
+                        "latitude": "39.7725",
+                        "state": "Illinois",
+                        "state abbreviation": "IL",
+                    },
+                ],
+            }
+
+    def mock_get(url, timeout):
+        calls.append(url)
+        return MockResponse()
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    cache = LocationCache()
+    Location(62704, cache=cache)
+    location = Location(62704, cache=cache)
+    assert location.city == "Springfield"
+    assert location.latitude == 39.7725
+    assert len(calls) == 1
+    assert cache.cache_info().hits == 1
+
+
+def test_cache_rejects_known_invalid_city_without_request(monkeypatch):
+    calls = []
+
+    class MockResponse:
+        status_code = 404
+
+    def mock_get(url, timeout):
+        calls.append(url)
+        return MockResponse()
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    monkeypatch.setattr(Location, "default_cache", LocationCache())
+    monkeypatch.setattr(Location, "validate_cities", False)
+    for _ in range(2):
+        with pytest.raises(LocationError) as excinfo:
+            Location(city="Fake City", state="IL")
+        assert "Invalid city/state combination" in str(excinfo.value)
+    assert len(calls) == 1
+
+
+def test_cache_skips_unexpected_status(monkeypatch):
+    calls = []
+
+    class MockResponse:
+        status_code = 500
+
+    def mock_get(url, timeout):
+        calls.append(url)
+        return MockResponse()
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    monkeypatch.setattr(Location, "max_retries", 0)
+    cache = LocationCache()
+    for _ in range(2):
+        with pytest.raises(ProviderUnavailableError):
+            Location(62704, cache=cache)
+    assert len(calls) == 2
+
+
+class StatusResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return {
+            "post code": "62704",
+            "places": [
+                {
+                    "place name": "Springfield",
+                    "longitude": "-89.6889",
+                    "latitude": "39.7725",
+                    "state": "Illinois",
+                    "state abbreviation": "IL",
+                },
+            ],
+        }
+
+
+def test_retries_after_rate_limit(monkeypatch):
+    responses = [StatusResponse(429, {"Retry-After": "0.05"}), StatusResponse(503), StatusResponse(200)]
+    calls = []
+
+    def mock_get(url, timeout):
+        calls.append(time.monotonic())
+        return responses.pop(0)
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    monkeypatch.setattr(Location, "rate_limiter", TokenBucket())
+    monkeypatch.setattr("mooch.location.rate_limit.BACKOFF", 0.01)
+    cache = LocationCache()
+    assert Location(62704, cache=cache).city == "Springfield"
+    assert len(calls) == 3
+    assert calls[1] - calls[0] >= 0.05
+    assert cache.get("zip:62704")[1]["city"] == "Springfield"
+
+
+def test_rate_limit_is_not_invalid_input(monkeypatch):
+    def mock_get(url, timeout):
+        return StatusResponse(429, {"Retry-After": "3600"})
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    monkeypatch.setattr(Location, "rate_limiter", TokenBucket())
+    cache = LocationCache()
+    with pytest.raises(RateLimitedError) as excinfo:
+        Location(62704, cache=cache)
+    assert not isinstance(excinfo.value, LocationError)
+    assert excinfo.value.retry_after == 3600
+    assert cache.get("zip:62704") == (False, None)
+    assert Location.rate_limiter.reserve() > 59
+
+
+def test_exhausted_rate_limit_retries_pause_shared_limiter(monkeypatch):
+    calls = []
+
+    def mock_get(url, timeout):
+        calls.append(url)
+        return StatusResponse(429)
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    monkeypatch.setattr(Location, "rate_limiter", TokenBucket())
+    monkeypatch.setattr(Location, "max_retries", 1)
+    monkeypatch.setattr("mooch.location.rate_limit.BACKOFF", 0.01)
+    with pytest.raises(RateLimitedError):
+        Location(62704)
+    assert len(calls) == 2
+    assert 0 < Location.rate_limiter.reserve() <= 0.02
+
+
+def test_bulk_zip_codes(monkeypatch):
+    calls = []
+
+    class MockResponse:
+        def __init__(self, zip_code):
+            self.status_code = 404 if zip_code == "99999" else 200
+            self.zip_code = zip_code
+
+        def json(self):
+            return {
+                "post code": self.zip_code,
+                "places": [
+                    {
+                        "place name": f"City {self.zip_code}",
+                        "longitude": "-89.6889",
+                        "latitude": "39.7725",
+                        "state": "Illinois",
+                        "state abbreviation": "IL",
+                    },
+                ],
+            }
+
+    def mock_get(url, timeout):
+        calls.append(url)
+        return MockResponse(url.rsplit("/", 1)[-1])
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    results = Location.bulk(zip_codes=[62704, 99999, 62701, 62704], max_workers=4)
+    assert [result.city for result in results if isinstance(result, Location)] == [
+        "City 62704",
+        "City 62701",
+        "City 62704",
+    ]
+    assert isinstance(results[1], LocationError)
+    assert results[0] is results[3]
+    assert len(calls) == 3
+
+
+def test_bulk_city_states():
+    results = Location.bulk(
+        city_states=[("Springfield", "IL"), ("Fake City", "IL"), ("springfield ", "Illinois")],
+        offline=True,
+    )
+    assert results[0].zip_code == 62701
+    assert isinstance(results[1], LocationError)
+    assert results[2] is results[0]
+
+
+def test_warm_cache(monkeypatch):
+    calls = []
+
+    class MockResponse:
+        status_code = 200
+
+        def json(self):
+            return {
+                "post code": "62704",
+                "places": [
+                    {
+                        "place name": "Springfield",
+                        "longitude": "-89.6889",
+                        "latitude": "39.7725",
+                        "state": "Illinois",
+                        "state abbreviation": "IL",
+                    },
+                ],
+            }
+
+    def mock_get(url, timeout):
+        calls.append(url)
+        return MockResponse()
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    cache = LocationCache()
+    assert Location.warm_cache([62704, 62704], cache=cache).result(timeout=5) == 2
+    assert len(calls) == 1
+    assert Location(62704, cache=cache).city == "Springfield"
+    assert Location.warm_cache([62704], cache=cache).result(timeout=5) == 1
+    assert len(calls) == 1
+
+    with pytest.raises(ValueError, match="needs a cache"):
+        Location.warm_cache([62704])
+
+
+def test_bulk_requires_one_input():
+    with pytest.raises(ValueError) as excinfo:
+        Location.bulk()
+    assert "but not both" in str(excinfo.value)
+    with pytest.raises(ValueError):
+        Location.bulk(zip_codes=[62704], city_states=[("Springfield", "IL")])
+
+
+def test_custom_session():
+    class MockResponse:
+        status_code = 200
+
+        def json(self):
+            return {
+                "post code": "62704",
+                "places": [
+                    {
+                        "place name": "Springfield",
+                        "longitude": "-89.6889",
+                        "latitude": "39.7725",
+                        "state": "Illinois",
+                        "state abbreviation": "IL",
+                    },
+                ],
+            }
+
+    class MockSession:
+        def __init__(self):
+            self.urls = []
+
+        def get(self, url, timeout):
+            self.urls.append(url)
+            return MockResponse()
+
+    session = MockSession()
+    location = Location(62704, session=session)
+    assert location.city == "Springfield"
+    assert session.urls == ["https://api.zippopotam.us/us/62704"]
+
+
+def test_lazy_zip_code_defers_request(monkeypatch):
+    calls = []
+
+    class MockResponse:
+        status_code = 200
+
+        def json(self):
+            return {
+                "post code": "62704",
+                "places": [
+                    {
+                        "place name": "Springfield",
+                        "longitude": "-89.6889",
+                        "latitude": "39.7725",
+                        "state": "Illinois",
+                        "state abbreviation": "IL",
+                    },
+                ],
+            }
+
+    def mock_get(url, timeout):
+        calls.append(url)
+        return MockResponse()
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    location = Location(62704, lazy=True)
+    assert location.zip_code == 62704
+    assert calls == []
+    assert location.latitude == 39.7725
+    assert location.city == "Springfield"
+    assert location.state_abbreviation == "IL"
+    assert len(calls) == 1
+
+
+def test_lazy_city_and_state_local_fields_never_request(monkeypatch):
+    def mock_get(url, timeout):
+        raise AssertionError("unexpected request")
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    location = Location(city="Springfield", state="illinois", lazy=True)
+    assert location.city == "Springfield"
+    assert location.state == "Illinois"
+    assert location.state_abbreviation == "IL"
+
+
+def test_state_normalized_from_any_spelling():
+    location = Location(city="San Juan", state=" puerto  rico ", lazy=True)
+    assert location.state == "Puerto Rico"
+    assert location.state_abbreviation == "PR"
+    location = Location(city="Springfield", state="il", lazy=True)
+    assert location.state_abbreviation == "IL"
+    assert Location(city="Springfield", state="17", lazy=True).state == "Illinois"
+
+
+def test_lazy_city_and_state_loads_on_access():
+    location = Location(city="Springfield", state="IL", lazy=True, offline=True)
+    assert location.zip_code == 62701
+    assert location.longitude == -89.6495
+
+
+def test_lazy_invalid_state_raises_immediately():
+    with pytest.raises(LocationError) as excinfo:
+        Location(city="Springfield", state="InvalidState", lazy=True)
+    assert "Invalid state name or abbreviation" in str(excinfo.value)
+
+
+def test_lazy_invalid_zip_code_raises_on_access():
+    location = Location(99999, lazy=True, offline=True)
+    with pytest.raises(LocationError):
+        _ = location.city
+    with pytest.raises(AttributeError):
+        _ = location.not_a_field
+
+
+def test_concurrent_identical_lookups_share_one_request(monkeypatch):
+    calls = []
+
+    class MockResponse:
+        status_code = 200
+
+        def json(self):
+            return {
+                "post code": "62704",
+                "places": [
+                    {
+                        "place name": "Springfield",
+                        "longitude": "-89.6889",
+                        "latitude": "39.7725",
+                        "state": "Illinois",
+                        "state abbreviation": "IL",
+                    },
+                ],
+            }
+
+    def mock_get(url, timeout):
+        calls.append(url)
+        time.sleep(0.05)
+        return MockResponse()
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    barrier = threading.Barrier(8)
+    cities = []
+
+    def worker():
+        barrier.wait()
+        cities.append(Location(62704).city)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cities == ["Springfield"] * 8
+    assert len(calls) == 1
+
+
+def test_concurrent_lookups_through_different_providers_do_not_share():
+    class SlowProvider(Provider):
+        def __init__(self, city):
+            self.city = city
+
+        def lookup_zip_code(self, zip_code):
+            time.sleep(0.05)
+            return {"city": self.city, "state": "Illinois", "state_abbreviation": "IL", "latitude": 0, "longitude": 0}
+
+    barrier = threading.Barrier(2)
+    cities = {}
+
+    def worker(provider):
+        barrier.wait()
+        cities[provider.city] = Location(62704, provider=provider).city
+
+    threads = [threading.Thread(target=worker, args=(SlowProvider(city),)) for city in ("Primary", "Secondary")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cities == {"Primary": "Primary", "Secondary": "Secondary"}
+
+
+def test_from_coordinates():
+    location = Location.from_coordinates(39.7725, -89.6889, offline=True)
+    assert location.zip_code == 62704
+    assert location.city == "Springfield"
+
+
+def test_unknown_city_rejected_without_request(monkeypatch):
+    def mock_get(url, timeout):
+        raise AssertionError("unexpected request")
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    with pytest.raises(LocationError) as excinfo:
+        Location(city="Xyzzy", state="IL")
+    assert str(excinfo.value) == "Invalid city/state combination: Xyzzy, Illinois."
+
+
+def test_misspelled_city_suggested_after_api_rejects_it(monkeypatch):
+    calls = []
+
+    class MockResponse:
+        status_code = 404
+
+    def mock_get(url, timeout):
+        calls.append(url)
+        return MockResponse()
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    with pytest.raises(LocationError) as excinfo:
+        Location(city="Springfeld", state="IL")
+    assert str(excinfo.value) == "Invalid city/state combination: Springfeld, Illinois. Did you mean Springfield?"
+    assert calls == ["https://api.zippopotam.us/us/IL/Springfeld"]
+
+
+@pytest.mark.parametrize(
+    ("city", "state"),
+    [("New York City", "NY"), ("St. Louis", "MO"), ("St Louis", "MO"), ("Ft Worth", "TX"), ("McLean", "VA")],
+)
+def test_city_spelled_differently_from_bundled_data_is_requested(monkeypatch, city, state):
+    # The API resolves GeoNames names, which differ from the bundled ones for these cities.
+    calls = []
+
+    class MockResponse:
+        status_code = 200
+
+        def json(self):
+            return {"places": [{"place name": city, "longitude": "-90.2", "latitude": "38.6", "post code": "63101"}]}
+
+    def mock_get(url, timeout):
+        calls.append(url)
+        return MockResponse()
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    assert Location(city=city, state=state).zip_code == 63101
+    assert len(calls) == 1
+
+
+def test_city_places_and_all_zip_codes(monkeypatch, tmp_path):
+    calls = []
+
+    class MockResponse:
+        status_code = 200
+
+        def json(self):
+            return {
+                "places": [
+                    {"place name": "Springfield", "longitude": "-89.6495", "latitude": "39.8", "post code": "62701"},
+                    {"place name": "Springfield", "longitude": "-89.6889", "latitude": "39.7725", "post code": "62704"},
+                    {"place name": "Springfield", "longitude": "-89.6", "latitude": "39.7", "post code": "62703"},
+                ],
+            }
+
+    def mock_get(url, timeout):
+        calls.append(url)
+        return MockResponse()
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    location = Location(city="Springfield", state="IL", cache=LocationCache(path=tmp_path / "cache.sqlite"))
+    assert location.zip_code == 62701
+    assert location.places[1] == Place(62704, "Springfield", 39.7725, -89.6889)
+    assert location.all_zip_codes == [62701, 62703, 62704]
+
+    cached = Location(city="Springfield", state="IL", cache=LocationCache(path=tmp_path / "cache.sqlite"))
+    assert cached.places == location.places
+    assert len(calls) == 1
+
+
+def test_offline_all_zip_codes():
+    location = Location(city="Springfield", state="IL", offline=True)
+    assert location.all_zip_codes[0] == 62701
+    assert {62703, 62704} <= set(location.all_zip_codes)
+    assert all(place.city == "Springfield" for place in location.places)
+    assert Location(62704, offline=True).all_zip_codes == [62704]
+    assert Location(62704, offline=True, lazy=True).all_zip_codes == [62704]
@@ -0,0 +1,87 @@
+import pytest
+
+from mooch.location.location import Location
+from mooch.location.location_table import LocationTable
+from mooch.location.zip_database import ZipRecord
+
+RECORDS = [
+    ZipRecord(62704, "Springfield", "Illinois", "IL", 39.7725, -89.6889),
+    ZipRecord(10001, "New York", "New York", "NY", 40.7484, -73.9967),
+    ZipRecord(62701, "Springfield", "Illinois", "IL", 39.8, -89.6495),
+    ZipRecord(65801, "Springfield", "Missouri", "MO", 37.2153, -93.2981),
+    ZipRecord(60601, "Chicago", "Illinois", "IL", 41.8858, -87.6181),
+]
+
+
+@pytest.fixture
+def table():
+    return LocationTable(RECORDS)
+
+
+def test_rows_round_trip(table):
+    assert len(table) == len(RECORDS)
+    assert list(table) == RECORDS
+    assert table[-1] == RECORDS[-1]
+
+
+def test_strings_are_interned(table):
+    assert table._cities == ["Springfield", "New York", "Chicago"]
+    assert table._states == [("Illinois", "IL"), ("New York", "NY"), ("Missouri", "MO")]
+
+
+def test_from_locations():
+    location = Location(zip_code=62704, offline=True)
+    table = LocationTable([location])
+    assert table[0] == ZipRecord(62704, "Springfield", "Illinois", "IL", 39.7725, -89.6889)
+
+
+def test_filter(table):
+    assert [row.zip_code for row in table.filter(state="illinois")] == [62704, 62701, 60601]
+    assert [row.zip_code for row in table.filter(city="springfield", state="IL")] == [62704, 62701]
+    assert [row.zip_code for row in table.filter(predicate=lambda row: row.latitude > 40)] == [10001, 60601]
+    assert len(table.filter(state="TX")) == 0
+
+
+def test_filtered_table_is_independent(table):
+    filtered = table.filter(state="MO")
+    filtered.append(ZipRecord(73301, "Austin", "Texas", "TX", 30.2672, -97.7431))
+    assert len(table) == len(RECORDS)
+    assert ("Texas", "TX") not in table._states
+    assert list(filtered)[0] == RECORDS[3]
+
+
+@pytest.mark.parametrize(
+    ("by", "expected"),
+    [
+        ("zip_code", [10001, 60601, 62701, 62704, 65801]),
+        ("city", [60601, 10001, 62704, 62701, 65801]),
+        ("state", [62704, 62701, 60601, 65801, 10001]),
+        ("latitude", [65801, 62704, 62701, 10001, 60601]),
+    ],
+)
+def test_sort(table, by, expected):
+    assert [row.zip_code for row in table.sort(by)] == expected
+
+
+def test_sort_reverse_and_invalid(table):
+    assert [row.zip_code for row in table.sort("longitude", reverse=True)] == [10001, 60601, 62701, 62704, 65801]
+    with pytest.raises(ValueError, match="Cannot sort by"):
+        table.sort("population")
+
+
+def test_to_numpy(table):
+    np = pytest.importorskip("numpy")
+    columns = table.to_numpy()
+    assert columns["zip_code"].dtype == np.uint32
+    assert columns["zip_code"].tolist() == [row.zip_code for row in RECORDS]
+    assert columns["city"].tolist() == [row.city for row in RECORDS]
+    assert columns["state_abbreviation"].tolist() == [row.state_abbreviation for row in RECORDS]
+    assert columns["latitude"].tolist() == [row.latitude for row in RECORDS]
+    assert LocationTable().to_numpy()["city"].shape == (0,)
+
+
+def test_location_has_no_instance_dict():
+    location = Location(zip_code=62704, offline=True)
+    assert not hasattr(location, "__dict__")
+    with pytest.raises(AttributeError):
+        location.population = 1
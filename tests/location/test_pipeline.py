@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+import threading
+import time
+
+from mooch.location.location import Location
+from mooch.location.pipeline import ThroughputReporter, geocode_rows, main
+
+
+def test_geocode_rows_offline_in_order():
+    rows = [
+        {"id": 1, "zip_code": "62704"},
+        {"id": 2, "city": "Springfield", "state": "illinois"},
+        {"id": 3, "zip_code": "99999"},
+        {"id": 4, "zip_code": "abc"},
+        {"id": 5, "zip_code": "02134"},
+    ]
+    results = list(geocode_rows(rows, offline=True, max_workers=4))
+    assert [row["id"] for row in results] == [1, 2, 3, 4, 5]
+    assert results[0]["city"] == "Springfield"
+    assert results[0]["latitude"] == 39.7725
+    assert results[0]["error"] is None
+    assert results[1]["zip_code"] == "62701"
+    assert results[1]["state_abbreviation"] == "IL"
+    assert results[2] == {"id": 3, "zip_code": "99999", "error": "Invalid zip code 99999."}
+    assert results[3]["error"] == "Invalid zip code abc."
+    assert results[4]["zip_code"] == "02134"
+
+
+def test_geocode_rows_deduplicates_in_flight_lookups(monkeypatch):
+    class MockResponse:
+        status_code = 200
+
+        def json(self):
+            return {
+                "post code": "62704",
+                "places": [
+                    {
+                        "place name": "Springfield",
+                        "longitude": "-89.6889",
+                        "latitude": "39.7725",
+                        "state": "Illinois",
+                        "state abbreviation": "IL",
+                    },
+                ],
+            }
+
+    calls = []
+    lock = threading.Lock()
+
+    def mock_get(url, timeout):
+        with lock:
+            calls.append(url)
+        time.sleep(0.02)
+        return MockResponse()
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    rows = [{"zip_code": "62704"} for _ in range(10)]
+    results = list(geocode_rows(rows, max_workers=4))
+    assert len(results) == 10
+    assert all(row["city"] == "Springfield" for row in results)
+    assert len(calls) == 1
+
+
+def test_geocode_rows_reads_at_most_window_rows_ahead():
+    read = []
+
+    def rows():
+        for i in range(100):
+            read.append(i)
+            yield {"zip_code": "62704"}
+
+    results = geocode_rows(rows(), offline=True, max_workers=2, window=5)
+    next(results)
+    assert len(read) == 5
+    assert sum(1 for _ in results) == 99
+
+
+def test_throughput_reporter():
+    stream = io.StringIO()
+    reporter = ThroughputReporter(stream, interval=0)
+    reporter.update({"error": None})
+    reporter.update({"error": "Invalid zip code 99999."})
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2
+    assert lines[-1].startswith("2 rows, 1 errors, ")
+    assert lines[-1].endswith(" rows/s")
+
+
+def test_main_csv(tmp_path, capsys):
+    source = tmp_path / "in.csv"
+    source.write_text("id,zip\n1,62704\n2,99999\n", encoding="utf-8")
+    target = tmp_path / "out.csv"
+
+    assert main([str(source), "-o", str(target), "--zip-column", "zip", "--offline"]) == 0
+
+    with target.open(newline="", encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert list(rows[0]) == [
+        "id",
+        "zip",
+        "zip_code",
+        "city",
+        "state",
+        "state_abbreviation",
+        "latitude",
+        "longitude",
+        "error",
+    ]
+    assert rows[0]["city"] == "Springfield"
+    assert rows[0]["error"] == ""
+    assert rows[1]["city"] == ""
+    assert rows[1]["error"] == "Invalid zip code 99999."
+    assert capsys.readouterr().err.startswith("2 rows, 1 errors, ")
+
+
+def test_main_jsonl(tmp_path, capsys):
+    source = tmp_path / "in.jsonl"
+    source.write_text('{"city": "Springfield", "state": "IL"}\n\n', encoding="utf-8")
+    target = tmp_path / "out.jsonl"
+
+    assert main([str(source), "-o", str(target), "--offline", "--quiet"]) == 0
+
+    rows = [json.loads(line) for line in target.read_text(encoding="utf-8").splitlines()]
+    assert rows == [
+        {
+            "city": "Springfield",
+            "state": "Illinois",
+            "zip_code": "62701",
+            "state_abbreviation": "IL",
+            "latitude": 39.8,
+            "longitude": -89.6495,
+            "error": None,
+        },
+    ]
+    assert capsys.readouterr().err == ""
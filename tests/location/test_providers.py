@@ -0,0 +1,216 @@
+import time
+
+import pytest
+import requests
+
+from mooch.location.cache import LocationCache
+from mooch.location.exceptions import LocationError, ProviderUnavailableError
+from mooch.location.location import Location
+from mooch.location.providers import (
+    CacheProvider,
+    CircuitBreaker,
+    OfflineProvider,
+    Provider,
+    ProviderChain,
+    ZippopotamProvider,
+)
+
+
+class MockResponse:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class MockSession:
+    def __init__(self, response=None, error=None, delay=0.0):
+        self.response = response
+        self.error = error
+        self.delay = delay
+        self.urls = []
+
+    def get(self, url, timeout):
+        self.urls.append(url)
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+ZIP_RESPONSE = MockResponse(
+    data={
+        "post code": "62704",
+        "places": [
+            {
+                "place name": "Springfield",
+                "longitude": "-89.6889",
+                "latitude": "39.7725",
+                "state": "Illinois",
+                "state abbreviation": "IL",
+            },
+        ],
+    },
+)
+
+
+class StaticProvider(Provider):
+    def __init__(self, values):
+        self.values = values
+        self.calls = 0
+
+    def lookup_zip_code(self, zip_code):
+        self.calls += 1
+        return self.values
+
+    def lookup_city_and_state(self, city, state_abbreviation):
+        self.calls += 1
+        return self.values
+
+
+def test_offline_provider():
+    provider = OfflineProvider()
+    assert provider.lookup_zip_code(62704)["city"] == "Springfield"
+    assert provider.lookup_city_and_state("Springfield", "IL")["zip_code"] == 62701
+    with pytest.raises(ProviderUnavailableError):
+        provider.lookup_zip_code(99999)
+    assert OfflineProvider(authoritative=True).lookup_zip_code(99999) is None
+
+
+def test_zippopotam_provider():
+    session = MockSession(ZIP_RESPONSE)
+    provider = ZippopotamProvider("http://example.test/us", session, timeout=1.0)
+    assert provider.lookup_zip_code(62704)["state_abbreviation"] == "IL"
+    assert session.urls == ["http://example.test/us/62704"]
+
+    session.response = MockResponse(404)
+    assert provider.lookup_city_and_state("Nowhere", "IL") is None
+    session.response = MockResponse(500)
+    provider.max_retries = 0
+    with pytest.raises(ProviderUnavailableError):
+        provider.lookup_zip_code(62704)
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+
+    def fail():
+        raise requests.Timeout
+
+    for _ in range(2):
+        with pytest.raises(requests.Timeout):
+            breaker.call(fail)
+    assert breaker.state == "open"
+    with pytest.raises(ProviderUnavailableError):
+        breaker.call(lambda: "not called")
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    with pytest.raises(requests.Timeout):
+        breaker.call(fail)
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_circuit_breaker_counts_slow_calls():
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_threshold=0.01)
+    for _ in range(2):
+        assert breaker.call(lambda: time.sleep(0.02) or "slow") == "slow"
+    assert breaker.state == "open"
+
+
+def test_chain_fails_over():
+    failing = ZippopotamProvider(
+        session=MockSession(error=requests.Timeout()),
+        breaker=CircuitBreaker(failure_threshold=1),
+    )
+    fallback = StaticProvider({"zip_code": 1})
+    chain = ProviderChain([failing, fallback])
+
+    assert chain.lookup_zip_code(62704) == {"zip_code": 1}
+    assert chain.lookup_city_and_state("Springfield", "IL") == {"zip_code": 1}
+    assert len(failing.session.urls) == 1  # the open circuit skips the remote provider
+    assert fallback.calls == 2
+
+
+def test_chain_first_answer_wins():
+    invalid = StaticProvider(None)
+    other = StaticProvider({"zip_code": 1})
+    assert ProviderChain([invalid, other]).lookup_zip_code(99999) is None
+    assert other.calls == 0
+
+
+def test_chain_raises_last_error():
+    chain = ProviderChain([OfflineProvider(), ZippopotamProvider(session=MockSession(error=requests.Timeout()))])
+    with pytest.raises(requests.Timeout):
+        chain.lookup_zip_code(99999)
+    with pytest.raises(ValueError, match="at least one provider"):
+        ProviderChain([])
+
+
+def test_chain_raises_provider_bugs():
+    class BrokenProvider(StaticProvider):
+        def lookup_zip_code(self, zip_code):
+            raise KeyError("places")
+
+    fallback = StaticProvider({"zip_code": 1})
+    with pytest.raises(KeyError):
+        ProviderChain([BrokenProvider(None), fallback]).lookup_zip_code(62704)
+    assert fallback.calls == 0
+
+
+def test_chain_cache_tier():
+    cache = LocationCache()
+    remote = StaticProvider({"zip_code": 1})
+    chain = ProviderChain([CacheProvider(cache), remote])
+
+    assert chain.lookup_city_and_state("Springfield", "IL") == {"zip_code": 1}
+    assert chain.lookup_city_and_state(" springfield", "IL") == {"zip_code": 1}
+    assert remote.calls == 1
+    assert cache.get("city:IL:springfield") == (True, {"zip_code": 1})
+
+    remote.values = None
+    assert chain.lookup_zip_code(99999) is None
+    assert chain.lookup_zip_code(99999) is None
+    assert remote.calls == 2
+
+
+def test_location_resolves_through_provider(monkeypatch):
+    def mock_get(url, timeout):
+        raise AssertionError("unexpected request")
+
+    monkeypatch.setattr(Location.default_session, "get", mock_get)
+    remote = ZippopotamProvider(session=MockSession(ZIP_RESPONSE))
+    chain = ProviderChain([OfflineProvider(), remote])
+
+    location = Location(62704, provider=chain)
+    assert location.city == "Springfield"
+    assert remote.session.urls == []
+
+    cache = LocationCache()
+    location = Location(1, provider=chain, cache=cache)
+    assert location.city == "Springfield"
+    assert remote.session.urls == ["https://api.zippopotam.us/us/1"]
+    Location(1, provider=chain, cache=cache)
+    assert len(remote.session.urls) == 1
+
+
+def test_location_default_provider(monkeypatch):
+    monkeypatch.setattr(Location, "default_provider", StaticProvider(None))
+    with pytest.raises(LocationError) as excinfo:
+        Location(62704)
+    assert "Invalid zip code 62704." in str(excinfo.value)
+    results = Location.bulk(zip_codes=[62704], provider=StaticProvider({"city": "Elsewhere"}))
+    assert results[0].city == "Elsewhere"
+
+
+def test_provider_resolves_cities_missing_from_bundled_data():
+    provider = StaticProvider({"zip_code": 62799, "latitude": 39.8, "longitude": -89.6})
+    location = Location(city="Brand New Town", state="IL", provider=provider)
+    assert location.zip_code == 62799
+    assert provider.calls == 1
@@ -0,0 +1,72 @@
+import email.utils
+import time
+
+from mooch.location.exceptions import RateLimitedError
+from mooch.location.rate_limit import MAX_RETRY_AFTER, TokenBucket, _failure, _pause_if_throttled, _retry_after
+
+
+class MockResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=100, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 0.005 < bucket.reserve() <= 0.01
+    assert 0.015 < bucket.reserve() <= 0.02
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket()
+    assert bucket.reserve() == 0
+    bucket.pause(0.05)
+    assert 0.04 < bucket.reserve() <= 0.05
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.04
+
+
+async def test_token_bucket_acquire_async():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire_async()
+    assert time.monotonic() - start >= 0.035
+
+
+def test_retry_after():
+    assert _retry_after(None) is None
+    assert _retry_after("2") == 2
+    assert _retry_after("-1") == 0
+    assert _retry_after("soon") is None
+    later = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 28 < _retry_after(later) <= 30
+
+
+def test_failure():
+    error, delay = _failure("http://test", MockResponse(429, {"Retry-After": "1"}), 0)
+    assert isinstance(error, RateLimitedError)
+    assert delay == 1
+    _, delay = _failure("http://test", MockResponse(429, {"Retry-After": str(MAX_RETRY_AFTER + 1)}), 0)
+    assert delay is None
+    error, delay = _failure("http://test", MockResponse(503), 2)
+    assert str(error) == "Unexpected HTTP 503 from http://test."
+    assert delay == 2
+    _, delay = _failure("http://test", MockResponse(400), 0)
+    assert delay is None
+
+
+def test_pause_if_throttled():
+    bucket = TokenBucket()
+    error, delay = _failure("http://test", MockResponse(429, {"Retry-After": "3600"}), 0)
+    assert _pause_if_throttled(bucket, error, delay)
+    assert MAX_RETRY_AFTER - 1 < bucket.reserve() <= MAX_RETRY_AFTER
+
+    bucket = TokenBucket()
+    error, delay = _failure("http://test", MockResponse(503), 0)
+    assert not _pause_if_throttled(bucket, error, delay)
+    assert not _pause_if_throttled(None, RateLimitedError("throttled", retry_after=1), 1)
+    assert bucket.reserve() == 0
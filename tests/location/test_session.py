@@ -0,0 +1,10 @@
+from mooch.location.session import create_session
+
+
+def test_create_session_mounts_pooled_adapter():
+    session = create_session(pool_connections=2, pool_maxsize=64)
+    adapter = session.get_adapter("https://api.zippopotam.us/us/62704")
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 64
+    assert session.get_adapter("http://localhost/") is adapter
+    assert session.headers["Connection"] == "keep-alive"
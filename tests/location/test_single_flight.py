@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from mooch.location.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def test_single_flight_coalesces_threads():
+    flight = SingleFlight()
+    calls = []
+    barrier = threading.Barrier(8)
+    results = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"city": "Springfield"}
+
+    def worker():
+        barrier.wait()
+        results.append(flight.do("zip:62704", fetch))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"city": "Springfield"}] * 8
+
+
+def test_single_flight_shares_exception_and_forgets_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise KeyError("boom")
+
+    with pytest.raises(KeyError):
+        flight.do("a", fail)
+    assert flight.do("a", lambda: 1) == 1
+
+
+def test_single_flight_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight_coalesces_tasks():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"city": "Springfield"}
+
+    results = await asyncio.gather(*(flight.do("zip:62704", fetch) for _ in range(8)))
+    assert len(calls) == 1
+    assert results == [{"city": "Springfield"}] * 8
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight_shares_exception():
+    flight = AsyncSingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise KeyError("boom")
+
+    results = await asyncio.gather(*(flight.do("a", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, KeyError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight_leader_cancelled_waiter_retries():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 1
+
+    leader = asyncio.ensure_future(flight.do("a", fetch))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(flight.do("a", fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await waiter == 1
+    assert len(calls) == 2
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from mooch.location.spatial_index import SpatialIndex, haversine_miles
+from mooch.location.zip_database import ZipDatabase
+
+POINTS = [
+    (62704, 39.7725, -89.6889),
+    (62701, 39.8, -89.6495),
+    (60601, 41.8858, -87.6181),
+    (10001, 40.7484, -73.9967),
+    (99501, 61.2166, -149.8756),
+    (96799, -14.2756, -170.7048),
+]
+
+
+@pytest.fixture
+def index():
+    return SpatialIndex(POINTS)
+
+
+def test_haversine_miles():
+    assert haversine_miles(39.7725, -89.6889, 39.7725, -89.6889) == 0
+    assert haversine_miles(39.7725, -89.6889, 41.8858, -87.6181) == pytest.approx(181.76, abs=0.01)
+
+
+def test_nearest(index):
+    nearest = index.nearest(39.78, -89.68, k=2)
+    assert [zip_code for zip_code, _ in nearest] == [62704, 62701]
+    assert nearest[0][1] == pytest.approx(haversine_miles(39.78, -89.68, 39.7725, -89.6889))
+    assert nearest[0][1] <= nearest[1][1]
+
+
+def test_nearest_more_than_available(index):
+    assert len(index.nearest(0, 0, k=100)) == len(POINTS)
+    assert SpatialIndex([]).nearest(0, 0) == []
+
+
+def test_nearest_across_antimeridian():
+    index = SpatialIndex([(1, 52.0, 179.9), (2, 52.0, 170.0)])
+    assert index.nearest(52.0, -179.9)[0][0] == 1
+
+
+def test_within(index):
+    assert [zip_code for zip_code, _ in index.within(39.78, -89.68, 10)] == [62704, 62701]
+    assert index.within(39.78, -89.68, 0.01) == []
+    assert {zip_code for zip_code, _ in index.within(39.78, -89.68, 200)} == {62704, 62701, 60601}
+
+
+def test_reverse_geocode(index):
+    assert index.reverse_geocode(40.75, -74.0) == 10001
+    assert index.reverse_geocode(-14.3, -170.7) == 96799
+    assert SpatialIndex([]).reverse_geocode(0, 0) is None
+
+
+def test_bundled_index_matches_brute_force():
+    index = SpatialIndex.default()
+    points = list(ZipDatabase.default().coordinates())
+    rng = random.Random(7)
+    for _ in range(3):
+        latitude, longitude = rng.uniform(25, 49), rng.uniform(-124, -67)
+        distances = sorted((haversine_miles(latitude, longitude, lat, lon), zip_code) for zip_code, lat, lon in points)
+        nearest = index.nearest(latitude, longitude, k=3)
+        assert [distance for _, distance in nearest] == pytest.approx([distance for distance, _ in distances[:3]])
+        within = index.within(latitude, longitude, 30)
+        assert len(within) == sum(1 for distance, _ in distances if distance <= 30)
+
+
+def test_nearest_far_from_data_falls_back_to_full_scan(monkeypatch):
+    index = SpatialIndex.default()
+    points = list(ZipDatabase.default().coordinates())
+    rings = []
+    ring = SpatialIndex._ring
+    monkeypatch.setattr(SpatialIndex, "_ring", lambda self, *args: rings.append(args) or ring(self, *args))
+
+    nearest = index.nearest(-60, 60)
+    distance, _ = min((haversine_miles(-60, 60, lat, lon), zip_code) for zip_code, lat, lon in points)
+    assert nearest[0][1] == pytest.approx(distance)
+    assert (2 * len(rings) - 1) ** 2 <= len(index._cells)
+
+
+def test_bundled_index_has_no_placeholder_coordinates():
+    # ZIP codes the source has no coordinates for were stored as (0, 0), which made them the nearest to it.
+    _, miles = SpatialIndex.default().nearest(0, 0)[0]
+    assert miles > 1000
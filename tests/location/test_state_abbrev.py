@@ -61,3 +61,63 @@ def test_abbrev_to_state_invalid():
         state_abbrev.abbrev_to_state("")
     with pytest.raises(ValueError):
         state_abbrev.abbrev_to_state("ZZ")
+
+
+def test_territories():
+    assert state_abbrev.state_to_abbrev("district of columbia") == "DC"
+    assert state_abbrev.state_to_abbrev("Washington D.C.") == "DC"
+    assert state_abbrev.abbrev_to_state("pr") == "Puerto Rico"
+    assert state_abbrev.valid_state("  U.S.  Virgin Islands ")
+    assert state_abbrev.valid_state_abbrev("gu")
+
+
+def test_normalize_state():
+    assert state_abbrev.normalize_state("California") == "CA"
+    assert state_abbrev.normalize_state("  nEw   yOrK ") == "NY"
+    assert state_abbrev.normalize_state(" tx ") == "TX"
+    assert state_abbrev.normalize_state("06") == "CA"
+    assert state_abbrev.normalize_state(" 6 ") == "CA"
+    assert state_abbrev.normalize_state(72) == "PR"
+    assert state_abbrev.normalize_state("Cali") is None
+    assert state_abbrev.normalize_state("") is None
+    assert state_abbrev.normalize_state(None) is None
+
+
+def test_normalize_states():
+    states = ["CA", " texas ", "36", "dc", "ZZ", None, "CA"]
+    assert state_abbrev.normalize_states(states) == ["CA", "TX", "NY", "DC", None, None, "CA"]
+    assert state_abbrev.normalize_states(states, to="name") == [
+        "California",
+        "Texas",
+        "New York",
+        "District of Columbia",
+        None,
+        None,
+        "California",
+    ]
+    assert state_abbrev.normalize_states(iter(["il", "Illinois"]), to="fips") == ["17", "17"]
+    with pytest.raises(ValueError, match="Invalid normalization target"):
+        state_abbrev.normalize_states(states, to="zip")
+
+
+def test_normalize_state_array():
+    np = pytest.importorskip("numpy")
+
+    abbreviations, valid = state_abbrev.normalize_state_array(np.array(["CA", " texas ", "ZZ", "CA", "06"]))
+    assert abbreviations.tolist() == ["CA", "TX", "", "CA", "CA"]
+    assert valid.tolist() == [True, True, False, True, True]
+
+    names, valid = state_abbrev.normalize_state_array(np.array([[b"il", b"pr"], [b"", b"dc"]]), to="name")
+    assert names.shape == (2, 2)
+    assert names.tolist() == [["Illinois", "Puerto Rico"], ["", "District of Columbia"]]
+    assert valid.tolist() == [[True, True], [False, True]]
+
+
+def test_normalize_state_array_objects():
+    pytest.importorskip("numpy")
+
+    abbreviations, valid = state_abbrev.normalize_state_array(["New York", None, 17, float("nan"), "new york"])
+    assert abbreviations.tolist() == ["NY", "", "IL", "", "NY"]
+    assert valid.tolist() == [True, False, True, False, True]
+    fips, _ = state_abbrev.normalize_state_array(["WA"], to="fips")
+    assert fips.tolist() == ["53"]
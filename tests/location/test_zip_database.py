@@ -0,0 +1,86 @@
+import pytest
+
+from mooch.location.zip_database import ZipDatabase, ZipRecord, write_zip_database
+
+
+@pytest.fixture
+def small_database(tmp_path):
+    records = [
+        ZipRecord(62704, "Springfield", "Illinois", "IL", 39.7725, -89.6889),
+        ZipRecord(62701, "Springfield", "Illinois", "IL", 39.8, -89.6495),
+        ZipRecord(501, "Holtsville", "New York", "NY", 40.8154, -73.0451),
+        ZipRecord(62701, "Duplicate", "Illinois", "IL", 0.0, 0.0),
+    ]
+    path = tmp_path / "zips.bin"
+    assert write_zip_database(records, path) == 3
+    return ZipDatabase(path)
+
+
+def test_lookup_round_trip(small_database):
+    assert len(small_database) == 3
+    assert small_database.lookup(62704) == ZipRecord(62704, "Springfield", "Illinois", "IL", 39.7725, -89.6889)
+    assert small_database.lookup(501).city == "Holtsville"
+
+
+def test_lookup_keeps_first_duplicate(small_database):
+    assert small_database.lookup(62701).city == "Springfield"
+
+
+def test_lookup_unknown_zip(small_database):
+    assert small_database.lookup(99999) is None
+    assert small_database.lookup(0) is None
+    assert 99999 not in small_database
+    assert 62704 in small_database
+
+
+def test_lookup_city_returns_lowest_zip(small_database):
+    record = small_database.lookup_city("  springfield ", "il")
+    assert record.zip_code == 62701
+
+
+def test_lookup_city_unknown(small_database):
+    assert small_database.lookup_city("Springfield", "NY") is None
+    assert small_database.lookup_city("Nowhere", "IL") is None
+
+
+def test_lookup_city_all(small_database):
+    assert [record.zip_code for record in small_database.lookup_city_all("Springfield", "IL")] == [62701, 62704]
+    assert small_database.lookup_city_all("Nowhere", "IL") == []
+
+
+def test_coordinates_skip_placeholder(tmp_path):
+    path = tmp_path / "zips.bin"
+    records = [
+        ZipRecord(9001, "Apo", "Armed Forces Europe", "AE", 0.0, 0.0),
+        ZipRecord(62704, "Springfield", "Illinois", "IL", 39.7725, -89.6889),
+    ]
+    write_zip_database(records, path)
+    assert list(ZipDatabase(path).coordinates()) == [(62704, 39.7725, -89.6889)]
+
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / "bad.bin"
+    path.write_bytes(b"NOPE" + bytes(16))
+    with pytest.raises(ValueError, match="Unsupported ZIP database file"):
+        ZipDatabase(path)
+
+
+def test_bundled_database():
+    database = ZipDatabase.default()
+    assert database is ZipDatabase.default()
+    assert len(database) > 40000
+    assert database.lookup(62704) == ZipRecord(62704, "Springfield", "Illinois", "IL", 39.7725, -89.6889)
+    assert database.lookup(20001).state == "District of Columbia"
+    # The source marks missing coordinates with (0, 0); those ZIP codes are left out of the database.
+    assert 9000 not in database
+    assert all((latitude, longitude) != (0, 0) for _, latitude, longitude in database.coordinates())
+
+
+def test_close_releases_file(tmp_path):
+    path = tmp_path / "zips.bin"
+    write_zip_database([ZipRecord(62704, "Springfield", "Illinois", "IL", 39.7725, -89.6889)], path)
+    database = ZipDatabase(path)
+    assert database.lookup_city("Springfield", "IL").zip_code == 62704
+    database.close()
+    path.unlink()
+    assert not path.exists()
@@ -0,0 +1,372 @@
+"""Benchmark `mooch.location` lookups against a local Zippopotam.us compatible stub server.
+
+The stub answers from the bundled ZIP code database after a configurable delay, and fails a configurable
+fraction of requests with a 503, so runs are repeatable and never touch the real API. Every scenario
+(single, bulk, cached and async lookups) is run at each concurrency level, and its throughput and
+p50/p95/p99 latencies are printed and written to a JSON file. Pass an earlier results file with
+`--compare` to print the change against it, e.g. between two releases.
+
+Example:
+    python tools/benchmark_location.py --latency 20 --error-rate 0.01 --output results.json
+    python tools/benchmark_location.py --compare results.json
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import json
+import math
+import pathlib
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from importlib import metadata
+from typing import TYPE_CHECKING
+from urllib.parse import unquote
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+from mooch.location.async_location import AsyncLocation, _create_client
+from mooch.location.cache import LocationCache
+from mooch.location.location import Location
+from mooch.location.session import create_session
+from mooch.location.zip_database import ZipDatabase
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+SCENARIOS = ("single", "bulk", "cached", "async")
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--requests", type=int, default=500, help="Lookups per scenario and concurrency level.")
+parser.add_argument("--concurrency", default="1,8,32", help="Comma separated concurrency levels.")
+parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma separated scenarios to run.")
+parser.add_argument("--batch-size", type=int, default=100, help="Zip codes per `Location.bulk` call.")
+parser.add_argument("--latency", type=float, default=20.0, help="Stub server response delay in milliseconds.")
+parser.add_argument("--jitter", type=float, default=5.0, help="Random extra delay of up to this many milliseconds.")
+parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 503.")
+parser.add_argument("--max-retries", type=int, default=Location.max_retries, help="Retries of a 429/5xx request.")
+parser.add_argument("--seed", type=int, default=0, help="Seed for the sampled zip codes and injected errors.")
+parser.add_argument("--output", default="benchmark_results.json", help="Destination JSON results file.")
+parser.add_argument("--compare", help="Earlier JSON results file to compare against.")
+args = parser.parse_args()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answer `/us/<zip code>` and `/us/<state abbr.>/<city>` like the Zippopotam.us API."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body are separate writes, don't wait on delayed ACKs
+    server: StubServer
+
+    def do_GET(self) -> None:
+        self.server.delay()
+        if self.server.fail():
+            self._send(503, {})
+            return
+
+        parts = [unquote(part) for part in self.path.strip("/").split("/")]
+        data = None
+        if len(parts) == 2 and parts[1].isdigit():  # noqa: PLR2004
+            data = zip_code_payload(self.server.database, int(parts[1]))
+        elif len(parts) == 3:  # noqa: PLR2004
+            data = city_payload(self.server.database, parts[2], parts[1])
+        self._send(404, {}) if data is None else self._send(200, data)
+
+    def _send(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Stub API server running on a background thread of this process."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, latency: float, jitter: float, error_rate: float, seed: int) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.database = ZipDatabase.default()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)  # noqa: S311
+        self._random_lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/us"
+
+    def start(self) -> None:
+        """Start serving on a background thread."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+    def delay(self) -> None:
+        with self._random_lock:
+            jitter = self._random.uniform(0, self.jitter)
+        time.sleep((self.latency + jitter) / 1000)
+
+    def fail(self) -> bool:
+        with self._random_lock:
+            return self._random.random() < self.error_rate
+
+
+def zip_code_payload(database: ZipDatabase, zip_code: int) -> dict | None:
+    """Return the API response body of a zip code, or None if it is unknown."""
+    record = database.lookup(zip_code)
+    if record is None:
+        return None
+    return {
+        "post code": f"{record.zip_code:05d}",
+        "country": "United States",
+        "country abbreviation": "US",
+        "places": [
+            {
+                "place name": record.city,
+                "longitude": str(record.longitude),
+                "latitude": str(record.latitude),
+                "state": record.state,
+                "state abbreviation": record.state_abbreviation,
+            },
+        ],
+    }
+
+
+def city_payload(database: ZipDatabase, city: str, state_abbreviation: str) -> dict | None:
+    """Return the API response body of a city and state abbreviation, or None if it is unknown."""
+    records = database.lookup_city_all(city, state_abbreviation)
+    if not records:
+        return None
+    return {
+        "country": "United States",
+        "country abbreviation": "US",
+        "place name": records[0].city,
+        "state": records[0].state,
+        "state abbreviation": records[0].state_abbreviation,
+        "places": [
+            {
+                "place name": record.city,
+                "longitude": str(record.longitude),
+                "latitude": str(record.latitude),
+                "post code": f"{record.zip_code:05d}",
+            }
+            for record in records
+        ],
+    }
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """Return the nearest-rank percentile of ascending values."""
+    if not sorted_values:
+        return math.nan
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(  # noqa: PLR0913, PLR0917
+    scenario: str,
+    concurrency: int,
+    latencies: list[float],
+    lookups: int,
+    errors: int,
+    seconds: float,
+) -> dict:
+    """Return the JSON result of one scenario run. Latencies are in seconds, reported in milliseconds."""
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "lookups": lookups,
+        "errors": errors,
+        "seconds": round(seconds, 4),
+        "throughput": round(lookups / seconds, 1) if seconds else None,
+        "latency_ms": {
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+            "mean": round(sum(values) / len(values), 3) if values else None,
+            "max": round(values[-1], 3) if values else None,
+        },
+    }
+
+
+def run_threaded(lookup: Callable[[int], object], zip_codes: list[int], concurrency: int) -> tuple[list, int, float]:
+    """Run one timed lookup per zip code on `concurrency` threads. Returns latencies, error count and seconds."""
+
+    def timed(zip_code: int) -> tuple[float, bool]:
+        start = time.perf_counter()
+        try:
+            lookup(zip_code)
+        except Exception:  # noqa: BLE001
+            return time.perf_counter() - start, True
+        return time.perf_counter() - start, False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, zip_codes))
+    seconds = time.perf_counter() - start
+    return [latency for latency, _ in outcomes], sum(failed for _, failed in outcomes), seconds
+
+
+def bench_single(zip_codes: list[int], concurrency: int) -> dict:
+    session = create_session(pool_maxsize=concurrency)
+    latencies, errors, seconds = run_threaded(
+        lambda zip_code: Location(zip_code, session=session),
+        zip_codes,
+        concurrency,
+    )
+    return summarize("single", concurrency, latencies, len(zip_codes), errors, seconds)
+
+
+def bench_cached(zip_codes: list[int], concurrency: int) -> dict:
+    session = create_session(pool_maxsize=concurrency)
+    cache = LocationCache(maxsize=len(zip_codes))
+    Location.bulk(zip_codes=zip_codes, max_workers=concurrency, cache=cache, session=session)
+    latencies, errors, seconds = run_threaded(
+        lambda zip_code: Location(zip_code, cache=cache, session=session),
+        zip_codes,
+        concurrency,
+    )
+    return summarize("cached", concurrency, latencies, len(zip_codes), errors, seconds)
+
+
+def bench_bulk(zip_codes: list[int], concurrency: int) -> dict:
+    """Time whole `Location.bulk` calls; latencies are per batch."""
+    session = create_session(pool_maxsize=concurrency)
+    batches = [zip_codes[i : i + args.batch_size] for i in range(0, len(zip_codes), args.batch_size)]
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for batch in batches:
+        batch_start = time.perf_counter()
+        results = Location.bulk(zip_codes=batch, max_workers=concurrency, session=session)
+        latencies.append(time.perf_counter() - batch_start)
+        errors += sum(isinstance(result, Exception) for result in results)
+    seconds = time.perf_counter() - start
+    return summarize("bulk", concurrency, latencies, len(zip_codes), errors, seconds)
+
+
+def bench_async(zip_codes: list[int], concurrency: int) -> dict:
+    async def run() -> tuple[list, int, float]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed(zip_code: int) -> tuple[float, bool]:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    await AsyncLocation.from_zip(zip_code, client=client)
+                except Exception:  # noqa: BLE001
+                    return time.perf_counter() - start, True
+                return time.perf_counter() - start, False
+
+        async with _create_client(concurrency) as client:
+            start = time.perf_counter()
+            outcomes = await asyncio.gather(*(timed(zip_code) for zip_code in zip_codes))
+            seconds = time.perf_counter() - start
+        return [latency for latency, _ in outcomes], sum(failed for _, failed in outcomes), seconds
+
+    latencies, errors, seconds = asyncio.run(run())
+    return summarize("async", concurrency, latencies, len(zip_codes), errors, seconds)
+
+
+BENCHMARKS = {"single": bench_single, "bulk": bench_bulk, "cached": bench_cached, "async": bench_async}
+
+
+def compare(results: list[dict], baseline_file: pathlib.Path) -> None:
+    """Print the throughput and p99 latency change of every run also found in the baseline results."""
+    baseline = json.loads(baseline_file.read_text(encoding="utf-8"))
+    previous = {(result["scenario"], result["concurrency"]): result for result in baseline["results"]}
+    print(f"\nCompared to {baseline_file} (mooch {baseline['version']}):")  # noqa: T201
+    for result in results:
+        before = previous.get((result["scenario"], result["concurrency"]))
+        if before is None or not before["throughput"] or not before["latency_ms"]["p99"]:
+            continue
+        throughput = (result["throughput"] / before["throughput"] - 1) * 100
+        p99 = (result["latency_ms"]["p99"] / before["latency_ms"]["p99"] - 1) * 100
+        print(  # noqa: T201
+            f"{result['scenario']:<8}{result['concurrency']:>6}  throughput {throughput:+7.1f}%  p99 {p99:+7.1f}%",
+        )
+
+
+def run_benchmarks() -> None:
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = set(scenarios) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    database = ZipDatabase.default()
+    all_zip_codes = [zip_code for zip_code, _, _ in database.coordinates()]
+    sample = random.Random(args.seed).sample  # noqa: S311
+
+    results = []
+    server = StubServer(args.latency, args.jitter, args.error_rate, args.seed)
+    server.start()
+    Location.api_url = server.url
+    AsyncLocation.api_url = server.url
+    Location.max_retries = AsyncLocation.max_retries = args.max_retries
+    print(f"{'scenario':<8}{'conc.':>6}{'lookups/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")  # noqa: T201
+    try:
+        for scenario in scenarios:
+            for concurrency in levels:
+                # Fresh zip codes for every run, so no run reads what an earlier run left in a cache.
+                result = BENCHMARKS[scenario](sample(all_zip_codes, args.requests), concurrency)
+                results.append(result)
+                latency = result["latency_ms"]
+                print(  # noqa: T201
+                    f"{scenario:<8}{concurrency:>6}{result['throughput']:>12.1f}"
+                    f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}{result['errors']:>8}",
+                )
+    finally:
+        server.stop()
+
+    try:
+        version = metadata.version("mooch")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    report = {
+        "version": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "settings": {
+            "requests": args.requests,
+            "batch_size": args.batch_size,
+            "latency_ms": args.latency,
+            "jitter_ms": args.jitter,
+            "error_rate": args.error_rate,
+            "max_retries": args.max_retries,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    output = pathlib.Path(args.output)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"\nWrote {len(results)} results to {output}.")  # noqa: T201
+
+    if args.compare:
+        compare(results, pathlib.Path(args.compare))
+
+
+if __name__ == "__main__":
+    run_benchmarks()
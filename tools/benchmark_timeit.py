@@ -0,0 +1,73 @@
+"""Benchmark the per-call overhead of `mooch.decorators.timeit`.
+
+Every scenario wraps the same no-op function, and its overhead is the best time per call over several rounds
+minus the best time of the bare function. The `aggregate` scenario, which records every call into a
+`LatencyHistogram`, is checked against `--target`; the exit status is 1 if it is over it.
+
+Example:
+    python tools/benchmark_timeit.py --calls 1000000 --target 1000
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import pathlib
+import platform
+import sys
+import timeit as timer
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+from mooch.decorators.timeit import LatencyHistogram, timeit
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--calls", type=int, default=500_000, help="Calls per round.")
+parser.add_argument("--rounds", type=int, default=7, help="Rounds per scenario; the best one is kept.")
+parser.add_argument("--target", type=float, default=1000.0, help="Maximum aggregate overhead in nanoseconds.")
+args = parser.parse_args()
+
+
+def noop() -> None:
+    pass
+
+
+def best_ns_per_call(func: callable) -> float:
+    """Return the best time per call of `func` in nanoseconds."""
+    return min(timer.repeat(func, number=args.calls, repeat=args.rounds)) / args.calls * 1e9
+
+
+def run_benchmarks() -> None:
+    # The per-call DEBUG log of plain @timeit is what aggregate replaces; it is disabled, as in production.
+    logging.getLogger(__name__).setLevel(logging.INFO)
+    histogram = LatencyHistogram("benchmark")
+    recorder = histogram.recorder()
+    scenarios = {
+        "debug-log": timeit(noop),
+        "aggregate": timeit(aggregate=True)(noop),
+        "sampled-1%": timeit(aggregate=True, sample_every=100)(noop),
+        "record": lambda: histogram.record(123_456),
+        "recorder": lambda: recorder(123_456),
+    }
+
+    print(f"Python {platform.python_version()} on {platform.platform()}")  # noqa: T201
+    base = best_ns_per_call(noop)
+    empty = best_ns_per_call(lambda: None)
+    print(f"{'scenario':<12}{'overhead ns':>14}")  # noqa: T201
+    overheads = {}
+    for name, func in scenarios.items():
+        # The histogram is called through a lambda, so the lambda's own call is left out of its overhead.
+        overheads[name] = best_ns_per_call(func) - (empty if name.startswith("record") else base)
+        print(f"{name:<12}{overheads[name]:>14.0f}")  # noqa: T201
+
+    met = overheads["aggregate"] <= args.target
+    print(  # noqa: T201
+        f"\naggregate overhead {'meets' if met else 'misses'} the {args.target:.0f} ns target, "
+        f"at {overheads['aggregate'] / overheads['debug-log']:.0%} of the debug-log overhead.",
+    )
+    sys.exit(0 if met else 1)
+
+
+if __name__ == "__main__":
+    run_benchmarks()
@@ -0,0 +1,66 @@
+"""Build the bundled offline ZIP code database used by `mooch.location`.
+
+The bundled database is built from the ZIP code list of the `zipcodes` package, version 3.0.0
+(https://github.com/seanpianka/zipcodes, MIT license), exported to a CSV file.
+
+The source CSV must have a header row with the columns:
+    zip_code, city, state, state_abbreviation, latitude, longitude
+
+Rows without coordinates, or with the (0, 0) placeholder the source uses for military (AA, AE, AP) and some
+other ZIP codes, are left out.
+
+Example:
+    python tools/build_zip_database.py --csv us_zip_codes.csv
+
+"""
+
+import argparse
+import csv
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+from mooch.location.zip_database import DEFAULT_DATABASE_PATH, ZipRecord, write_zip_database
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--csv", required=True, help="Source CSV file.")
+parser.add_argument("--output", default=str(DEFAULT_DATABASE_PATH), help="Destination database file.")
+args = parser.parse_args()
+
+
+def read_records(csv_file: pathlib.Path) -> list[ZipRecord]:
+    """Return the ZIP code records from the source CSV file."""
+    with csv_file.open(newline="", encoding="utf-8") as file:
+        return [
+            ZipRecord(
+                zip_code=int(row["zip_code"]),
+                city=row["city"].strip(),
+                state=row["state"].strip(),
+                state_abbreviation=row["state_abbreviation"].strip().upper(),
+                latitude=float(row["latitude"]),
+                longitude=float(row["longitude"]),
+            )
+            for row in csv.DictReader(file)
+            if _has_coordinates(row)
+        ]
+
+
+def _has_coordinates(row: dict[str, str]) -> bool:
+    """Return whether the row has coordinates, other than the (0, 0) placeholder."""
+    try:
+        return (float(row["latitude"]), float(row["longitude"])) != (0, 0)
+    except ValueError:
+        return False
+
+
+def build_database() -> None:
+    records = read_records(pathlib.Path(args.csv))
+    output = pathlib.Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    count = write_zip_database(records, output)
+    print(f"Wrote {count} ZIP codes to {output} ({output.stat().st_size} bytes).")  # noqa: T201
+
+
+if __name__ == "__main__":
+    build_database()